@@ -4,7 +4,7 @@ from django.contrib import admin
 from django.contrib.auth.models import Group
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin, GroupAdmin as BaseGroupAdmin
 from .forms import CustomUserChangeForm, CustomUserCreationForm
-from .models import CustomUser, Location, Appointment, SpecialistSchedule
+from .models import CustomUser, Location, Appointment, AppointmentSeries, ArchivedAppointment, SpecialistSchedule
 
 admin.site.unregister(Group)
 
@@ -80,6 +80,24 @@ class AppointmentAdmin(admin.ModelAdmin):
     list_filter = ("specialist", "location")
 
 
+@admin.register(ArchivedAppointment)
+class ArchivedAppointmentAdmin(admin.ModelAdmin):
+    """Class for specifing ArchivedAppointment fields in admin."""
+
+    model = ArchivedAppointment
+    list_display = ("__str__", "specialist", "location", "start_time", "end_time", "archived_at")
+    list_filter = ("specialist", "location")
+
+
+@admin.register(AppointmentSeries)
+class AppointmentSeriesAdmin(admin.ModelAdmin):
+    """Class for specifing AppointmentSeries fields in admin."""
+
+    model = AppointmentSeries
+    list_display = ("__str__", "specialist", "location", "start_time", "frequency", "interval", "is_active")
+    list_filter = ("specialist", "location", "frequency")
+
+
 @admin.register(SpecialistSchedule)
 class SpecialistScheduleAdmin(admin.ModelAdmin):
     """Class for specifing SpecialistSchedule fields in admin."""
@@ -0,0 +1,144 @@
+"""Database level constraints forbidding overlapping appointments.
+
+Appointments of one specialist or one location can't overlap each other.
+PostgreSQL gets exclusion constraints over half-open ranges backed by GiST indexes,
+they are declared in Appointment.Meta and skipped by other databases.
+SQLite gets triggers which do the same check before insert or update, they are created
+by a migration. SQLite drops triggers when a migration remakes the appointments table,
+such migrations have to run get_sqlite_trigger_statements again.
+"""
+
+from django.contrib.postgres.constraints import ExclusionConstraint
+from django.contrib.postgres.fields import DateTimeRangeField, RangeOperators
+from django.db import DEFAULT_DB_ALIAS, IntegrityError, connections
+from django.db.migrations import RunSQL
+from django.db.models import Func
+
+SPECIALIST_OVERLAP = "api_appointment_specialist_overlap"
+LOCATION_OVERLAP = "api_appointment_location_overlap"
+OVERLAP_OWNERS = {SPECIALIST_OVERLAP: "specialist", LOCATION_OVERLAP: "location"}
+
+SQLITE_OVERLAP_TRIGGER = """
+CREATE TRIGGER IF NOT EXISTS {name}_{event_name}
+BEFORE {event} {columns} ON {table}
+BEGIN
+    SELECT RAISE(ABORT, '{name}')
+    WHERE EXISTS (
+        SELECT 1 FROM {table}
+        WHERE {column} = NEW.{column}
+            AND start_time < NEW.end_time
+            AND end_time > NEW.start_time
+            {exclude_self}
+    );
+END;
+"""
+
+SQLITE_OVERLAP_EVENTS = [
+    ("INSERT", "", ""),
+    ("UPDATE", "OF specialist_id, location_id, start_time, end_time", "AND id != NEW.id"),
+]
+
+
+class TsTzRange(Func):
+    """PostgreSQL tstzrange of two datetime expressions, the range is half-open by default."""
+
+    function = "TSTZRANGE"
+    output_field = DateTimeRangeField()
+
+
+class PostgreSQLExclusionConstraint(ExclusionConstraint):
+    """Exclusion constraint which is created on PostgreSQL only, other databases check it in their own way."""
+
+    def constraint_sql(self, model, schema_editor):
+        """Get SQL of the constraint inside CREATE TABLE, nothing for other databases."""
+        if schema_editor.connection.vendor == "postgresql":
+            return super().constraint_sql(model, schema_editor)
+
+    def create_sql(self, model, schema_editor):
+        """Get SQL adding the constraint, nothing for other databases."""
+        if schema_editor.connection.vendor == "postgresql":
+            return super().create_sql(model, schema_editor)
+
+    def remove_sql(self, model, schema_editor):
+        """Get SQL removing the constraint, nothing for other databases."""
+        if schema_editor.connection.vendor == "postgresql":
+            return super().remove_sql(model, schema_editor)
+
+    def validate(self, model, instance, exclude=None, using=DEFAULT_DB_ALIAS):
+        """Check the instance against the constraint on PostgreSQL, other databases check it while saving."""
+        if connections[using].vendor == "postgresql":
+            super().validate(model, instance, exclude=exclude, using=using)
+
+
+class VendorRunSQL(RunSQL):
+    """RunSQL operation which is applied to databases of one vendor only."""
+
+    def __init__(self, vendor: str, *args, **kwargs):
+        """Create the operation for the vendor, other arguments are RunSQL ones."""
+        self.vendor = vendor
+        super().__init__(*args, **kwargs)
+
+    def deconstruct(self):
+        """Add the vendor to RunSQL arguments."""
+        name, args, kwargs = super().deconstruct()
+        return name, args, {"vendor": self.vendor, **kwargs}
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        """Apply the SQL to databases of the vendor."""
+        if schema_editor.connection.vendor == self.vendor:
+            super().database_forwards(app_label, schema_editor, from_state, to_state)
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        """Revert the SQL on databases of the vendor."""
+        if schema_editor.connection.vendor == self.vendor:
+            super().database_backwards(app_label, schema_editor, from_state, to_state)
+
+
+def get_overlap_constraints() -> list[PostgreSQLExclusionConstraint]:
+    """Get exclusion constraints forbidding overlapping appointments of one specialist or one location."""
+    return [
+        PostgreSQLExclusionConstraint(
+            name=name,
+            expressions=[(owner, RangeOperators.EQUAL), (TsTzRange("start_time", "end_time"), RangeOperators.OVERLAPS)],
+            index_type="gist",
+        )
+        for name, owner in OVERLAP_OWNERS.items()
+    ]
+
+
+def get_sqlite_trigger_statements(table: str) -> list[str]:
+    """Get SQL statements creating SQLite triggers which forbid overlapping appointments."""
+    return [
+        SQLITE_OVERLAP_TRIGGER.format(
+            name=name,
+            event=event,
+            event_name=event.lower(),
+            columns=columns,
+            table=table,
+            column=f"{owner}_id",
+            exclude_self=exclude_self,
+        )
+        for name, owner in OVERLAP_OWNERS.items()
+        for event, columns, exclude_self in SQLITE_OVERLAP_EVENTS
+    ]
+
+
+def get_sqlite_drop_trigger_statements() -> list[str]:
+    """Get SQL statements dropping SQLite triggers which forbid overlapping appointments."""
+    return [
+        f"DROP TRIGGER IF EXISTS {name}_{event.lower()};"
+        for name in OVERLAP_OWNERS
+        for event, _, _ in SQLITE_OVERLAP_EVENTS
+    ]
+
+
+def get_violated_overlap_constraint(error: IntegrityError) -> str | None:
+    """Return name of the overlap constraint which raised the error."""
+    cause = error.__cause__
+    if constraint_name := getattr(getattr(cause, "diag", None), "constraint_name", None):
+        return constraint_name if constraint_name in (SPECIALIST_OVERLAP, LOCATION_OVERLAP) else None
+
+    message = str(error)
+    for name in (SPECIALIST_OVERLAP, LOCATION_OVERLAP):
+        if name in message:
+            return name
@@ -1,7 +1,11 @@
 """Module for core functionality."""
 
 
+from rest_framework import status
 from rest_framework.metadata import SimpleMetadata
+from rest_framework.response import Response
+
+from .services import idempotency_services as ids
 
 
 class CustomMetadata(SimpleMetadata):
@@ -23,3 +27,53 @@ class CustomMetadata(SimpleMetadata):
                 data[key] = value
 
             return {"fields": data}
+
+
+class IdempotentCreateMixin:
+    """Replay the stored response for create requests repeated with the same Idempotency-Key header.
+
+    Only successful responses are stored, failed requests can be retried with the same key.
+    """
+
+    idempotency_header = "Idempotency-Key"
+
+    def create(self, request, *args, **kwargs):
+        """Create instance once for every idempotency key."""
+        if not (key := request.headers.get(self.idempotency_header)):
+            return super().create(request, *args, **kwargs)
+
+        key_hash, request_hash = ids.get_idempotency_key_hash(request, key), ids.get_request_hash(request)
+        idempotency_key, reserved = ids.reserve_idempotency_key(key_hash, request_hash)
+
+        if not reserved:
+            return self.get_idempotent_response(idempotency_key, request_hash)
+
+        try:
+            response = super().create(request, *args, **kwargs)
+        except Exception:
+            idempotency_key.delete()
+            raise
+
+        if status.is_success(response.status_code):
+            ids.store_idempotent_response(idempotency_key, response)
+        else:
+            idempotency_key.delete()
+        return response
+
+    def get_idempotent_response(self, idempotency_key, request_hash):
+        """Get the stored response or an error if the key can't be used for the request."""
+        if idempotency_key.request_hash != request_hash:
+            return Response(
+                {"detail": f"{self.idempotency_header} has already been used for another request."},
+                status=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            )
+        if idempotency_key.status_code is None:
+            return Response(
+                {"detail": f"Request with this {self.idempotency_header} is being processed."},
+                status=status.HTTP_409_CONFLICT,
+            )
+        return Response(
+            idempotency_key.response,
+            status=idempotency_key.status_code,
+            headers={"Idempotent-Replayed": "true"},
+        )
@@ -6,7 +6,7 @@ from datetime import timedelta
 from random import choice, randint
 
 import factory.fuzzy
-from api.models import Appointment, CustomUser, Location, SpecialistSchedule
+from api.models import Appointment, AppointmentSeries, CustomUser, Location, SpecialistSchedule
 from api.utils import generate_working_time, generate_working_time_intervals
 from django.conf import settings
 from django.contrib.auth.models import Group
@@ -176,6 +176,26 @@ class AppointmentFactory(factory.django.DjangoModelFactory):
     customer_lastname = factory.Faker("last_name_female")
 
 
+class AppointmentSeriesFactory(factory.django.DjangoModelFactory):
+    """Factory class for creating appointment series."""
+
+    class Meta:
+        """Class Meta for the definition of the AppointmentSeries model."""
+
+        model = AppointmentSeries
+
+    duration = timedelta(minutes=20)
+    start_time = get_future_datetime()
+    frequency = AppointmentSeries.FrequencyChoices.WEEKLY
+    specialist = factory.SubFactory(SpecialistFactory, add_schedule=True)
+    location = factory.SubFactory(LocationFactory)
+    customer_email = factory.LazyAttributeSequence(
+        lambda c, n: f"{c.customer_firstname.lower()}.{c.customer_lastname.lower()}_{n}@example.com"
+    )
+    customer_firstname = factory.Faker("first_name_female")
+    customer_lastname = factory.Faker("last_name_female")
+
+
 class SpecialistScheduleFactory(factory.django.DjangoModelFactory):
     """Factory class for creating specialists' schedules."""
 
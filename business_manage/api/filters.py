@@ -2,25 +2,96 @@
 
 from datetime import datetime
 
-from django.db.models import Q
 from django_filters import rest_framework as filters
 
-from .models import CustomUser
+from .models import Appointment, CustomUser, Location
+from .services import working_interval_services
+from .utils import get_local_day_filter
 
 
-class SpecialistFilter(filters.FilterSet):
-    """Class to filter specialists."""
+class WorkingTimeFilterSet(filters.FilterSet):
+    """Base class for filters of owners of working intervals by a day and a time window.
 
-    date = filters.CharFilter(method="working_day_filter", field_name="schedule")
+    The day is a date or a weekday name, the window is time_from and time_to. All of them are checked
+    against one working interval with one indexed subquery, so the owner works during the whole window.
+    """
+
+    working_interval_owner = ""
+
+    date = filters.CharFilter(method="skip_working_time_filter")
+    weekday = filters.ChoiceFilter(
+        method="skip_working_time_filter", choices=[(day, day) for day in working_interval_services.WEEK_DAYS]
+    )
+    time_from = filters.TimeFilter(method="skip_working_time_filter")
+    time_to = filters.TimeFilter(method="skip_working_time_filter")
+
+    def skip_working_time_filter(self, queryset, name, value):
+        """Working time fields are applied together by filter_queryset."""
+        return queryset
+
+    def filter_queryset(self, queryset):
+        """Filter queryset by the fields and by working time."""
+        queryset = super().filter_queryset(queryset)
+        data = self.form.cleaned_data
+        weekday, time_from, time_to = None, data.get("time_from"), data.get("time_to")
+        if data.get("date"):
+            try:
+                weekday = datetime.strptime(data["date"], "%Y-%m-%d").weekday()
+            except ValueError:
+                return queryset.none()
+        elif data.get("weekday"):
+            weekday = working_interval_services.WEEK_DAYS.index(data["weekday"])
+        if weekday is None and time_from is None and time_to is None:
+            return queryset
+        if time_from and time_to and time_from >= time_to:
+            return queryset.none()
+
+        return queryset.filter(
+            working_interval_services.get_working_window_exists(
+                self.working_interval_owner,
+                weekday,
+                time_from and time_from.hour * 60 + time_from.minute,
+                time_to and time_to.hour * 60 + time_to.minute,
+            )
+        )
+
+
+class SpecialistFilter(WorkingTimeFilterSet):
+    """Class to filter specialists by position and by working time of their schedules."""
+
+    working_interval_owner = "schedule__specialist"
 
     class Meta:
         model = CustomUser
         fields = ["position"]
 
-    def working_day_filter(self, queryset, name, value):
-        """Filter specialists who work in some date."""
-        try:
-            week_day = datetime.strptime(value, "%Y-%m-%d").strftime("%a")
-            return queryset.exclude(Q(schedule__isnull=True) | Q(**{f"schedule__working_time__{week_day}": []}))
-        except ValueError:
-            return queryset.none()
+
+class LocationFilter(WorkingTimeFilterSet):
+    """Class to filter locations by working time."""
+
+    working_interval_owner = "location"
+
+    class Meta:
+        model = Location
+        fields = []
+
+
+class AppointmentFilter(filters.FilterSet):
+    """Class to filter appointments.
+
+    Filters are ranges over start_time, so they are served by the specialist, location and active indexes.
+    """
+
+    specialist = filters.NumberFilter(field_name="specialist_id")
+    location = filters.NumberFilter(field_name="location_id")
+    customer_email = filters.CharFilter(lookup_expr="iexact")
+    start_time = filters.IsoDateTimeFromToRangeFilter()
+    date = filters.DateFilter(method="local_day_filter", field_name="start_time")
+
+    class Meta:
+        model = Appointment
+        fields = ["specialist", "location", "is_active", "customer_email", "start_time", "date"]
+
+    def local_day_filter(self, queryset, name, value):
+        """Filter appointments which start during the local day."""
+        return queryset.filter(get_local_day_filter(name, value))
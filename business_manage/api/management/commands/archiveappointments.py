@@ -0,0 +1,34 @@
+"""Management utility to move past appointments to the archive."""
+
+from api.services.archive_services import archive_appointments, get_archive_cutoff
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    """Command to archive finished appointments, it can be run periodically (e.g. by cron)."""
+
+    help = "Move appointments finished some days ago to the archive."
+
+    def add_arguments(self, parser):
+        """This method adds named arguments to the command."""
+        parser.add_argument(
+            "--days",
+            type=int,
+            help="Archive appointments finished this count of days ago.",
+            default=settings.APPOINTMENT_ARCHIVE_AFTER_DAYS,
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            help="Count of appointments moved by one transaction.",
+            default=settings.APPOINTMENT_ARCHIVE_BATCH_SIZE,
+        )
+
+    def handle(self, *args, **options):
+        """This method archives appointments and reports their count."""
+        if options["days"] < 0 or options["batch_size"] < 1:
+            raise CommandError("Days can't be negative and the batch size has to be positive.")
+
+        archived = archive_appointments(get_archive_cutoff(options["days"]), options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"Successfully archived {archived} appointments"))
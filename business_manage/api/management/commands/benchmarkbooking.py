@@ -0,0 +1,114 @@
+"""Management utility to benchmark concurrent bookings of one specialist."""
+
+import random
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+from api.factories.factories import LocationFactory, SpecialistScheduleFactory
+from api.serializers.appointment_serializers import AppointmentSerializer
+from api.utils import generate_working_time, generate_working_time_intervals, string_to_time
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DatabaseError, connections
+from django.utils.timezone import get_current_timezone
+from rest_framework.exceptions import ValidationError
+
+WORKING_START, WORKING_END = "09:00", "21:00"
+
+
+class Command(BaseCommand):
+    """Command to fire concurrent bookings at one specialist and report throughput, conflicts and latency."""
+
+    help = "Fire concurrent bookings at one specialist and report throughput, conflicts and latency."
+
+    def add_arguments(self, parser):
+        """This method adds named arguments to the command."""
+        parser.add_argument("--threads", type=int, help="Count of concurrent clients.", default=8)
+        parser.add_argument("--bookings", type=int, help="Count of booking attempts.", default=200)
+        parser.add_argument("--days", type=int, help="Count of days to book.", default=2)
+        parser.add_argument("--duration", type=int, help="Appointment duration in minutes.", default=30)
+
+    def handle(self, *args, **options):
+        """Create a specialist and a location, book them concurrently and delete them."""
+        if not settings.DEBUG:
+            raise CommandError("Can't execute in production...")
+        if options["bookings"] < 2:
+            raise CommandError("Benchmark needs at least 2 bookings.")
+
+        schedule = SpecialistScheduleFactory(working_time=generate_working_time_intervals(WORKING_START, WORKING_END))
+        location = LocationFactory(working_time=generate_working_time(WORKING_START, WORKING_END))
+        duration = timedelta(minutes=options["duration"])
+        slots = self.get_slots(options["days"], duration)
+        booking_data = [
+            {
+                "start_time": random.choice(slots),
+                "duration": duration,
+                "specialist": schedule.specialist.id,
+                "location": location.id,
+                "customer_firstname": "Benchmark",
+                "customer_lastname": "Customer",
+                "customer_email": f"customer_{number}@example.com",
+            }
+            for number in range(options["bookings"])
+        ]
+
+        try:
+            started_at = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=options["threads"]) as executor:
+                results = list(executor.map(self.book, booking_data))
+            elapsed = time.perf_counter() - started_at
+        finally:
+            schedule.specialist.delete()
+            location.delete()
+
+        self.report(results, elapsed)
+
+    @staticmethod
+    def get_slots(days: int, duration: timedelta) -> list[datetime]:
+        """Get start times of all appointments which fit the working time during the days."""
+        slots = []
+        tomorrow = datetime.now().date() + timedelta(days=1)
+        for day in range(days):
+            working_date = tomorrow + timedelta(days=day)
+            start_time, end_time = (
+                datetime.combine(working_date, string_to_time(value), tzinfo=get_current_timezone())
+                for value in (WORKING_START, WORKING_END)
+            )
+            while start_time + duration <= end_time:
+                slots.append(start_time)
+                start_time += duration
+        return slots
+
+    @staticmethod
+    def book(data: dict) -> tuple[str, float]:
+        """Book an appointment like the API does and return the outcome with latency."""
+        started_at = time.perf_counter()
+        try:
+            serializer = AppointmentSerializer(data=data)
+            serializer.is_valid(raise_exception=True)
+            serializer.save()
+            outcome = "booked"
+        except ValidationError:
+            outcome = "conflict"
+        except DatabaseError:
+            outcome = "error"
+        finally:
+            connections.close_all()
+        return outcome, time.perf_counter() - started_at
+
+    def report(self, results: list[tuple[str, float]], elapsed: float) -> None:
+        """Write throughput, outcomes and latency percentiles."""
+        outcomes = [outcome for outcome, _ in results]
+        latencies = [latency * 1000 for _, latency in results]
+        percentiles = statistics.quantiles(latencies, n=100, method="inclusive")
+
+        self.stdout.write(f"Attempts: {len(results)} in {elapsed:.2f}s ({len(results) / elapsed:.1f} req/s)")
+        self.stdout.write(
+            f"Booked: {outcomes.count('booked')}, conflicts: {outcomes.count('conflict')}, "
+            f"errors: {outcomes.count('error')}"
+        )
+        self.stdout.write(
+            f"Latency ms: p50 {percentiles[49]:.1f}, p99 {percentiles[98]:.1f}, max {max(latencies):.1f}"
+        )
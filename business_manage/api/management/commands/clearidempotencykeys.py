@@ -0,0 +1,15 @@
+"""Management utility to delete expired idempotency keys."""
+
+from api.services.idempotency_services import delete_expired_idempotency_keys
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    """Command to delete expired idempotency keys, it can be run periodically (e.g. by cron)."""
+
+    help = "Delete expired idempotency keys."
+
+    def handle(self, *args, **options):
+        """This method deletes expired keys and reports their count."""
+        deleted = delete_expired_idempotency_keys()
+        self.stdout.write(self.style.SUCCESS(f"Successfully deleted {deleted} expired idempotency keys"))
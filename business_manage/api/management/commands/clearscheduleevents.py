@@ -0,0 +1,15 @@
+"""Management utility to delete old schedule events."""
+
+from api.services.event_services import delete_expired_schedule_events
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    """Command to delete schedule events older than the retention period, it can be run periodically (e.g. by cron)."""
+
+    help = "Delete schedule events older than SCHEDULE_EVENTS_KEEP_DAYS."
+
+    def handle(self, *args, **options):
+        """This method deletes old events and reports their count."""
+        deleted = delete_expired_schedule_events()
+        self.stdout.write(self.style.SUCCESS(f"Successfully deleted {deleted} schedule events"))
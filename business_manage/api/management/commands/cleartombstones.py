@@ -0,0 +1,15 @@
+"""Management utility to delete old tombstones of deleted objects."""
+
+from api.services.sync_services import delete_expired_tombstones
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    """Command to delete tombstones older than the delta sync period, it can be run periodically (e.g. by cron)."""
+
+    help = "Delete tombstones older than DELTA_SYNC_KEEP_DAYS."
+
+    def handle(self, *args, **options):
+        """This method deletes old tombstones and reports their count."""
+        deleted = delete_expired_tombstones()
+        self.stdout.write(self.style.SUCCESS(f"Successfully deleted {deleted} tombstones"))
@@ -0,0 +1,48 @@
+"""Management utility to mark past appointments as completed."""
+
+import time
+
+from api.services.appointment_services import complete_past_appointments
+from api.transactions import database_lock
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+# Name of the database lock which allows only one sweep at a time across all nodes
+COMPLETE_APPOINTMENTS_LOCK = "api:complete-appointments"
+
+
+class Command(BaseCommand):
+    """Command to mark finished appointments as completed, it can be run periodically (e.g. by cron)."""
+
+    help = "Mark active appointments which already finished as completed."
+
+    def add_arguments(self, parser):
+        """This method adds named arguments to the command."""
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            help="Count of appointments updated by one statement.",
+            default=settings.APPOINTMENT_COMPLETE_BATCH_SIZE,
+        )
+
+    def handle(self, *args, **options):
+        """This method completes appointments holding the lock and reports their count and rate."""
+        if options["batch_size"] < 1:
+            raise CommandError("Batch size has to be positive.")
+
+        with database_lock(COMPLETE_APPOINTMENTS_LOCK) as is_locked:
+            if not is_locked:
+                self.stdout.write(self.style.WARNING("Appointments are being completed by another process"))
+                return
+
+            started = time.perf_counter()
+            completed = complete_past_appointments(timezone.now(), options["batch_size"])
+            elapsed = time.perf_counter() - started
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Successfully completed {completed} appointments in {elapsed:.2f} s "
+                f"({completed / elapsed if elapsed else 0:.0f} rows/s)"
+            )
+        )
@@ -0,0 +1,56 @@
+"""Management utility to import appointments from a CSV file."""
+
+import json
+import time
+
+from api.serializers.appointment_serializers import AppointmentBatchItemSerializer
+from api.services.import_services import import_appointments
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.exceptions import ValidationError
+
+
+class Command(BaseCommand):
+    """Command to import appointments migrated from other systems."""
+
+    help = "Import appointments from a CSV file, rejected rows are written to the errors report."
+
+    def add_arguments(self, parser):
+        """This method adds arguments to the command."""
+        parser.add_argument("path", help="Path to the CSV file with a header.")
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            help="Count of rows validated together and created by one transaction.",
+            default=settings.APPOINTMENT_IMPORT_BATCH_SIZE,
+        )
+        parser.add_argument("--report", help="Path to the report with errors of rejected rows, one JSON per line.")
+
+    def handle(self, *args, **options):
+        """This method imports the file and reports counts of created and rejected rows."""
+        if options["batch_size"] < 1:
+            raise CommandError("Batch size has to be positive.")
+
+        created = rejected = 0
+        started = time.perf_counter()
+        with open(options["path"], newline="", encoding="utf-8-sig") as lines:
+            report = open(options["report"], "w") if options["report"] else self.stdout
+            try:
+                batches = import_appointments(lines, AppointmentBatchItemSerializer, options["batch_size"])
+                for batch_created, errors in batches:
+                    created += batch_created
+                    rejected += len(errors)
+                    for line in sorted(errors):
+                        report.write(json.dumps({"line": line, "errors": errors[line]}) + "\n")
+            except ValidationError as error:
+                raise CommandError(error.detail["file"][0]) from error
+            finally:
+                if report is not self.stdout:
+                    report.close()
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Successfully imported {created} appointments, rejected {rejected} rows "
+                f"in {time.perf_counter() - started:.2f} s"
+            )
+        )
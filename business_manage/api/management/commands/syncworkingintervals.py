@@ -0,0 +1,17 @@
+"""Management utility to rebuild working intervals from working time of schedules and locations."""
+
+from api.services.working_interval_services import rebuild_working_intervals
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+
+class Command(BaseCommand):
+    """Command to fill working intervals of existing schedules and locations, saves keep them in sync later."""
+
+    help = "Rebuild working intervals from working time JSON of schedules and locations."
+
+    def handle(self, *args, **options):
+        """This method rebuilds working intervals in one transaction and reports their count."""
+        with transaction.atomic():
+            created = rebuild_working_intervals()
+        self.stdout.write(self.style.SUCCESS(f"Successfully created {created} working intervals"))
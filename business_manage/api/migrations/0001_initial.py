@@ -0,0 +1,302 @@
+# Generated by Django 4.1.5 on 2026-10-18 17:26
+
+import api.validators
+from django.conf import settings
+import django.core.validators
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CustomUser',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('password', models.CharField(max_length=128, verbose_name='password')),
+                ('last_login', models.DateTimeField(blank=True, null=True, verbose_name='last login')),
+                ('is_superuser', models.BooleanField(default=False, help_text='Designates that this user has all permissions without explicitly assigning them.', verbose_name='superuser status')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Created at')),
+                ('update_at', models.DateTimeField(auto_now=True, db_index=True, verbose_name='Updated at')),
+                ('email', models.EmailField(help_text='This field is required', max_length=100, unique=True)),
+                ('first_name', models.CharField(help_text='This field is required', max_length=150, verbose_name='first name')),
+                ('last_name', models.CharField(help_text='This field is required', max_length=150, verbose_name='last name')),
+                ('date_joined', models.DateTimeField(default=django.utils.timezone.now, verbose_name='date joined')),
+                ('patronymic', models.CharField(blank=True, max_length=150, verbose_name='patronymic')),
+                ('position', models.CharField(choices=[('position_1', 'Position_1'), ('position_2', 'Position_2'), ('position_3', 'Position_3'), ('position_4', 'Position_4')], help_text='This field is required', max_length=10, verbose_name='position')),
+                ('bio', models.TextField(blank=True, max_length=500, null=True, verbose_name='bio')),
+                ('avatar', models.ImageField(blank=True, default='default_avatar.jpeg', help_text='Get Avatar to the profile', upload_to='images', verbose_name='avatar')),
+                ('is_staff', models.BooleanField(default=False, help_text='Designates whether the user can log into this admin site.', verbose_name='staff status')),
+                ('is_active', models.BooleanField(default=True, help_text='Designates whether this user should be treated as active. Unselect this instead of deleting accounts.', verbose_name='active')),
+            ],
+            options={
+                'verbose_name': 'User',
+                'verbose_name_plural': 'Users',
+                'ordering': ['id'],
+                'abstract': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='Appointment',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Created at')),
+                ('update_at', models.DateTimeField(auto_now=True, db_index=True, verbose_name='Updated at')),
+                ('is_active', models.BooleanField(default=True, verbose_name='active')),
+                ('start_time', models.DateTimeField(help_text='This field is required', validators=[api.validators.validate_rounded_minutes, api.validators.validate_datetime_is_future], verbose_name='Start time')),
+                ('end_time', models.DateTimeField(blank=True, validators=[api.validators.validate_rounded_minutes, api.validators.validate_datetime_is_future], verbose_name='End time')),
+                ('duration', models.DurationField(help_text='Input only hours and minutes HH:MM', validators=[api.validators.validate_rounded_minutes_seconds], verbose_name='duration')),
+                ('customer_firstname', models.CharField(help_text='This field is required', max_length=150, verbose_name='customer firstname')),
+                ('customer_lastname', models.CharField(help_text='This field is required', max_length=150, verbose_name='customer lastname')),
+                ('customer_email', models.EmailField(help_text='This field is required', max_length=100, verbose_name='customer email')),
+                ('note', models.TextField(blank=True, max_length=300, null=True, verbose_name='Additional note')),
+            ],
+            options={
+                'verbose_name': 'Appointment',
+                'verbose_name_plural': 'Appointments',
+                'ordering': ['id'],
+                'abstract': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='AppointmentSeries',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Created at')),
+                ('update_at', models.DateTimeField(auto_now=True, db_index=True, verbose_name='Updated at')),
+                ('is_active', models.BooleanField(default=True, verbose_name='active')),
+                ('start_time', models.DateTimeField(help_text='This field is required', validators=[api.validators.validate_rounded_minutes, api.validators.validate_datetime_is_future], verbose_name='Start time')),
+                ('duration', models.DurationField(help_text='Input only hours and minutes HH:MM', validators=[api.validators.validate_rounded_minutes_seconds], verbose_name='duration')),
+                ('frequency', models.CharField(choices=[('daily', 'Daily'), ('weekly', 'Weekly')], default='weekly', max_length=10, verbose_name='frequency')),
+                ('interval', models.PositiveSmallIntegerField(default=1, validators=[django.core.validators.MinValueValidator(1)], verbose_name='interval')),
+                ('count', models.PositiveIntegerField(blank=True, null=True, validators=[django.core.validators.MinValueValidator(1)], verbose_name='count')),
+                ('until', models.DateField(blank=True, null=True, verbose_name='until')),
+                ('customer_firstname', models.CharField(help_text='This field is required', max_length=150, verbose_name='customer firstname')),
+                ('customer_lastname', models.CharField(help_text='This field is required', max_length=150, verbose_name='customer lastname')),
+                ('customer_email', models.EmailField(help_text='This field is required', max_length=100, verbose_name='customer email')),
+                ('note', models.TextField(blank=True, max_length=300, null=True, verbose_name='Additional note')),
+            ],
+            options={
+                'verbose_name': 'Appointment series',
+                'verbose_name_plural': 'Appointment series',
+                'ordering': ['id'],
+                'abstract': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='ArchivedAppointment',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('created_at', models.DateTimeField(verbose_name='Created at')),
+                ('update_at', models.DateTimeField(verbose_name='Updated at')),
+                ('archived_at', models.DateTimeField(auto_now_add=True, verbose_name='Archived at')),
+                ('is_active', models.BooleanField(verbose_name='active')),
+                ('start_time', models.DateTimeField(verbose_name='Start time')),
+                ('end_time', models.DateTimeField(verbose_name='End time')),
+                ('duration', models.DurationField(verbose_name='duration')),
+                ('customer_firstname', models.CharField(max_length=150, verbose_name='customer firstname')),
+                ('customer_lastname', models.CharField(max_length=150, verbose_name='customer lastname')),
+                ('customer_email', models.EmailField(max_length=100, verbose_name='customer email')),
+                ('note', models.TextField(blank=True, max_length=300, null=True, verbose_name='Additional note')),
+            ],
+            options={
+                'verbose_name': 'Archived appointment',
+                'verbose_name_plural': 'Archived appointments',
+                'ordering': ['id'],
+            },
+        ),
+        migrations.CreateModel(
+            name='IdempotencyKey',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=64, unique=True, verbose_name='key')),
+                ('request_hash', models.CharField(max_length=64, verbose_name='request hash')),
+                ('status_code', models.PositiveSmallIntegerField(blank=True, null=True, verbose_name='status code')),
+                ('response', models.JSONField(blank=True, null=True, verbose_name='response')),
+                ('expires_at', models.DateTimeField(db_index=True, verbose_name='expires at')),
+            ],
+            options={
+                'verbose_name': 'Idempotency key',
+                'verbose_name_plural': 'Idempotency keys',
+            },
+        ),
+        migrations.CreateModel(
+            name='Location',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Created at')),
+                ('update_at', models.DateTimeField(auto_now=True, db_index=True, verbose_name='Updated at')),
+                ('name', models.CharField(help_text='This field is required', max_length=200, unique=True, verbose_name='location name')),
+                ('address', models.TextField(blank=True, help_text='This field is not required', max_length=250, null=True, verbose_name='address')),
+                ('working_time', models.JSONField(blank=True, default=dict, null=True, validators=[api.validators.validate_days_name, api.validators.validate_working_time], verbose_name='working time')),
+            ],
+            options={
+                'verbose_name': 'Location',
+                'verbose_name_plural': 'Locations',
+                'ordering': ['id'],
+                'abstract': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='ScheduleEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('appointment_created', 'Appointment created'), ('appointment_updated', 'Appointment updated'), ('appointment_deleted', 'Appointment deleted'), ('schedule_changed', 'Schedule changed')], max_length=20, verbose_name='kind')),
+                ('specialist_id', models.BigIntegerField(verbose_name='specialist id')),
+                ('date', models.DateField(blank=True, null=True, verbose_name='date')),
+                ('appointment_id', models.BigIntegerField(blank=True, null=True, verbose_name='appointment id')),
+                ('created_at', models.DateTimeField(auto_now_add=True, db_index=True, verbose_name='created at')),
+            ],
+            options={
+                'verbose_name': 'Schedule event',
+                'verbose_name_plural': 'Schedule events',
+                'ordering': ['id'],
+            },
+        ),
+        migrations.CreateModel(
+            name='SpecialistSchedule',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Created at')),
+                ('update_at', models.DateTimeField(auto_now=True, db_index=True, verbose_name='Updated at')),
+                ('working_time', models.JSONField(default=dict, validators=[api.validators.validate_working_time_intervals, api.validators.validate_working_time_values, api.validators.validate_days_name], verbose_name='working time')),
+            ],
+            options={
+                'verbose_name': 'Schedule',
+                'verbose_name_plural': 'Schedules',
+                'ordering': ['id'],
+                'abstract': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='Tombstone',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('resource', models.CharField(choices=[('specialists', 'Specialists'), ('locations', 'Locations'), ('schedules', 'Schedules')], max_length=20, verbose_name='resource')),
+                ('object_id', models.BigIntegerField(verbose_name='object id')),
+                ('deleted_at', models.DateTimeField(auto_now_add=True, db_index=True, verbose_name='deleted at')),
+            ],
+            options={
+                'verbose_name': 'Tombstone',
+                'verbose_name_plural': 'Tombstones',
+                'ordering': ['id'],
+            },
+        ),
+        migrations.CreateModel(
+            name='WorkingInterval',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('weekday', models.PositiveSmallIntegerField(verbose_name='weekday')),
+                ('start_minute', models.PositiveSmallIntegerField(verbose_name='start minute')),
+                ('end_minute', models.PositiveSmallIntegerField(verbose_name='end minute')),
+                ('location', models.ForeignKey(blank=True, db_index=False, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='working_intervals', to='api.location')),
+                ('schedule', models.ForeignKey(blank=True, db_index=False, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='working_intervals', to='api.specialistschedule')),
+            ],
+            options={
+                'verbose_name': 'Working interval',
+                'verbose_name_plural': 'Working intervals',
+                'ordering': ['weekday', 'start_minute'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='tombstone',
+            index=models.Index(fields=['resource', 'deleted_at'], name='tombstone_resource_deleted'),
+        ),
+        migrations.AddField(
+            model_name='specialistschedule',
+            name='specialist',
+            field=models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='schedule', to=settings.AUTH_USER_MODEL, validators=[api.validators.validate_specialist]),
+        ),
+        migrations.AddIndex(
+            model_name='scheduleevent',
+            index=models.Index(fields=['specialist_id', 'id'], name='schedule_event_specialist'),
+        ),
+        migrations.AddField(
+            model_name='archivedappointment',
+            name='location',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='location_archived_appointments', to='api.location', verbose_name='Location'),
+        ),
+        migrations.AddField(
+            model_name='archivedappointment',
+            name='specialist',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_appointments', to=settings.AUTH_USER_MODEL, verbose_name='Specialist'),
+        ),
+        migrations.AddField(
+            model_name='appointmentseries',
+            name='location',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='location_appointment_series', to='api.location', verbose_name='Location'),
+        ),
+        migrations.AddField(
+            model_name='appointmentseries',
+            name='specialist',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='appointment_series', to=settings.AUTH_USER_MODEL, validators=[api.validators.validate_specialist], verbose_name='Specialist'),
+        ),
+        migrations.AddField(
+            model_name='appointment',
+            name='location',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='location_appointments', to='api.location', verbose_name='Location'),
+        ),
+        migrations.AddField(
+            model_name='appointment',
+            name='specialist',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='appointments', to=settings.AUTH_USER_MODEL, validators=[api.validators.validate_specialist], verbose_name='Specialist'),
+        ),
+        migrations.AddField(
+            model_name='customuser',
+            name='groups',
+            field=models.ManyToManyField(blank=True, help_text='The groups this user belongs to. A user will get all permissions granted to each of their groups.', related_name='user_set', related_query_name='user', to='auth.group', verbose_name='groups'),
+        ),
+        migrations.AddField(
+            model_name='customuser',
+            name='user_permissions',
+            field=models.ManyToManyField(blank=True, help_text='Specific permissions for this user.', related_name='user_set', related_query_name='user', to='auth.permission', verbose_name='user permissions'),
+        ),
+        migrations.AddIndex(
+            model_name='workinginterval',
+            index=models.Index(fields=['schedule', 'weekday', 'start_minute'], name='working_interval_schedule'),
+        ),
+        migrations.AddIndex(
+            model_name='workinginterval',
+            index=models.Index(fields=['location', 'weekday', 'start_minute'], name='working_interval_location'),
+        ),
+        migrations.AddIndex(
+            model_name='workinginterval',
+            index=models.Index(fields=['weekday', 'start_minute', 'end_minute'], name='working_interval_window'),
+        ),
+        migrations.AddConstraint(
+            model_name='workinginterval',
+            constraint=models.CheckConstraint(check=models.Q(models.Q(('location__isnull', True), ('schedule__isnull', False)), models.Q(('location__isnull', False), ('schedule__isnull', True)), _connector='OR'), name='working_interval_one_owner'),
+        ),
+        migrations.AddConstraint(
+            model_name='workinginterval',
+            constraint=models.CheckConstraint(check=models.Q(('start_minute__lt', models.F('end_minute'))), name='working_interval_start_end'),
+        ),
+        migrations.AddIndex(
+            model_name='archivedappointment',
+            index=models.Index(fields=['specialist', 'start_time'], name='archived_specialist_start'),
+        ),
+        migrations.AddIndex(
+            model_name='archivedappointment',
+            index=models.Index(fields=['location', 'start_time'], name='archived_location_start'),
+        ),
+        migrations.AddIndex(
+            model_name='appointment',
+            index=models.Index(fields=['specialist', 'start_time'], name='appointment_specialist_start'),
+        ),
+        migrations.AddIndex(
+            model_name='appointment',
+            index=models.Index(fields=['location', 'start_time'], name='appointment_location_start'),
+        ),
+        migrations.AddIndex(
+            model_name='appointment',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['start_time'], name='appointment_active_start'),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 4.1.5 on 2026-10-18 18:06
+
+import api.constraints
+from django.contrib.postgres.operations import BtreeGistExtension
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0001_initial'),
+    ]
+
+    operations = [
+        BtreeGistExtension(),
+        migrations.AddConstraint(
+            model_name='appointment',
+            constraint=api.constraints.PostgreSQLExclusionConstraint(expressions=[('specialist', '='), (api.constraints.TsTzRange('start_time', 'end_time'), '&&')], name='api_appointment_specialist_overlap'),
+        ),
+        migrations.AddConstraint(
+            model_name='appointment',
+            constraint=api.constraints.PostgreSQLExclusionConstraint(expressions=[('location', '='), (api.constraints.TsTzRange('start_time', 'end_time'), '&&')], name='api_appointment_location_overlap'),
+        ),
+        api.constraints.VendorRunSQL(
+            vendor='sqlite',
+            sql=api.constraints.get_sqlite_trigger_statements('api_appointment'),
+            reverse_sql=api.constraints.get_sqlite_drop_trigger_statements(),
+        ),
+    ]
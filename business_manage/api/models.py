@@ -1,4 +1,5 @@
 """Module for all project models."""
+from api.constraints import get_overlap_constraints
 from api.validators import (
     validate_datetime_is_future,
     validate_days_name,
@@ -9,8 +10,12 @@ from api.validators import (
     validate_working_time_intervals,
     validate_working_time_values,
 )
+from datetime import datetime, timedelta
+from typing import Iterator
+
 from django.contrib.auth.base_user import AbstractBaseUser, BaseUserManager
 from django.contrib.auth.models import Group, PermissionsMixin
+from django.core.validators import MinValueValidator
 from django.db import models
 from django.utils import timezone
 
@@ -24,6 +29,7 @@ class Base(models.Model):
     )
     update_at = models.DateTimeField(
         auto_now=True,
+        db_index=True,
         verbose_name="Updated at",
     )
 
@@ -323,10 +329,20 @@ class Appointment(Base):
 
         verbose_name = "Appointment"
         verbose_name_plural = "Appointments"
+        indexes = [
+            models.Index(fields=["specialist", "start_time"], name="appointment_specialist_start"),
+            models.Index(fields=["location", "start_time"], name="appointment_location_start"),
+            models.Index(fields=["start_time"], condition=models.Q(is_active=True), name="appointment_active_start"),
+        ]
+        constraints = get_overlap_constraints()
+
+    def set_end_time(self):
+        """Calculate end time according to the duration."""
+        self.end_time = self.start_time + self.duration
 
     def save(self, *args, **kwargs):
         """Reimplemented save method for end_time calculation."""
-        self.end_time = self.start_time + self.duration
+        self.set_end_time()
         return super().save(*args, **kwargs)
 
     def mark_as_completed(self):
@@ -339,6 +355,197 @@ class Appointment(Base):
         return f"{self.__class__.__name__} #{self.id}"
 
 
+class ArchivedAppointment(models.Model):
+    """This class stores past appointments moved out of the appointments table.
+
+    Rows keep ids and timestamps of the original appointments, so the live table stays small
+    and its indexes serve only current appointments.
+
+    Attributes:
+        id (int): Id of the original appointment
+        archived_at (datetime): Time when the appointment was archived
+        Other attributes are the same as Appointment attributes
+    """
+
+    ARCHIVED_FIELDS = [
+        "id",
+        "created_at",
+        "update_at",
+        "is_active",
+        "start_time",
+        "end_time",
+        "duration",
+        "specialist_id",
+        "location_id",
+        "customer_firstname",
+        "customer_lastname",
+        "customer_email",
+        "note",
+    ]
+
+    id = models.BigIntegerField(primary_key=True)
+    created_at = models.DateTimeField(verbose_name="Created at")
+    update_at = models.DateTimeField(verbose_name="Updated at")
+    archived_at = models.DateTimeField("Archived at", auto_now_add=True)
+    is_active = models.BooleanField("active")
+    start_time = models.DateTimeField("Start time")
+    end_time = models.DateTimeField("End time")
+    duration = models.DurationField("duration")
+    specialist = models.ForeignKey(
+        CustomUser,
+        related_name="archived_appointments",
+        on_delete=models.CASCADE,
+        verbose_name="Specialist",
+    )
+    location = models.ForeignKey(
+        Location,
+        related_name="location_archived_appointments",
+        on_delete=models.CASCADE,
+        verbose_name="Location",
+    )
+    customer_firstname = models.CharField("customer firstname", max_length=150)
+    customer_lastname = models.CharField("customer lastname", max_length=150)
+    customer_email = models.EmailField("customer email", max_length=100)
+    note = models.TextField(max_length=300, null=True, blank=True, verbose_name="Additional note")
+
+    class Meta:
+        """This class meta stores verbose names ordering data."""
+
+        ordering = ["id"]
+        verbose_name = "Archived appointment"
+        verbose_name_plural = "Archived appointments"
+        indexes = [
+            models.Index(fields=["specialist", "start_time"], name="archived_specialist_start"),
+            models.Index(fields=["location", "start_time"], name="archived_location_start"),
+        ]
+
+    def __repr__(self):
+        """str: Returns class name and instance id."""
+        return f"{self.__class__.__name__}(id={self.id})"
+
+    def __str__(self) -> str:
+        """str: Returns a verbose title of the archived appointment."""
+        return f"Appointment #{self.id}"
+
+
+class AppointmentSeries(Base):
+    """This class represents recurring appointments (RRULE-like FREQ, INTERVAL, COUNT and UNTIL).
+
+    Occurrences are not saved, they are expanded only for the requested period.
+
+    Attributes:
+        is_active (BooleanField): Status of the series
+        start_time (datetime): Start time of the first occurrence
+        duration (timedelta): Duration of every occurrence
+        frequency (str): Daily or weekly recurrence
+        interval (int): Count of days or weeks between occurrences
+        count (int, optional): Count of occurrences
+        until (date, optional): Date of the last possible occurrence
+        specialist (CustomUser): An appointed specialist for the occurrences
+        location (Location): A location of the occurrences
+        customer_firstname (str): Customer first name
+        customer_lastname (str): Customer last name
+        customer_email (str): Customer email
+        note (TextField): Additional note for a specialist
+    """
+
+    class FrequencyChoices(models.TextChoices):
+        """This class is used for series frequency."""
+
+        DAILY = "daily", "Daily"
+        WEEKLY = "weekly", "Weekly"
+
+    help_texts = {"required": "This field is required"}
+
+    is_active = models.BooleanField("active", default=True)
+    start_time = models.DateTimeField(
+        "Start time",
+        validators=[validate_rounded_minutes, validate_datetime_is_future],
+        help_text=help_texts["required"],
+    )
+    duration = models.DurationField(
+        "duration",
+        validators=[validate_rounded_minutes_seconds],
+        help_text="Input only hours and minutes HH:MM",
+    )
+    frequency = models.CharField(
+        "frequency", choices=FrequencyChoices.choices, max_length=10, default=FrequencyChoices.WEEKLY
+    )
+    interval = models.PositiveSmallIntegerField("interval", default=1, validators=[MinValueValidator(1)])
+    count = models.PositiveIntegerField("count", null=True, blank=True, validators=[MinValueValidator(1)])
+    until = models.DateField("until", null=True, blank=True)
+    specialist = models.ForeignKey(
+        CustomUser,
+        related_name="appointment_series",
+        on_delete=models.CASCADE,
+        verbose_name="Specialist",
+        validators=[validate_specialist],
+    )
+    location = models.ForeignKey(
+        Location,
+        related_name="location_appointment_series",
+        on_delete=models.CASCADE,
+        verbose_name="Location",
+    )
+    customer_firstname = models.CharField("customer firstname", max_length=150, help_text=help_texts["required"])
+    customer_lastname = models.CharField("customer lastname", max_length=150, help_text=help_texts["required"])
+    customer_email = models.EmailField("customer email", max_length=100, help_text=help_texts["required"])
+    note = models.TextField(
+        max_length=300,
+        null=True,
+        blank=True,
+        verbose_name="Additional note",
+    )
+
+    class Meta(Base.Meta):
+        """This class meta stores verbose names ordering data."""
+
+        verbose_name = "Appointment series"
+        verbose_name_plural = "Appointment series"
+
+    @property
+    def step(self) -> timedelta:
+        """Time between the starts of neighbouring occurrences."""
+        days = 7 if self.frequency == self.FrequencyChoices.WEEKLY else 1
+        return timedelta(days=days * self.interval)
+
+    @property
+    def end_time(self) -> datetime | None:
+        """End time of the last occurrence, None for the infinite series."""
+        ends = []
+        if self.count:
+            last_start = timezone.localtime(self.start_time).replace(tzinfo=None) + self.step * (self.count - 1)
+            ends.append(timezone.make_aware(last_start) + self.duration)
+        if self.until:
+            ends.append(timezone.make_aware(datetime.combine(self.until + timedelta(days=1), datetime.min.time())))
+        return min(ends, default=None)
+
+    def occurrences(self, window_start: datetime, window_end: datetime) -> Iterator[tuple[datetime, datetime]]:
+        """Generate start and end times of occurrences which intersect half-open window.
+
+        Occurrences keep the local time of the first one, the generator jumps to the window at once.
+        """
+        first_start = timezone.localtime(self.start_time).replace(tzinfo=None)
+        window_start_local = timezone.localtime(window_start).replace(tzinfo=None)
+        # one day margin covers DST shifts of the local time
+        number = max(0, (window_start_local - first_start - self.duration - timedelta(days=1)) // self.step)
+
+        while self.count is None or number < self.count:
+            local_start = first_start + self.step * number
+            if self.until and local_start.date() > self.until:
+                break
+            start_time = timezone.make_aware(local_start)
+            if start_time >= window_end:
+                break
+            if start_time + self.duration > window_start:
+                yield start_time, start_time + self.duration
+            number += 1
+
+    def __str__(self) -> str:
+        """str: Returns a verbose title of the series."""
+        return f"{self.__class__.__name__} #{self.id}"
+
+
 class SpecialistSchedule(Base):
     """This class represents a specialist schedule (for a schedule system).
 
@@ -374,3 +581,166 @@ class SpecialistSchedule(Base):
     def __str__(self) -> str:
         """str: Returns a specialist full name with id."""
         return f"Schedule for {self.specialist.get_full_name()} #{self.specialist.id}"
+
+
+class IdempotencyKey(models.Model):
+    """This class stores responses of create requests sent with the Idempotency-Key header.
+
+    Attributes:
+        key (str): Hash of the header value, the user and the request path
+        request_hash (str): Hash of the request data
+        status_code (int, optional): Status of the response, it is empty while the request is processed
+        response (JSONField, optional): Data of the response
+        expires_at (datetime): Time when the key can be used again
+    """
+
+    key = models.CharField("key", max_length=64, unique=True)
+    request_hash = models.CharField("request hash", max_length=64)
+    status_code = models.PositiveSmallIntegerField("status code", null=True, blank=True)
+    response = models.JSONField("response", null=True, blank=True)
+    expires_at = models.DateTimeField("expires at", db_index=True)
+
+    class Meta:
+        """This class meta stores verbose names."""
+
+        verbose_name = "Idempotency key"
+        verbose_name_plural = "Idempotency keys"
+
+    def __str__(self) -> str:
+        """str: Returns a verbose title of the idempotency key."""
+        return f"{self.__class__.__name__} #{self.id}"
+
+
+class ScheduleEvent(models.Model):
+    """This class stores the append-only log of changes of specialists' schedules.
+
+    Ids grow with every event, so clients pull changes after the id of the last seen event.
+    Specialists and appointments are kept as plain ids, events outlive deleted rows.
+
+    Attributes:
+        kind (str): Kind of the change
+        specialist_id (int): Id of the specialist whose schedule is changed
+        date (date, optional): Local date of the changed appointment, it is empty for whole schedule changes
+        appointment_id (int, optional): Id of the changed appointment
+        created_at (datetime): Time of the change
+    """
+
+    class KindChoices(models.TextChoices):
+        """This class is used for kinds of schedule changes."""
+
+        APPOINTMENT_CREATED = "appointment_created", "Appointment created"
+        APPOINTMENT_UPDATED = "appointment_updated", "Appointment updated"
+        APPOINTMENT_DELETED = "appointment_deleted", "Appointment deleted"
+        SCHEDULE_CHANGED = "schedule_changed", "Schedule changed"
+
+    kind = models.CharField("kind", max_length=20, choices=KindChoices.choices)
+    specialist_id = models.BigIntegerField("specialist id")
+    date = models.DateField("date", null=True, blank=True)
+    appointment_id = models.BigIntegerField("appointment id", null=True, blank=True)
+    created_at = models.DateTimeField("created at", auto_now_add=True, db_index=True)
+
+    class Meta:
+        """This class meta stores verbose names ordering data."""
+
+        ordering = ["id"]
+        verbose_name = "Schedule event"
+        verbose_name_plural = "Schedule events"
+        indexes = [models.Index(fields=["specialist_id", "id"], name="schedule_event_specialist")]
+
+    def __str__(self) -> str:
+        """str: Returns a verbose title of the schedule event."""
+        return f"{self.__class__.__name__} #{self.id}"
+
+
+class Tombstone(models.Model):
+    """This class stores ids of deleted objects for clients syncing changes since their last sync.
+
+    Attributes:
+        resource (str): Name of the synced resource
+        object_id (int): Id of the deleted object
+        deleted_at (datetime): Time of the deletion
+    """
+
+    class ResourceChoices(models.TextChoices):
+        """This class is used for synced resources."""
+
+        SPECIALISTS = "specialists", "Specialists"
+        LOCATIONS = "locations", "Locations"
+        SCHEDULES = "schedules", "Schedules"
+
+    resource = models.CharField("resource", max_length=20, choices=ResourceChoices.choices)
+    object_id = models.BigIntegerField("object id")
+    deleted_at = models.DateTimeField("deleted at", auto_now_add=True, db_index=True)
+
+    class Meta:
+        """This class meta stores verbose names ordering data."""
+
+        ordering = ["id"]
+        verbose_name = "Tombstone"
+        verbose_name_plural = "Tombstones"
+        indexes = [models.Index(fields=["resource", "deleted_at"], name="tombstone_resource_deleted")]
+
+    def __str__(self) -> str:
+        """str: Returns a verbose title of the tombstone."""
+        return f"{self.__class__.__name__} #{self.id}"
+
+
+class WorkingInterval(models.Model):
+    """This class stores working time of schedules and locations as rows, so it is searched by SQL.
+
+    Rows are rebuilt from working_time JSON on every save of the owner. Intervals of a day are merged,
+    so adjacent JSON ranges become one row.
+
+    Attributes:
+        schedule (SpecialistSchedule, optional): Schedule which owns the interval
+        location (Location, optional): Location which owns the interval
+        weekday (int): Day of the week, Monday is 0
+        start_minute (int): Start of the interval in minutes since the midnight
+        end_minute (int): End of the interval in minutes since the midnight, 1440 is the end of the day
+    """
+
+    schedule = models.ForeignKey(
+        SpecialistSchedule,
+        related_name="working_intervals",
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        db_index=False,
+    )
+    location = models.ForeignKey(
+        Location,
+        related_name="working_intervals",
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        db_index=False,
+    )
+    weekday = models.PositiveSmallIntegerField("weekday")
+    start_minute = models.PositiveSmallIntegerField("start minute")
+    end_minute = models.PositiveSmallIntegerField("end minute")
+
+    class Meta:
+        """This class meta stores verbose names ordering data."""
+
+        ordering = ["weekday", "start_minute"]
+        verbose_name = "Working interval"
+        verbose_name_plural = "Working intervals"
+        indexes = [
+            models.Index(fields=["schedule", "weekday", "start_minute"], name="working_interval_schedule"),
+            models.Index(fields=["location", "weekday", "start_minute"], name="working_interval_location"),
+            models.Index(fields=["weekday", "start_minute", "end_minute"], name="working_interval_window"),
+        ]
+        constraints = [
+            models.CheckConstraint(
+                check=models.Q(schedule__isnull=False, location__isnull=True)
+                | models.Q(schedule__isnull=True, location__isnull=False),
+                name="working_interval_one_owner",
+            ),
+            models.CheckConstraint(
+                check=models.Q(start_minute__lt=models.F("end_minute")), name="working_interval_start_end"
+            ),
+        ]
+
+    def __str__(self) -> str:
+        """str: Returns a verbose title of the working interval."""
+        return f"{self.__class__.__name__} #{self.id}"
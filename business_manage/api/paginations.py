@@ -1,29 +1,104 @@
 """Module for pagination classes."""
 
+import json
 import math
 
-from rest_framework.pagination import PageNumberPagination
+from django.conf import settings
+from django.core.paginator import Paginator
+from django.db import connections
+from django.utils.functional import cached_property
+from rest_framework.pagination import CursorPagination, PageNumberPagination
 from rest_framework.response import Response
 
 
+class ApproximateCountPaginator(Paginator):
+    """Paginator which takes count of rows from the PostgreSQL planner estimate.
+
+    Small estimates and other databases fall back to the exact count, is_estimate tells which count is used.
+    """
+
+    is_estimate = False
+
+    @cached_property
+    def count(self):
+        """Estimated count of rows."""
+        queryset = self.object_list
+        connection = connections[queryset.db]
+        if connection.vendor != "postgresql":
+            return super().count
+
+        sql, params = queryset.order_by().query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}", params)
+            plan = cursor.fetchone()[0]
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+
+        estimate = plan[0]["Plan"]["Plan Rows"]
+        if estimate < settings.APPROXIMATE_COUNT_THRESHOLD:
+            return super().count
+        self.is_estimate = True
+        return estimate
+
+
+class KeysetCursorPagination(CursorPagination):
+    """Class for cursor pagination by the view cursor_ordering, which has to be backed by an index.
+
+    Cursors of DRF keep the value of the first ordering field only, rows sharing this value
+    with the last row of the page are skipped by an offset. So the first field has to be unique
+    or have few duplicates, like start time of appointments.
+    """
+
+    page_size = 20
+    page_size_query_param = "page_size"
+    max_page_size = 1000
+
+    def get_ordering(self, request, queryset, view):
+        """Get ordering declared by the view, ordering by id is used by default."""
+        return tuple(getattr(view, "cursor_ordering", ("id",)))
+
+
 class SpecialistResultsSetPagination(PageNumberPagination):
-    """Class for specialists list pagination."""
+    """Class for specialists list pagination.
+
+    Clients select keyset pagination with ?pagination=cursor (or by passing a cursor)
+    and an estimated count with ?count=approximate. Views without keyset ordering set cursor_ordering to None.
+    """
 
     page_size = 20
     page_size_query_param = "page_size"
     max_page_size = 1000
 
+    def paginate_queryset(self, queryset, request, view=None):
+        """Paginate queryset by page number or by cursor."""
+        self.cursor_paginator = None
+        is_cursor_requested = request.query_params.get("pagination") == "cursor" or (
+            KeysetCursorPagination.cursor_query_param in request.query_params
+        )
+        if is_cursor_requested and getattr(view, "cursor_ordering", ()) is not None:
+            self.cursor_paginator = KeysetCursorPagination()
+            return self.cursor_paginator.paginate_queryset(queryset, request, view)
+
+        self.is_count_approximate = request.query_params.get("count") == "approximate"
+        if self.is_count_approximate:
+            self.django_paginator_class = ApproximateCountPaginator
+        return super().paginate_queryset(queryset, request, view)
+
     def get_paginated_response(self, data):
         """Response schema for pagination."""
-        return Response(
-            {
-                "count": self.page.paginator.count,
-                "pages": self.get_pages_count(),
-                "next": self.get_next_link(),
-                "previous": self.get_previous_link(),
-                "results": data,
-            }
-        )
+        if self.cursor_paginator is not None:
+            return self.cursor_paginator.get_paginated_response(data)
+
+        response_data = {
+            "count": self.page.paginator.count,
+            "pages": self.get_pages_count(),
+            "next": self.get_next_link(),
+            "previous": self.get_previous_link(),
+            "results": data,
+        }
+        if self.is_count_approximate:
+            response_data["count_is_approximate"] = self.page.paginator.is_estimate
+        return Response(response_data)
 
     def get_pages_count(self):
         """Get count of pages."""
@@ -1,23 +1,93 @@
 """The module includes serializers for Appointment model."""
 
-from api.models import Appointment, CustomUser, Location
-from api.services.appointment_services import validate_free_time_interval
-from api.validators import validate_start_end_time
-from django.shortcuts import get_object_or_404
-from django.utils.functional import lazy
+from api.constraints import get_violated_overlap_constraint
+from api.models import Appointment, AppointmentSeries, CustomUser, Location
+from api.services.appointment_services import (
+    BookingContext,
+    book_appointment,
+    book_appointment_series,
+    book_appointments,
+    validate_appointments_batch,
+    validate_free_time_interval,
+)
+from api.transactions import atomic_with_retries
+from api.validators import validate_rounded_minutes_seconds, validate_start_end_time
+from django.conf import settings
+from django.db import IntegrityError
+from django.utils import timezone
+from django.utils.timezone import localtime
 from rest_framework import serializers
+from rest_framework.fields import flatten_choices_dict, to_choices_dict
 
 from ..utils import get_location_choices, get_specialist_choices
 
 
-class AppointmentSerializer(serializers.ModelSerializer):
+class LazyChoiceField(serializers.ChoiceField):
+    """Choice field which queries choices only when they are displayed (OPTIONS, browsable API).
+
+    Input is only cast to integer id, the serializer checks whether the choice exists.
+    """
+
+    def __init__(self, choices_getter, **kwargs):
+        """Store the function which returns choices."""
+        self.choices_getter = choices_getter
+        super().__init__(choices=[], **kwargs)
+
+    @property
+    def grouped_choices(self):
+        """Get choices from the database."""
+        return to_choices_dict(self.choices_getter())
+
+    @grouped_choices.setter
+    def grouped_choices(self, value):
+        """Ignore choices set by ChoiceField."""
+
+    def _get_choices(self):
+        return flatten_choices_dict(self.grouped_choices)
+
+    def _set_choices(self, choices):
+        self.choice_strings_to_values = {}
+
+    choices = property(_get_choices, _set_choices)
+
+    def to_internal_value(self, data):
+        """Cast choice to integer id."""
+        try:
+            return int(data)
+        except (TypeError, ValueError):
+            self.fail("invalid_choice", input=data)
+
+
+class AppointmentOverlapMixin:
+    """Save data relying on the database to reject overlapping appointments.
+
+    Violations of the overlap constraints are raised as validation errors of overlap_error_field.
+    """
+
+    overlap_error_field = "start_time"
+
+    default_error_messages = {
+        "appointment_overlap": "Appointments have already created for this datetime.",
+    }
+
+    def save(self, **kwargs):
+        """Save data inside the outermost retried transaction and map violated overlap constraints to errors."""
+        try:
+            return atomic_with_retries(super().save, **kwargs)
+        except IntegrityError as error:
+            if not get_violated_overlap_constraint(error):
+                raise
+            raise serializers.ValidationError(
+                {self.overlap_error_field: [self.error_messages["appointment_overlap"]]}, code="appointment_overlap"
+            ) from error
+
+
+class AppointmentSerializer(AppointmentOverlapMixin, serializers.ModelSerializer):
     """Serializer to receive and create a specific appointments."""
 
     is_active = serializers.BooleanField(initial=True, default=True)
-    specialist = serializers.ChoiceField(
-        choices=lazy(get_specialist_choices, list)(), help_text="This field is required"
-    )
-    location = serializers.ChoiceField(choices=lazy(get_location_choices, list)(), help_text="This field is required")
+    specialist = LazyChoiceField(get_specialist_choices, help_text="This field is required")
+    location = LazyChoiceField(get_location_choices, help_text="This field is required")
 
     class Meta:
         """Class with a model and model fields for serialization."""
@@ -29,15 +99,18 @@ class AppointmentSerializer(serializers.ModelSerializer):
     def validate(self, attrs):
         """Validate data before saving."""
         start_time = attrs.get("start_time")
-        specialist = get_object_or_404(CustomUser, id=attrs.get("specialist"))
-        location = get_object_or_404(Location, id=attrs.get("location"))
         duration = attrs.get("duration")
         end_time = start_time + duration
         validate_start_end_time("start_time", [start_time, end_time])
-        validate_free_time_interval([start_time, end_time], specialist, location)
-        attrs.update(dict(specialist=specialist, location=location))
+        context = BookingContext.load(attrs.get("specialist"), attrs.get("location"))
+        validate_free_time_interval([start_time, end_time], context, check_overlap=False)
+        attrs.update(dict(specialist=context.specialist, location=context.location))
         return attrs
 
+    def create(self, validated_data):
+        """Create appointment serializing bookings of the specialist."""
+        return book_appointment(validated_data)
+
     def to_representation(self, instance):
         """Change displaying specialist id to the full name and location id to the name."""
         specialist = instance.specialist
@@ -46,3 +119,173 @@ class AppointmentSerializer(serializers.ModelSerializer):
         appointment["specialist"] = specialist.get_full_name()
         appointment["location"] = location.name
         return appointment
+
+
+class AppointmentBatchItemSerializer(AppointmentSerializer):
+    """Serializer to validate fields of one appointment from a batch.
+
+    Specialists, locations and overlaps are checked for the whole batch by validate_appointments_batch.
+    """
+
+    def validate(self, attrs):
+        """Validate appointment time interval."""
+        start_time = attrs.get("start_time")
+        validate_start_end_time("start_time", [start_time, start_time + attrs.get("duration")])
+        return attrs
+
+
+class AppointmentBulkCreateSerializer(AppointmentOverlapMixin, serializers.Serializer):
+    """Serializer to validate and create a batch of appointments.
+
+    In "all" mode nothing is created if any appointment is invalid,
+    in "partial" mode valid appointments are created and errors are kept in appointments_errors.
+    """
+
+    overlap_error_field = "appointments"
+
+    mode = serializers.ChoiceField(choices=["all", "partial"], default="all")
+    appointments = serializers.ListField(child=serializers.DictField(), allow_empty=False, max_length=500)
+
+    def validate(self, attrs):
+        """Validate appointments fields one by one and then check them together."""
+        appointments_data, errors = {}, {}
+        for index, item in enumerate(attrs["appointments"]):
+            item_serializer = AppointmentBatchItemSerializer(data=item)
+            if item_serializer.is_valid():
+                appointments_data[index] = dict(item_serializer.validated_data)
+            else:
+                errors[index] = item_serializer.errors
+
+        errors.update(validate_appointments_batch(appointments_data))
+
+        if errors and attrs["mode"] == "all":
+            raise serializers.ValidationError(
+                {"appointments": [errors.get(index, {}) for index in range(len(attrs["appointments"]))]}
+            )
+
+        self.appointments_errors = [{"index": index, "errors": errors[index]} for index in sorted(errors)]
+        attrs["appointments"] = {index: data for index, data in appointments_data.items() if index not in errors}
+        return attrs
+
+    def create(self, validated_data):
+        """Create all valid appointments checking overlaps again under locks of the specialists' schedules."""
+        appointments_data = validated_data["appointments"]
+        appointments, errors = book_appointments(appointments_data, partial=validated_data["mode"] == "partial")
+        if errors and validated_data["mode"] == "all":
+            raise serializers.ValidationError(
+                {"appointments": [errors.get(index, {}) for index in range(len(appointments_data))]}
+            )
+
+        errors.update((item["index"], item["errors"]) for item in self.appointments_errors)
+        self.appointments_errors = [{"index": index, "errors": errors[index]} for index in sorted(errors)]
+        return appointments
+
+
+class AppointmentImportSerializer(serializers.Serializer):
+    """Serializer to receive a CSV file of appointments for import."""
+
+    file = serializers.FileField(help_text="CSV file with a header, it is read as a stream")
+
+
+class AppointmentSeriesSerializer(serializers.ModelSerializer):
+    """Serializer to receive and create recurring appointments."""
+
+    is_active = serializers.BooleanField(initial=True, default=True)
+    specialist = LazyChoiceField(get_specialist_choices, help_text="This field is required")
+    location = LazyChoiceField(get_location_choices, help_text="This field is required")
+
+    class Meta:
+        """Class with a model and model fields for serialization."""
+
+        model = AppointmentSeries
+        exclude = ["created_at", "update_at"]
+
+    def validate(self, attrs):
+        """Validate the first occurrence and the recurrence end."""
+        start_time = attrs.get("start_time", getattr(self.instance, "start_time", None))
+        duration = attrs.get("duration", getattr(self.instance, "duration", None))
+        validate_start_end_time("start_time", [start_time, start_time + duration])
+
+        until = attrs.get("until", getattr(self.instance, "until", None))
+        if until and until < localtime(start_time).date():
+            raise serializers.ValidationError({"until": "Series can't end before the first occurrence."})
+
+        self.context["booking"] = BookingContext.load(
+            attrs.get("specialist", getattr(self.instance, "specialist_id", None)),
+            attrs.get("location", getattr(self.instance, "location_id", None)),
+        )
+        attrs.update(dict(specialist=self.context["booking"].specialist, location=self.context["booking"].location))
+        return attrs
+
+    def save(self, **kwargs):
+        """Save the series inside the outermost transaction retried after serialization failures."""
+        return atomic_with_retries(super().save, **kwargs)
+
+    def create(self, validated_data):
+        """Create the series checking all its occurrences."""
+        return book_appointment_series(AppointmentSeries(**validated_data), self.context["booking"])
+
+    def update(self, instance, validated_data):
+        """Change the series checking all its occurrences."""
+        for field, value in validated_data.items():
+            setattr(instance, field, value)
+        return book_appointment_series(instance, self.context["booking"])
+
+    def to_representation(self, instance):
+        """Change displaying specialist id to the full name and location id to the name."""
+        series = super().to_representation(instance)
+        series["specialist"] = instance.specialist.get_full_name()
+        series["location"] = instance.location.name
+        return series
+
+
+class SlotSearchSerializer(serializers.Serializer):
+    """Serializer to validate query parameters of the next available slot search."""
+
+    position = serializers.ChoiceField(choices=CustomUser.PositionChoices.choices)
+    location = serializers.PrimaryKeyRelatedField(queryset=Location.objects.filter(working_time__isnull=False))
+    duration = serializers.DurationField(
+        min_value=timezone.timedelta(minutes=5), validators=[validate_rounded_minutes_seconds]
+    )
+    date = serializers.DateField(required=False)
+    days = serializers.IntegerField(
+        min_value=1, max_value=settings.SLOT_SEARCH_MAX_DAYS, default=settings.SLOT_SEARCH_MAX_DAYS
+    )
+    limit = serializers.IntegerField(min_value=1, max_value=10, default=1)
+
+    def validate_date(self, value):
+        """Check the search doesn't start in the past."""
+        if value < localtime().date():
+            raise serializers.ValidationError("You can't search slots in the past days.")
+        return value
+
+    def validate(self, attrs):
+        """Start the search from today by default."""
+        attrs.setdefault("date", localtime().date())
+        return attrs
+
+
+class AvailableSlotSerializer(serializers.Serializer):
+    """Serializer to display a free slot of a specialist."""
+
+    start_time = serializers.DateTimeField()
+    end_time = serializers.DateTimeField()
+    specialist = serializers.IntegerField(source="specialist.id")
+    specialist_name = serializers.CharField(source="specialist.get_full_name")
+
+
+class AppointmentHistorySerializer(serializers.Serializer):
+    """Serializer to display live and archived appointments from values of the history union."""
+
+    id = serializers.IntegerField()
+    is_archived = serializers.BooleanField()
+    is_active = serializers.BooleanField()
+    start_time = serializers.DateTimeField()
+    end_time = serializers.DateTimeField()
+    duration = serializers.DurationField()
+    specialist = serializers.CharField(source="specialist_name")
+    location = serializers.CharField(source="location_name")
+    customer_firstname = serializers.CharField()
+    customer_lastname = serializers.CharField()
+    customer_email = serializers.EmailField()
+    note = serializers.CharField(allow_null=True)
@@ -1,10 +1,12 @@
 """The module includes serializers for Location model."""
 
-from api.models import SpecialistSchedule
+from api.models import Location, SpecialistSchedule
 from api.serializers.working_time_serializers import WorkingTimeSerializer
 from api.validators import validate_working_time_intervals, validate_working_time_values
+from django.conf import settings
 from django.core.exceptions import ObjectDoesNotExist
 from django.utils.functional import lazy
+from django.utils.timezone import localtime
 from rest_framework import serializers
 
 from ..models import CustomUser
@@ -60,3 +62,74 @@ class SpecialistScheduleSerializer(SpecialistScheduleDetailSerializer):
             self.fail("specialist_schedule")
 
         return specialist
+
+
+class AvailabilityMatrixSerializer(serializers.Serializer):
+    """Serializer to validate query parameters of the availability matrix."""
+
+    specialists = serializers.ListField(
+        child=serializers.IntegerField(), required=False, max_length=settings.AVAILABILITY_MAX_SPECIALISTS
+    )
+    position = serializers.ChoiceField(choices=CustomUser.PositionChoices.choices, required=False)
+    location = serializers.PrimaryKeyRelatedField(
+        queryset=Location.objects.filter(working_time__isnull=False), required=False
+    )
+    date = serializers.DateField(required=False)
+    days = serializers.IntegerField(min_value=1, max_value=settings.AVAILABILITY_MAX_DAYS, default=7)
+
+    def validate_date(self, value):
+        """Check the matrix doesn't start in the past."""
+        if value < localtime().date():
+            raise serializers.ValidationError("You can't see schedule of the past days.")
+        return value
+
+    def validate(self, attrs):
+        """Start the matrix from today by default."""
+        attrs.setdefault("date", localtime().date())
+        return attrs
+
+    def get_specialists(self):
+        """Get requested specialists who have schedules ordered like the specialists list."""
+        specialists = CustomUser.specialists.select_related("schedule").filter(schedule__isnull=False)
+        if "specialists" in self.validated_data:
+            specialists = specialists.filter(id__in=self.validated_data["specialists"])
+        if "position" in self.validated_data:
+            specialists = specialists.filter(position=self.validated_data["position"])
+        return specialists.order_by("email")[: settings.AVAILABILITY_MAX_SPECIALISTS]
+
+
+class AvailabilitySerializer(serializers.Serializer):
+    """Serializer to display free intervals of a specialist for every day of the matrix."""
+
+    specialist = serializers.IntegerField(source="specialist.id")
+    specialist_name = serializers.CharField(source="specialist.get_full_name")
+    free_intervals = serializers.ListField(child=serializers.ListField(child=serializers.ListField()))
+
+
+class LocationBoardSerializer(serializers.Serializer):
+    """Serializer to display appointments at the location and free intervals of a specialist for the day."""
+
+    specialist = serializers.IntegerField(source="specialist.id")
+    specialist_name = serializers.CharField(source="specialist.get_full_name")
+    position = serializers.CharField(source="specialist.position")
+    appointments_intervals = serializers.ListField(child=serializers.ListField())
+    free_intervals = serializers.ListField(child=serializers.ListField())
+
+
+class ScheduleEventsSerializer(serializers.Serializer):
+    """Serializer to validate query parameters of the schedule events long-poll."""
+
+    since = serializers.IntegerField(min_value=0, required=False, help_text="Id of the last seen event")
+    specialist = serializers.IntegerField(required=False)
+    timeout = serializers.IntegerField(min_value=0, max_value=settings.SCHEDULE_EVENTS_MAX_WAIT, default=0)
+
+
+class ScheduleEventSerializer(serializers.Serializer):
+    """Serializer to display a change of the specialist schedule."""
+
+    id = serializers.IntegerField()
+    kind = serializers.CharField()
+    specialist = serializers.IntegerField()
+    date = serializers.DateField(allow_null=True)
+    appointment = serializers.IntegerField(allow_null=True)
+    created_at = serializers.DateTimeField()
@@ -0,0 +1,42 @@
+"""The module includes serializers for delta sync of specialists, locations and schedules."""
+
+from api.models import SpecialistSchedule
+from api.serializers.customuser_serializers import SpecialistSerializer
+from api.serializers.location_serializers import LocationSerializer
+from rest_framework import serializers
+
+
+class DeltaSyncSerializer(serializers.Serializer):
+    """Serializer to validate query parameters of delta sync."""
+
+    updated_since = serializers.DateTimeField(
+        required=False, help_text="Value of next_updated_since from the previous sync, all objects are sent without it"
+    )
+
+
+class SyncSpecialistSerializer(SpecialistSerializer):
+    """Serializer to display a changed specialist with the id."""
+
+    class Meta(SpecialistSerializer.Meta):
+        """Class with a model and model fields for serialization."""
+
+        fields = ["id"] + SpecialistSerializer.Meta.fields + ["update_at"]
+
+
+class SyncLocationSerializer(LocationSerializer):
+    """Serializer to display a changed location with the id."""
+
+    class Meta(LocationSerializer.Meta):
+        """Class with a model and model fields for serialization."""
+
+        fields = ["id"] + LocationSerializer.Meta.fields + ["update_at"]
+
+
+class SyncScheduleSerializer(serializers.ModelSerializer):
+    """Serializer to display a changed schedule with ids of the schedule and the specialist."""
+
+    class Meta:
+        """Class with a model and model fields for serialization."""
+
+        model = SpecialistSchedule
+        fields = ["id", "specialist", "working_time", "update_at"]
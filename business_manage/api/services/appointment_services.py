@@ -1,27 +1,122 @@
 """Services for Appointment model."""
 
-from datetime import datetime
-
-from api.models import Appointment, CustomUser, Location, SpecialistSchedule
+from bisect import bisect_left
+from collections import defaultdict
+from collections.abc import Iterable
+from datetime import date, datetime, timedelta
+from itertools import accumulate
+from math import gcd, lcm
+
+from api.constraints import get_violated_overlap_constraint
+from api.models import Appointment, AppointmentSeries, CustomUser, Location, SpecialistSchedule
+from api.services import intervals
+from api.services.board_cache import invalidate_interval_boards
+from api.services.event_services import record_created_appointments_events
 from api.services.schedule_services import get_working_day
 from api.utils import (
-    is_inside_interval,
-    string_interval_to_time_interval,
+    get_local_day_filter,
+    get_local_day_range,
     time_interval_to_string_interval,
 )
-from django.db.models import Q
+from django.db import IntegrityError, connection, transaction
+from django.db.models import Exists, JSONField, OuterRef, Q, QuerySet, Subquery
 from django.utils.timezone import localtime
 from rest_framework.exceptions import ValidationError
-from rest_framework.generics import get_object_or_404
+
+
+class BookingContext:
+    """Specialist with schedule and location which are needed for validating a new appointment.
+
+    Everything is loaded with one query and reused by all checks of validate_free_time_interval.
+    """
+
+    invalid_choice_message = '"{input}" is not a valid choice.'
+
+    def __init__(self, specialist: CustomUser, location: Location, has_series: bool = True):
+        """Assign loaded instances.
+
+        has_series is False only if the specialist and the location surely have no active appointment series.
+        """
+        self.specialist = specialist
+        self.location = location
+        self.has_series = has_series
+
+    @classmethod
+    def load(cls, specialist_id: int, location_id: int) -> "BookingContext":
+        """Load specialist with schedule and location or raise errors for unknown ones.
+
+        Only specialists with schedules and locations with working time can be booked.
+        """
+        locations = Location.objects.filter(id=location_id, working_time__isnull=False)
+        specialist = (
+            CustomUser.specialists.select_related("schedule")
+            .filter(id=specialist_id, schedule__isnull=False)
+            .annotate(
+                location_name=Subquery(locations.values("name")),
+                location_working_time=Subquery(locations.values("working_time"), output_field=JSONField()),
+                has_series=Exists(
+                    AppointmentSeries.objects.filter(
+                        Q(specialist=OuterRef("pk")) | Q(location_id=location_id), is_active=True
+                    )
+                ),
+            )
+            .first()
+        )
+
+        errors = {}
+        if specialist is None:
+            errors["specialist"] = [cls.invalid_choice_message.format(input=specialist_id)]
+            location_data = locations.values("name", "working_time").first() or {}
+        else:
+            location_data = dict(name=specialist.location_name, working_time=specialist.location_working_time)
+
+        if location_data.get("name") is None:
+            errors["location"] = [cls.invalid_choice_message.format(input=location_id)]
+
+        if errors:
+            raise ValidationError(errors, code="invalid_choice")
+
+        return cls(specialist, Location(id=location_id, **location_data), specialist.has_series)
+
+
+def get_active_series(specialist_ids: list, location_ids: list) -> QuerySet:
+    """Get active appointment series of the specialists or the locations."""
+    return AppointmentSeries.objects.filter(
+        Q(specialist_id__in=specialist_ids) | Q(location_id__in=location_ids), is_active=True
+    )
+
+
+def get_series_intervals(
+    series_list: QuerySet | list[AppointmentSeries], window_start: datetime, window_end: datetime
+) -> list[tuple[datetime, datetime, AppointmentSeries]]:
+    """Expand occurrences of the series which intersect the window.
+
+    Occurrences are generated only for the window, they are never saved to the database.
+    """
+    return [
+        (start_time, end_time, series)
+        for series in series_list
+        for start_time, end_time in series.occurrences(window_start, window_end)
+    ]
+
+
+def is_appointment_fit_series(a_interval: list[datetime], specialist: CustomUser, location: Location) -> bool:
+    """Check an appointment datetime interval against occurrences of appointment series.
+
+    Return True if no occurrence of the specialist or the location series intersects the interval.
+    """
+    series_list = get_active_series([specialist.id], [location.id]).filter(start_time__lt=a_interval[1])
+    return not get_series_intervals(series_list, *a_interval)
 
 
 def is_appointment_fit_datetime(a_interval: list[datetime], specialist: CustomUser, location: Location) -> bool:
     """Check an appointment datetime interval.
 
     Return True if the time slot is empty for creating an appointment else False.
+    Intervals are half-open, so an appointment can start when the previous one ends.
     """
     appointments = Appointment.objects.filter(
-        Q(start_time__range=a_interval) | Q(end_time__range=a_interval), Q(location=location) | Q(specialist=specialist)
+        Q(location=location) | Q(specialist=specialist), start_time__lt=a_interval[1], end_time__gt=a_interval[0]
     )
     return not appointments.exists()
 
@@ -33,8 +128,7 @@ def is_specialist_schedule(specialist):
 
 def is_specialist_working_day(day: datetime, specialist: CustomUser) -> bool:
     """Check the specialist has working day."""
-    schedule = get_object_or_404(SpecialistSchedule, specialist=specialist)
-    string_intervals = get_working_day(schedule.working_time, day)
+    string_intervals = get_working_day(specialist.schedule.working_time, day)
     return bool(string_intervals)
 
 
@@ -44,23 +138,29 @@ def is_location_working_day(day: datetime, location: Location) -> bool:
     return bool(string_interval)
 
 
+def get_appointment_minute_intervals(a_interval: list[datetime]) -> list[intervals.Interval] | None:
+    """Get minutes of the appointment local day, None if the appointment crosses the midnight."""
+    start_time, end_time = a_interval
+    day = localtime(start_time).date()
+    if localtime(end_time - timedelta(microseconds=1)).date() != day:
+        return None
+    return intervals.from_datetime_interval(start_time, end_time, day)
+
+
 def is_appointment_fit_specialist_time(a_interval: list[datetime], specialist: CustomUser) -> bool:
     """Check an appointment time interval.
 
     Return True if appointment time interval is inside
-    one of specialist schedule working time intervals.
+    specialist schedule working time intervals.
     """
-    start_time, end_time = a_interval
-    schedule = get_object_or_404(SpecialistSchedule, specialist=specialist)
-    string_intervals = get_working_day(schedule.working_time, start_time)
+    string_intervals = get_working_day(specialist.schedule.working_time, localtime(a_interval[0]))
+    appointment_intervals = get_appointment_minute_intervals(a_interval)
 
-    if not string_intervals:
+    if not string_intervals or appointment_intervals is None:
         return False
 
-    specialists_intervals = list(map(string_interval_to_time_interval, string_intervals))
-    appointment_interval = [localtime(start_time).time(), localtime(end_time).time()]
-
-    return any(map(lambda x: is_inside_interval(x, appointment_interval), specialists_intervals))
+    working_intervals = intervals.normalize(intervals.from_string_intervals(string_intervals))
+    return intervals.contains(working_intervals, appointment_intervals)
 
 
 def is_appointment_fit_location_time(a_interval: list[datetime], location: Location) -> bool:
@@ -69,23 +169,30 @@ def is_appointment_fit_location_time(a_interval: list[datetime], location: Locat
     Return True if appointment time interval is inside
     location working time interval.
     """
-    start_time, end_time = a_interval
-    string_interval = get_working_day(location.working_time, start_time)
+    string_interval = get_working_day(location.working_time, localtime(a_interval[0]))
+    appointment_intervals = get_appointment_minute_intervals(a_interval)
 
-    if not string_interval:
+    if not string_interval or appointment_intervals is None:
         return False
 
-    location_interval = string_interval_to_time_interval(string_interval)
-    appointment_interval = [start_time.time(), end_time.time()]
+    return intervals.contains(intervals.from_string_intervals([string_interval]), appointment_intervals)
 
-    return is_inside_interval(location_interval, appointment_interval)
 
+def validate_free_time_interval(
+    a_interval: list[datetime], context: BookingContext, check_overlap: bool = True
+) -> None:
+    """Check time interval for creating new appointment.
 
-def validate_free_time_interval(a_interval: list[datetime], specialist: CustomUser, location: Location) -> None:
-    """Check time interval for creating new appointment."""
-    if not is_appointment_fit_datetime(a_interval, specialist, location):
+    Set check_overlap to False when the appointment is saved to the database which
+    rejects overlapping appointments itself.
+    """
+    specialist, location = context.specialist, context.location
+    if check_overlap and not is_appointment_fit_datetime(a_interval, specialist, location):
         raise ValidationError({"start_time": "Appointments have already created for this datetime."})
 
+    if context.has_series and not is_appointment_fit_series(a_interval, specialist, location):
+        raise ValidationError({"start_time": "Appointment series has already booked this datetime."})
+
     specialist_name = specialist.get_full_name()
     if not is_specialist_schedule(specialist):
         raise ValidationError({"specialist": f"{specialist_name} hasn't had schedule jet."})
@@ -103,13 +210,350 @@ def validate_free_time_interval(a_interval: list[datetime], specialist: CustomUs
         raise ValidationError({"location": f"{location.name} doesn't work at this time interval."})
 
 
-def get_appointments_time_intervals(specialist: CustomUser, date: datetime) -> list[list[str]]:
-    """Get all appointments working intervals for a specific specialist and concrete date."""
-    appointments = Appointment.objects.filter(specialist=specialist, start_time__date=date)
+def lock_specialist_schedule(specialist: CustomUser) -> None:
+    """Lock the specialist schedule row until the end of the transaction and refresh its working time.
 
-    return [
-        time_interval_to_string_interval(
-            [localtime(appointment.start_time).time(), localtime(appointment.end_time).time()]
+    Concurrent bookings of the specialist and changes of the schedule wait for each other.
+    SQLite doesn't support row locks, it serializes writing transactions itself.
+    """
+    if connection.features.has_select_for_update:
+        specialist.schedule.working_time = (
+            SpecialistSchedule.objects.select_for_update()
+            .values_list("working_time", flat=True)
+            .get(specialist=specialist)
         )
-        for appointment in appointments
+
+
+def lock_specialists_schedules(specialist_ids: Iterable[int]) -> None:
+    """Lock schedule rows of the specialists until the end of the transaction.
+
+    Rows are locked in the order of specialist ids, so concurrent batches wait for each other without deadlocks.
+    """
+    if connection.features.has_select_for_update:
+        list(
+            SpecialistSchedule.objects.select_for_update()
+            .filter(specialist_id__in=specialist_ids)
+            .order_by("specialist_id")
+            .values_list("id", flat=True)
+        )
+
+
+def book_appointment(appointment_data: dict) -> Appointment:
+    """Create an appointment holding the lock on the specialist schedule.
+
+    Time interval is checked against the locked schedule, overlapping appointments are
+    rejected by the database. The lock is held till the end of the caller's transaction,
+    callers retry the whole transaction with atomic_with_retries.
+    """
+    specialist, location = appointment_data["specialist"], appointment_data["location"]
+    start_time = appointment_data["start_time"]
+    a_interval = [start_time, start_time + appointment_data["duration"]]
+
+    with transaction.atomic():
+        lock_specialist_schedule(specialist)
+        context = BookingContext(specialist, location, getattr(specialist, "has_series", True))
+        validate_free_time_interval(a_interval, context, check_overlap=False)
+        return Appointment.objects.create(**appointment_data)
+
+
+def get_appointments_time_intervals(specialist: CustomUser, day: date) -> list[list[str]]:
+    """Get all appointments working intervals for a specific specialist and concrete local date.
+
+    Appointments are fetched by the half-open range of the day, occurrences of the specialist
+    appointment series are expanded for this date only.
+    """
+    day_start, day_end = get_local_day_range(day)
+    appointments = Appointment.objects.filter(
+        get_local_day_filter("start_time", day), specialist=specialist
+    ).values_list("start_time", "end_time")
+    series_list = AppointmentSeries.objects.filter(specialist=specialist, is_active=True, start_time__lt=day_end)
+    occurrences = [
+        (start_time, end_time) for start_time, end_time, _ in get_series_intervals(series_list, day_start, day_end)
+    ]
+
+    return [
+        time_interval_to_string_interval([localtime(start_time).time(), localtime(end_time).time()])
+        for start_time, end_time in sorted([*appointments, *occurrences])
     ]
+
+
+def get_appointments_time_intervals_by_day(specialist: CustomUser, days: list[date]) -> dict[date, list[list[str]]]:
+    """Get appointments working intervals of the specialist for every day from the sorted list.
+
+    Appointments of the whole period are fetched with one range query by the specialist and start time index
+    and grouped by the local date of their start like in get_appointments_time_intervals.
+    """
+    window_start, window_end = get_local_day_range(days[0], days[-1])
+    appointments = Appointment.objects.filter(
+        get_local_day_filter("start_time", days[0], days[-1]), specialist=specialist
+    ).values_list("start_time", "end_time")
+    series_list = AppointmentSeries.objects.filter(specialist=specialist, is_active=True, start_time__lt=window_end)
+
+    intervals_by_day = {day: [] for day in days}
+    for start_time, end_time in appointments:
+        if (day := localtime(start_time).date()) in intervals_by_day:
+            intervals_by_day[day].append((start_time, end_time))
+    for start_time, end_time, _ in get_series_intervals(series_list, window_start, window_end):
+        day, last_day = localtime(start_time).date(), localtime(end_time - timedelta(microseconds=1)).date()
+        while day <= last_day:
+            if day in intervals_by_day:
+                intervals_by_day[day].append((start_time, end_time))
+            day += timedelta(days=1)
+
+    return {
+        day: [
+            time_interval_to_string_interval([localtime(start_time).time(), localtime(end_time).time()])
+            for start_time, end_time in sorted(intervals)
+        ]
+        for day, intervals in intervals_by_day.items()
+    }
+
+
+def get_appointment_owners(appointment_data: dict) -> tuple[tuple[str, int], ...]:
+    """Get keys of the specialist and the location which can't have overlapping appointments."""
+    return ("specialist", appointment_data["specialist"].id), ("location", appointment_data["location"].id)
+
+
+def find_appointments_overlaps(appointments_data: dict[int, dict]) -> dict[int, str]:
+    """Find new appointments which overlap existing ones or each other.
+
+    Existing appointments are fetched with one range query. New appointments are swept
+    in start time order, an appointment is accepted if it starts after the latest accepted
+    appointment of its specialist and its location ends.
+    """
+    if not appointments_data:
+        return {}
+
+    intervals = {
+        index: (data["start_time"], data["start_time"] + data["duration"]) for index, data in appointments_data.items()
+    }
+    owners = {index: get_appointment_owners(data) for index, data in appointments_data.items()}
+
+    specialists = {data["specialist"] for data in appointments_data.values()}
+    locations = {data["location"] for data in appointments_data.values()}
+    window_start = min(start_time for start_time, _ in intervals.values())
+    window_end = max(end_time for _, end_time in intervals.values())
+
+    existing = defaultdict(list)
+    existing_appointments = Appointment.objects.filter(
+        Q(specialist__in=specialists) | Q(location__in=locations),
+        start_time__lt=window_end,
+        end_time__gt=window_start,
+    ).order_by().values_list("specialist_id", "location_id", "start_time", "end_time")
+    for specialist_id, location_id, start_time, end_time in existing_appointments:
+        existing["specialist", specialist_id].append((start_time, end_time))
+        existing["location", location_id].append((start_time, end_time))
+
+    series_specialists = [specialist.id for specialist in specialists if getattr(specialist, "has_series", True)]
+    series_locations = [location.id for location in locations if getattr(location, "has_series", True)]
+    if series_specialists or series_locations:
+        series_list = get_active_series(series_specialists, series_locations).filter(start_time__lt=window_end)
+        for start_time, end_time, series in get_series_intervals(series_list, window_start, window_end):
+            existing["specialist", series.specialist_id].append((start_time, end_time))
+            existing["location", series.location_id].append((start_time, end_time))
+
+    existing_starts, existing_latest_ends = {}, {}
+    for owner, owner_intervals in existing.items():
+        owner_intervals.sort()
+        existing_starts[owner] = [start_time for start_time, _ in owner_intervals]
+        existing_latest_ends[owner] = list(accumulate((end_time for _, end_time in owner_intervals), max))
+
+    overlaps = {}
+    latest_accepted = {}
+    for index in sorted(intervals, key=lambda i: (intervals[i], i)):
+        start_time, end_time = intervals[index]
+        for owner in owners[index]:
+            position = bisect_left(existing_starts.get(owner, []), end_time)
+            if position and existing_latest_ends[owner][position - 1] > start_time:
+                overlaps[index] = "Appointments have already created for this datetime."
+                break
+            if owner in latest_accepted and latest_accepted[owner][0] > start_time:
+                overlaps[index] = f"Appointment overlaps appointment #{latest_accepted[owner][1]} of the batch."
+                break
+        else:
+            latest_accepted.update((owner, (end_time, index)) for owner in owners[index])
+
+    return overlaps
+
+
+def validate_appointments_batch(appointments_data: dict[int, dict]) -> dict[int, dict]:
+    """Validate new appointments together and return errors by appointment index.
+
+    Specialists and locations of the whole batch are loaded with two queries,
+    specialist and location ids are replaced with instances in valid appointments data.
+    Appointment series are checked together with existing appointments by find_appointments_overlaps.
+    """
+    specialists = (
+        CustomUser.specialists.select_related("schedule")
+        .filter(schedule__isnull=False)
+        .annotate(has_series=Exists(AppointmentSeries.objects.filter(specialist=OuterRef("pk"), is_active=True)))
+        .in_bulk({data["specialist"] for data in appointments_data.values()})
+    )
+    locations = (
+        Location.objects.filter(working_time__isnull=False)
+        .annotate(has_series=Exists(AppointmentSeries.objects.filter(location=OuterRef("pk"), is_active=True)))
+        .in_bulk({data["location"] for data in appointments_data.values()})
+    )
+
+    errors = {}
+    for index, data in appointments_data.items():
+        specialist, location = specialists.get(data["specialist"]), locations.get(data["location"])
+        if specialist is None or location is None:
+            errors[index] = {
+                field: [BookingContext.invalid_choice_message.format(input=data[field])]
+                for field, instance in (("specialist", specialist), ("location", location))
+                if instance is None
+            }
+            continue
+
+        a_interval = [data["start_time"], data["start_time"] + data["duration"]]
+        try:
+            context = BookingContext(specialist, location, has_series=False)
+            validate_free_time_interval(a_interval, context, check_overlap=False)
+        except ValidationError as error:
+            errors[index] = error.detail
+            continue
+
+        data.update(specialist=specialist, location=location)
+
+    valid_data = {index: data for index, data in appointments_data.items() if index not in errors}
+    for index, message in find_appointments_overlaps(valid_data).items():
+        errors[index] = {"start_time": [message]}
+
+    return errors
+
+
+def create_appointments(appointments_data: list[dict]) -> list[Appointment]:
+    """Save new appointments with one query.
+
+    bulk_create skips Appointment.save and signals, so end time, cached day schedules
+    and location boards and the schedule events feed are updated here.
+    The caches are changed after the transaction is committed.
+    """
+    from api.services.schedule_cache import invalidate_day_schedule  # schedule_cache imports this module
+
+    appointments = [Appointment(**data) for data in appointments_data]
+    for appointment in appointments:
+        appointment.set_end_time()
+
+    with transaction.atomic():
+        Appointment.objects.bulk_create(appointments)
+        record_created_appointments_events(appointments)
+        days = {(a.specialist_id, localtime(a.start_time).date()) for a in appointments}
+        transaction.on_commit(lambda: [invalidate_day_schedule(*day) for day in days])
+        transaction.on_commit(
+            lambda: [invalidate_interval_boards(a.start_time, a.end_time) for a in appointments]
+        )
+
+    return appointments
+
+
+def book_appointments(appointments_data: dict[int, dict], partial: bool) -> tuple[list[Appointment], dict[int, dict]]:
+    """Create validated appointments holding locks on schedules of their specialists.
+
+    Overlaps with appointments and series occurrences are checked again under the locks.
+    Appointments of other specialists can still be booked at the same locations concurrently,
+    in partial mode violated overlap constraints are mapped to errors of single appointments.
+    Nothing is created in "all" mode if any appointment overlaps.
+    Return created appointments and errors by appointment index.
+    """
+    with transaction.atomic():
+        lock_specialists_schedules({data["specialist"].id for data in appointments_data.values()})
+        errors = {
+            index: {"start_time": [message]} for index, message in find_appointments_overlaps(appointments_data).items()
+        }
+        if errors and not partial:
+            return [], errors
+
+        valid_data = {index: data for index, data in appointments_data.items() if index not in errors}
+        try:
+            return create_appointments(list(valid_data.values())), errors
+        except IntegrityError as error:
+            if not partial or not get_violated_overlap_constraint(error):
+                raise
+
+        appointments = []
+        for index, data in valid_data.items():
+            try:
+                appointments.extend(create_appointments([data]))
+            except IntegrityError as error:
+                if not get_violated_overlap_constraint(error):
+                    raise
+                errors[index] = {"start_time": ["Appointments have already created for this datetime."]}
+        return appointments, errors
+
+
+def get_series_cycle(series: AppointmentSeries) -> int:
+    """Get count of occurrences after which weekdays of the series occurrences repeat."""
+    return 7 // gcd(series.step.days, 7)
+
+
+def validate_appointment_series(series: AppointmentSeries, context: BookingContext) -> None:
+    """Check a new appointment series against schedules, appointments and other series.
+
+    Occurrences keep weekday and local time during a cycle of weekdays, so schedule rules are checked
+    for one cycle. Two series repeat their relative position after the least common multiple of their steps.
+    """
+    if not series.is_active:
+        return
+
+    schedule_context = BookingContext(context.specialist, context.location, has_series=False)
+    cycle_end = series.start_time + series.step * get_series_cycle(series)
+    for start_time, end_time in series.occurrences(series.start_time, cycle_end):
+        validate_free_time_interval([start_time, end_time], schedule_context, check_overlap=False)
+
+    message = "Appointment series overlaps appointments of the specialist or the location."
+    appointments = Appointment.objects.filter(
+        Q(specialist=context.specialist) | Q(location=context.location), end_time__gt=series.start_time
+    )
+    if series.end_time:
+        appointments = appointments.filter(start_time__lt=series.end_time)
+    for start_time, end_time in appointments.values_list("start_time", "end_time"):
+        if next(series.occurrences(start_time, end_time), None):
+            raise ValidationError({"start_time": message}, code="appointment_overlap")
+
+    other_series = get_active_series([context.specialist.id], [context.location.id]).exclude(id=series.id)
+    for other in other_series:
+        window_start = max(series.start_time, other.start_time)
+        window_end = window_start + timedelta(days=lcm(series.step.days, other.step.days) + 1)
+        for start_time, end_time in series.occurrences(window_start, window_end):
+            if next(other.occurrences(start_time, end_time), None):
+                raise ValidationError({"start_time": message}, code="appointment_overlap")
+
+
+def book_appointment_series(series: AppointmentSeries, context: BookingContext) -> AppointmentSeries:
+    """Save a new or changed appointment series holding the lock on the specialist schedule.
+
+    Database doesn't know about occurrences, so overlaps are checked inside the transaction.
+    Callers retry the whole transaction with atomic_with_retries.
+    """
+    with transaction.atomic():
+        lock_specialist_schedule(context.specialist)
+        validate_appointment_series(series, context)
+        series.save()
+        return series
+
+
+def complete_past_appointments_batch(now: datetime, batch_size: int) -> int:
+    """Mark as completed one batch of active appointments finished before now and return its size.
+
+    Appointments finish after they start, so the batch is found by the partial index of active
+    appointments over start time. Signals are not sent, completion doesn't change schedules.
+    """
+    batch = (
+        Appointment.objects.filter(is_active=True, start_time__lt=now, end_time__lte=now)
+        .order_by("start_time")
+        .values("id")[:batch_size]
+    )
+    return Appointment.objects.filter(id__in=batch, is_active=True).update(is_active=False, update_at=now)
+
+
+def complete_past_appointments(now: datetime, batch_size: int) -> int:
+    """Mark as completed all active appointments finished before now by batches and return their count.
+
+    Every batch is a separate short UPDATE, so bookings are not blocked by the whole sweep.
+    """
+    completed = 0
+    while updated := complete_past_appointments_batch(now, batch_size):
+        completed += updated
+    return completed
@@ -0,0 +1,80 @@
+"""Services for ArchivedAppointment model."""
+
+from datetime import datetime, timedelta
+
+from api.models import Appointment, ArchivedAppointment
+from django.conf import settings
+from django.db import transaction
+from django.db.models import BooleanField, F, QuerySet, Value
+from django.db.models.functions import Concat
+from django.utils import timezone
+
+
+def get_archive_cutoff(days: int | None = None) -> datetime:
+    """Get time before which finished appointments are archived."""
+    if days is None:
+        days = settings.APPOINTMENT_ARCHIVE_AFTER_DAYS
+    return timezone.now() - timedelta(days=days)
+
+
+def archive_appointments_batch(cutoff: datetime, batch_size: int) -> int:
+    """Move one batch of appointments finished before the cutoff to the archive and return its size.
+
+    Rows are copied and deleted in one transaction, so an appointment is never lost or listed twice.
+    An archived row with the same id fails the whole batch instead of being skipped and deleted.
+    Rows are deleted with one statement without post_delete signals, archived appointments are not
+    cancelled, so they aren't appended to the schedule events feed and cached schedules keep them.
+    """
+    with transaction.atomic():
+        ids = list(
+            Appointment.objects.select_for_update()
+            .filter(end_time__lt=cutoff)
+            .order_by("id")
+            .values_list("id", flat=True)[:batch_size]
+        )
+        if not ids:
+            return 0
+
+        appointments = Appointment.objects.filter(id__in=ids)
+        ArchivedAppointment.objects.bulk_create(
+            [ArchivedAppointment(**row) for row in appointments.values(*ArchivedAppointment.ARCHIVED_FIELDS)]
+        )
+        appointments._raw_delete(appointments.db)
+    return len(ids)
+
+
+def archive_appointments(cutoff: datetime | None = None, batch_size: int | None = None) -> int:
+    """Move all appointments finished before the cutoff to the archive by batches and return their count."""
+    cutoff = cutoff or get_archive_cutoff()
+    batch_size = batch_size or settings.APPOINTMENT_ARCHIVE_BATCH_SIZE
+    archived = 0
+    while batch := archive_appointments_batch(cutoff, batch_size):
+        archived += batch
+    return archived
+
+
+def get_history_values(queryset: QuerySet, is_archived: bool) -> QuerySet:
+    """Get values of appointments with names of specialists and locations for the history union."""
+    return queryset.order_by().values(
+        "id",
+        "is_active",
+        "start_time",
+        "end_time",
+        "duration",
+        "customer_firstname",
+        "customer_lastname",
+        "customer_email",
+        "note",
+        specialist_name=Concat(F("specialist__first_name"), Value(" "), F("specialist__last_name")),
+        location_name=F("location__name"),
+        is_archived=Value(is_archived, output_field=BooleanField()),
+    )
+
+
+def get_appointments_history(appointments: QuerySet, archived_appointments: QuerySet) -> QuerySet:
+    """Get live and archived appointments as one queryset of values ordered from the latest ones."""
+    return (
+        get_history_values(appointments, False)
+        .union(get_history_values(archived_appointments, True), all=True)
+        .order_by("-start_time", "-id")
+    )
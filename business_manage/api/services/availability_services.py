@@ -0,0 +1,155 @@
+"""Services for building free time intervals of many specialists during many days.
+
+Every day of a specialist, a location or appointments is kept as a normalized list of minute intervals,
+so free time of a day is a couple of linear merge passes.
+"""
+
+from collections import defaultdict
+from datetime import date, timedelta
+from itertools import chain
+
+from api.models import Appointment, CustomUser, Location
+from api.services import intervals
+from api.services.appointment_services import get_active_series, get_series_intervals
+from api.services.schedule_services import get_working_day
+from api.utils import get_local_day_range
+from django.db.models import Q, QuerySet
+from django.utils.timezone import localtime
+
+
+def get_location_working_intervals(location: Location | None, day: date) -> list[intervals.Interval]:
+    """Get working hours of the location for the day, the whole day is used without a location."""
+    if location is None:
+        return [(0, intervals.DAY_MINUTES)]
+    location_interval = get_working_day(location.working_time, day)
+    return intervals.from_string_intervals([location_interval] if location_interval else [])
+
+
+def get_specialist_working_intervals(specialist: CustomUser, day: date) -> list[intervals.Interval]:
+    """Get normalized working intervals of the specialist for the day."""
+    return intervals.normalize(intervals.from_string_intervals(get_working_day(specialist.schedule.working_time, day)))
+
+
+def get_busy_intervals(
+    specialist_ids: list[int], location: Location | None, days: list[date]
+) -> dict[tuple[str, int, date], list[intervals.Interval]]:
+    """Get normalized intervals of appointments and series occurrences by owner and local day.
+
+    Appointments and series of all specialists are fetched with one query each.
+    """
+    window_start, window_end = get_local_day_range(days[0], days[-1])
+    owners_filter = Q(specialist_id__in=specialist_ids)
+    if location is not None:
+        owners_filter |= Q(location=location)
+
+    appointments = Appointment.objects.filter(
+        owners_filter, start_time__lt=window_end, end_time__gt=window_start
+    ).order_by().values_list("specialist_id", "location_id", "start_time", "end_time")
+    series_list = get_active_series(specialist_ids, [location.id] if location else []).filter(
+        start_time__lt=window_end
+    )
+    occurrences = (
+        (series.specialist_id, series.location_id, start_time, end_time)
+        for start_time, end_time, series in get_series_intervals(series_list, window_start, window_end)
+    )
+
+    busy = defaultdict(list)
+    for specialist_id, location_id, start_time, end_time in chain(appointments, occurrences):
+        first_day, last_day = localtime(start_time).date(), localtime(end_time - timedelta(microseconds=1)).date()
+        day = first_day
+        while day <= last_day:
+            day_intervals = intervals.from_datetime_interval(start_time, end_time, day)
+            busy["specialist", specialist_id, day].extend(day_intervals)
+            busy["location", location_id, day].extend(day_intervals)
+            day += timedelta(days=1)
+    return {owner_day: intervals.normalize(owner_intervals) for owner_day, owner_intervals in busy.items()}
+
+
+def get_availability_matrix(
+    specialists: QuerySet | list[CustomUser], start_date: date, days: int, location: Location | None = None
+) -> list[dict]:
+    """Get free intervals of every specialist for every day of the period.
+
+    Free time is the specialist working time, restricted by the location working hours
+    if the location is given, without appointments of the specialist and the location.
+    """
+    specialists = list(specialists)
+    dates = [start_date + timedelta(days=offset) for offset in range(days)]
+    if not specialists:
+        return []
+
+    busy = get_busy_intervals([specialist.id for specialist in specialists], location, dates)
+    location_free = {
+        day: intervals.subtract(
+            get_location_working_intervals(location, day),
+            busy.get(("location", location.id, day), []) if location else [],
+        )
+        for day in dates
+    }
+
+    return [
+        {
+            "specialist": specialist,
+            "free_intervals": [
+                intervals.to_string_intervals(
+                    intervals.subtract(
+                        intervals.intersection(get_specialist_working_intervals(specialist, day), location_free[day]),
+                        busy.get(("specialist", specialist.id, day), []),
+                    )
+                )
+                for day in dates
+            ],
+        }
+        for specialist in specialists
+    ]
+
+
+def get_location_board(location: Location, day: date, specialists: QuerySet | list[CustomUser]) -> list[dict]:
+    """Get appointments at the location and free intervals at the location of every specialist for the day.
+
+    Appointments of the location and of all specialists are fetched with one query and bucketed
+    by specialists, appointment series are expanded for the day with one more query.
+    """
+    specialists = list(specialists)
+    specialist_ids = [specialist.id for specialist in specialists]
+    day_start, day_end = get_local_day_range(day)
+
+    appointments = (
+        Appointment.objects.filter(
+            Q(location=location) | Q(specialist_id__in=specialist_ids), start_time__lt=day_end, end_time__gt=day_start
+        )
+        .order_by("start_time")
+        .values_list("specialist_id", "location_id", "start_time", "end_time")
+    )
+    series_list = get_active_series(specialist_ids, [location.id]).filter(start_time__lt=day_end)
+    occurrences = (
+        (series.specialist_id, series.location_id, start_time, end_time)
+        for start_time, end_time, series in get_series_intervals(series_list, day_start, day_end)
+    )
+
+    specialists_busy, location_busy = defaultdict(list), []
+    location_appointments = defaultdict(list)
+    for specialist_id, location_id, start_time, end_time in chain(appointments, occurrences):
+        day_intervals = intervals.from_datetime_interval(start_time, end_time, day)
+        specialists_busy[specialist_id].extend(day_intervals)
+        if location_id == location.id:
+            location_busy.extend(day_intervals)
+            location_appointments[specialist_id].extend(intervals.to_string_intervals(day_intervals))
+
+    location_free = intervals.subtract(
+        get_location_working_intervals(location, day), intervals.normalize(location_busy)
+    )
+    board = []
+    for specialist in specialists:
+        free_time = intervals.subtract(
+            intervals.intersection(get_specialist_working_intervals(specialist, day), location_free),
+            intervals.normalize(specialists_busy[specialist.id]),
+        )
+        board.append(
+            {
+                "specialist": specialist,
+                "appointments_intervals": sorted(location_appointments[specialist.id]),
+                "free_intervals": intervals.to_string_intervals(free_time),
+            }
+        )
+    return board
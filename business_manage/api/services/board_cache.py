@@ -0,0 +1,66 @@
+"""Cache of location day boards shown by LocationBoardView.
+
+A board depends on appointments of the day at all locations, because specialists are busy
+at one location at a time, and on schedules, series, locations and specialists. Entries are keyed by
+the location, the local date and two versions: a changed appointment changes the version of its day,
+other changes change the common version and so drop all boards.
+"""
+
+from datetime import date, datetime, timedelta
+from time import time_ns
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.timezone import localtime
+
+COMMON_VERSION_KEY = "api:location-board-version"
+
+
+def get_day_version_key(day: date) -> str:
+    """Get cache key of the boards version for the day."""
+    return f"api:location-board-version:{day.isoformat()}"
+
+
+def get_board_key(location_id: int, day: date, position: str = "") -> str:
+    """Get cache key of the location board for the day with the current versions.
+
+    Missing versions are replaced with new ones, so entries of evicted versions are never used again.
+    """
+    day_version_key = get_day_version_key(day)
+    versions = cache.get_many([COMMON_VERSION_KEY, day_version_key])
+    for key in (COMMON_VERSION_KEY, day_version_key):
+        if key not in versions:
+            cache.add(key, time_ns(), None)
+            versions[key] = cache.get(key)
+    return (
+        f"api:location-board:{versions[COMMON_VERSION_KEY]}:{versions[day_version_key]}:"
+        f"{location_id}:{day.isoformat()}:{position}"
+    )
+
+
+def get_location_board(key: str) -> dict | None:
+    """Get the cached board by its key."""
+    return cache.get(key)
+
+
+def set_location_board(key: str, board: dict) -> None:
+    """Put the board to the cache."""
+    cache.set(key, board, settings.LOCATION_BOARD_CACHE_TTL)
+
+
+def invalidate_day_boards(day: date) -> None:
+    """Drop cached boards of all locations for the day."""
+    cache.set(get_day_version_key(day), time_ns(), None)
+
+
+def invalidate_interval_boards(start_time: datetime, end_time: datetime) -> None:
+    """Drop cached boards of all locations for every local day the interval intersects."""
+    day, last_day = localtime(start_time).date(), localtime(end_time - timedelta(microseconds=1)).date()
+    while day <= last_day:
+        invalidate_day_boards(day)
+        day += timedelta(days=1)
+
+
+def invalidate_all_boards() -> None:
+    """Drop cached boards of all locations for all days."""
+    cache.set(COMMON_VERSION_KEY, time_ns(), None)
@@ -0,0 +1,132 @@
+"""Services for ScheduleEvent model, the change feed of specialists' schedules.
+
+Readers keep the id of the last seen event as the cursor. Ids are taken from a sequence when events
+are inserted and concurrent transactions commit them in any order, so a missing id may still be committed.
+Readers stop before such a gap until it is older than ``SCHEDULE_EVENTS_COMMIT_LAG`` seconds,
+then it is treated as a rolled back or deleted event. Writers' transactions have to commit
+their events within the lag and clocks of the application servers have to be in sync.
+"""
+
+import json
+import time
+from collections.abc import Iterable
+from datetime import date, timedelta
+
+from api.models import Appointment, ScheduleEvent
+from api.services.event_watcher import EventFeedWatcher
+from django.conf import settings
+from django.db.models import F
+from django.utils import timezone
+from django.utils.timezone import localtime
+
+EVENT_FIELDS = {"specialist": F("specialist_id"), "appointment": F("appointment_id")}
+
+
+def record_appointment_event(kind: str, appointment: Appointment, day: date | None = None) -> None:
+    """Append a change of the appointment to the feed, the day of its start is used by default."""
+    ScheduleEvent.objects.create(
+        kind=kind,
+        specialist_id=appointment.specialist_id,
+        date=day or localtime(appointment.start_time).date(),
+        appointment_id=appointment.id,
+    )
+
+
+def record_updated_appointment_events(appointment: Appointment, days: Iterable[tuple[int, date]]) -> None:
+    """Append a change of the appointment to the feed for every changed specialist and day."""
+    ScheduleEvent.objects.bulk_create(
+        ScheduleEvent(
+            kind=ScheduleEvent.KindChoices.APPOINTMENT_UPDATED,
+            specialist_id=specialist_id,
+            date=day,
+            appointment_id=appointment.id,
+        )
+        for specialist_id, day in days
+    )
+
+
+def record_created_appointments_events(appointments: list[Appointment]) -> None:
+    """Append creation of appointments saved with bulk_create to the feed with one query."""
+    ScheduleEvent.objects.bulk_create(
+        ScheduleEvent(
+            kind=ScheduleEvent.KindChoices.APPOINTMENT_CREATED,
+            specialist_id=appointment.specialist_id,
+            date=localtime(appointment.start_time).date(),
+            appointment_id=appointment.id,
+        )
+        for appointment in appointments
+    )
+
+
+def record_schedule_event(specialist_id: int) -> None:
+    """Append a change of the whole specialist schedule to the feed."""
+    ScheduleEvent.objects.create(kind=ScheduleEvent.KindChoices.SCHEDULE_CHANGED, specialist_id=specialist_id)
+
+
+def get_event_horizon(since: int = 0) -> int:
+    """Get id of the latest event which can be read, no event before it can be committed later.
+
+    Events created before the lag are settled, every id before a settled one was taken before it as well.
+    After the latest settled event ids are followed while they have no gaps, a gap stops the horizon
+    unless the event after it is settled. One page of events is checked at once.
+    """
+    settled_at = timezone.now() - timedelta(seconds=settings.SCHEDULE_EVENTS_COMMIT_LAG)
+    settled = ScheduleEvent.objects.filter(created_at__lte=settled_at).order_by("-created_at")
+    horizon = max(since, settled.values_list("id", flat=True).first() or 0)
+
+    events = ScheduleEvent.objects.filter(id__gt=horizon).order_by("id").values_list("id", "created_at")
+    for event_id, created_at in events[: settings.SCHEDULE_EVENTS_PAGE_SIZE]:
+        if event_id != horizon + 1 and created_at > settled_at:
+            break
+        horizon = event_id
+    return horizon
+
+
+def get_latest_event_id() -> int:
+    """Get id of the latest event which can be read, clients start reading the feed after it."""
+    return get_event_horizon()
+
+
+event_feed_watcher = EventFeedWatcher(get_latest_event_id)
+
+
+def parse_event_cursor(value: str | None) -> int | None:
+    """Get the cursor from the Last-Event-ID or If-None-Match header value, invalid values are ignored."""
+    value = (value or "").removeprefix("W/").strip('"')
+    return int(value) if value.isdigit() else None
+
+
+def get_events(since: int, specialist_id: int | None = None, limit: int | None = None) -> list[dict]:
+    """Get events after the id up to the horizon ordered from the oldest one, the query is an index range scan."""
+    events = ScheduleEvent.objects.filter(id__gt=since, id__lte=get_event_horizon(since))
+    if specialist_id is not None:
+        events = events.filter(specialist_id=specialist_id)
+    limit = limit or settings.SCHEDULE_EVENTS_PAGE_SIZE
+    return list(events.order_by("id").values("id", "kind", "date", "created_at", **EVENT_FIELDS)[:limit])
+
+
+def wait_for_events(since: int, specialist_id: int | None = None, timeout: float = 0) -> list[dict]:
+    """Get events after the id waiting until some of them appear or the timeout ends.
+
+    Waiting requests don't poll the feed, they are woken up by event_feed_watcher
+    and query the feed again only after the latest event id changes.
+    """
+    deadline, seen_id = time.monotonic() + timeout, since
+    while not (events := get_events(since, specialist_id)) and (remaining := deadline - time.monotonic()) > 0:
+        if (latest_id := event_feed_watcher.wait(seen_id, remaining)) <= seen_id:
+            break
+        seen_id = latest_id
+    return events
+
+
+def format_sse_event(event: dict) -> str:
+    """Format the event as a Server-Sent Events message, the event id is the cursor of the stream."""
+    data = {**event, "date": event["date"] and event["date"].isoformat(), "created_at": event["created_at"].isoformat()}
+    return f"id: {event['id']}\nevent: {event['kind']}\ndata: {json.dumps(data)}\n\n"
+
+
+def delete_expired_schedule_events() -> int:
+    """Delete events older than the retention period and return their count."""
+    expired = timezone.now() - timedelta(days=settings.SCHEDULE_EVENTS_KEEP_DAYS)
+    deleted, _ = ScheduleEvent.objects.filter(created_at__lt=expired).delete()
+    return deleted
@@ -0,0 +1,94 @@
+"""Per-process watcher of the schedule events feed.
+
+Waiting long-poll requests and open streams don't poll the feed themselves. One daemon thread
+of the process loads the latest event id every ``SCHEDULE_EVENTS_POLL_INTERVAL`` seconds
+while somebody waits and wakes up waiters after the id changes, so the database gets one query
+per interval and process however many clients wait.
+"""
+
+import asyncio
+import threading
+import time
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import DatabaseError, connection
+
+
+class EventFeedWatcher:
+    """Poller of the latest event id shared by waiting threads and asyncio streams.
+
+    Threads wait on a condition, streams get asyncio events which are set in their loops.
+    The polling thread is started by the first waiter and stops when nobody waits.
+    """
+
+    def __init__(self, load_latest_id: Callable[[], int]):
+        """Create a stopped watcher which loads the latest event id with the function."""
+        self.latest_id = 0
+        self._load_latest_id = load_latest_id
+        self._condition = threading.Condition()
+        self._waiters = 0
+        self._subscribers: set[tuple[asyncio.AbstractEventLoop, asyncio.Event]] = set()
+        self._thread: threading.Thread | None = None
+
+    def _start(self) -> None:
+        """Start the polling thread unless it runs, the condition has to be held."""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="schedule-events-watcher", daemon=True)
+            self._thread.start()
+
+    def _run(self) -> None:
+        """Poll the latest event id while somebody waits."""
+        try:
+            while True:
+                with self._condition:
+                    if not self._waiters and not self._subscribers:
+                        self._thread = None
+                        return
+                self._update(self._load())
+                time.sleep(settings.SCHEDULE_EVENTS_POLL_INTERVAL)
+        finally:
+            connection.close()
+
+    def _load(self) -> int:
+        """Load the latest event id, the known one is kept if the database fails."""
+        try:
+            return self._load_latest_id()
+        except DatabaseError:
+            connection.close()
+            return self.latest_id
+
+    def _update(self, latest_id: int) -> None:
+        """Store the latest event id and wake up all waiters if it has changed."""
+        with self._condition:
+            if latest_id == self.latest_id:
+                return
+            self.latest_id = latest_id
+            self._condition.notify_all()
+            for loop, changed in self._subscribers:
+                loop.call_soon_threadsafe(changed.set)
+
+    def wait(self, after_id: int, timeout: float) -> int:
+        """Wait until the latest event id is greater than after_id or the timeout ends, return the latest id."""
+        with self._condition:
+            self._waiters += 1
+            self._start()
+            try:
+                self._condition.wait_for(lambda: self.latest_id > after_id, timeout)
+            finally:
+                self._waiters -= 1
+            return self.latest_id
+
+    @contextmanager
+    def subscribe(self) -> Iterator[asyncio.Event]:
+        """Get an asyncio event of the running loop which is set every time the latest event id changes."""
+        subscriber = (asyncio.get_running_loop(), asyncio.Event())
+        with self._condition:
+            self._subscribers.add(subscriber)
+            self._start()
+        try:
+            yield subscriber[1]
+        finally:
+            with self._condition:
+                self._subscribers.discard(subscriber)
@@ -0,0 +1,67 @@
+"""Services for streaming exports of flat rows as CSV or newline-delimited JSON."""
+
+import csv
+import json
+from collections.abc import Iterable, Iterator
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import F, QuerySet, Value
+from django.db.models.functions import Concat
+
+APPOINTMENT_EXPORT_FIELDS = {
+    "id": F("id"),
+    "is_active": F("is_active"),
+    "start_time": F("start_time"),
+    "end_time": F("end_time"),
+    "duration": F("duration"),
+    "specialist_id": F("specialist_id"),
+    "specialist": Concat(F("specialist__first_name"), Value(" "), F("specialist__last_name")),
+    "location_id": F("location_id"),
+    "location": F("location__name"),
+    "customer_firstname": F("customer_firstname"),
+    "customer_lastname": F("customer_lastname"),
+    "customer_email": F("customer_email"),
+    "note": F("note"),
+}
+
+SPECIALIST_EXPORT_FIELDS = {
+    "id": F("id"),
+    "email": F("email"),
+    "first_name": F("first_name"),
+    "last_name": F("last_name"),
+    "patronymic": F("patronymic"),
+    "position": F("position"),
+    "is_active": F("is_active"),
+    "date_joined": F("date_joined"),
+}
+
+
+class Echo:
+    """File-like object which returns written lines instead of keeping them."""
+
+    def write(self, value: str) -> str:
+        """Return the written value."""
+        return value
+
+
+def iterate_export_rows(queryset: QuerySet, fields: dict) -> Iterator[dict]:
+    """Iterate flat rows of the queryset by chunks, related names are joined by the same query."""
+    aliases = {f"export_{name}": expression for name, expression in fields.items()}
+    rows = queryset.annotate(**aliases).values(*aliases).iterator(chunk_size=settings.EXPORT_CHUNK_SIZE)
+    for row in rows:
+        yield {name: row[f"export_{name}"] for name in fields}
+
+
+def stream_csv(rows: Iterable[dict], field_names: list[str]) -> Iterator[str]:
+    """Stream rows as CSV lines starting with the header."""
+    writer = csv.DictWriter(Echo(), fieldnames=field_names)
+    yield writer.writeheader()
+    for row in rows:
+        yield writer.writerow(row)
+
+
+def stream_ndjson(rows: Iterable[dict]) -> Iterator[str]:
+    """Stream rows as JSON objects one per line."""
+    for row in rows:
+        yield json.dumps(row, cls=DjangoJSONEncoder) + "\n"
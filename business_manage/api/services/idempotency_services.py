@@ -0,0 +1,67 @@
+"""Services for IdempotencyKey model."""
+
+import hashlib
+import json
+from datetime import timedelta
+
+from api.models import IdempotencyKey
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+
+# Lifetime of the key while its request is processed, then the key is released for retries
+PROCESSING_TTL = timedelta(minutes=1)
+
+
+def get_idempotency_key_hash(request, key: str) -> str:
+    """Hash the header value together with the user and the request path."""
+    scope = f"{request.user.pk}:{request.method}:{request.path}:{key}"
+    return hashlib.sha256(scope.encode()).hexdigest()
+
+
+def get_request_hash(request) -> str:
+    """Hash the request data, uploaded files are represented by their names."""
+    data = json.dumps(request.data, sort_keys=True, default=str)
+    return hashlib.sha256(data.encode()).hexdigest()
+
+
+def reserve_idempotency_key(key_hash: str, request_hash: str) -> tuple[IdempotencyKey, bool]:
+    """Reserve the key for processing the request.
+
+    Return the reserved key and True, or the key which is not expired yet and False.
+    The reservation is tried again if the key is expired or it was released by its failed request
+    after the conflict.
+    """
+    now = timezone.now()
+    try:
+        with transaction.atomic():
+            idempotency_key = IdempotencyKey.objects.create(
+                key=key_hash, request_hash=request_hash, expires_at=now + PROCESSING_TTL
+            )
+        return idempotency_key, True
+    except IntegrityError:
+        idempotency_key = IdempotencyKey.objects.filter(key=key_hash).first()
+
+    if idempotency_key is None:
+        return reserve_idempotency_key(key_hash, request_hash)
+
+    if idempotency_key.expires_at > now:
+        return idempotency_key, False
+
+    idempotency_key.delete()
+    return reserve_idempotency_key(key_hash, request_hash)
+
+
+def store_idempotent_response(idempotency_key: IdempotencyKey, response) -> None:
+    """Store the response data to replay it for repeated requests."""
+    idempotency_key.status_code = response.status_code
+    idempotency_key.response = json.loads(JSONRenderer().render(response.data))
+    idempotency_key.expires_at = timezone.now() + timedelta(seconds=settings.IDEMPOTENCY_KEY_TTL)
+    idempotency_key.save(update_fields=["status_code", "response", "expires_at"])
+
+
+def delete_expired_idempotency_keys() -> int:
+    """Delete expired keys and return their count."""
+    deleted, _ = IdempotencyKey.objects.filter(expires_at__lte=timezone.now()).delete()
+    return deleted
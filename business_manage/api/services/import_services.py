@@ -0,0 +1,98 @@
+"""Services for streaming imports of appointments from CSV files.
+
+Fields of rows are validated by a serializer class passed by the view or the command,
+rows of a batch are booked together like batch requests in partial mode.
+"""
+
+import csv
+from collections.abc import Iterable, Iterator
+from itertools import islice
+
+from api.services.appointment_services import book_appointments, validate_appointments_batch
+from api.transactions import atomic_with_retries
+from django.conf import settings
+from rest_framework.exceptions import ValidationError
+from rest_framework.serializers import Serializer
+
+IMPORT_REQUIRED_COLUMNS = [
+    "specialist",
+    "location",
+    "start_time",
+    "duration",
+    "customer_firstname",
+    "customer_lastname",
+    "customer_email",
+]
+
+
+def read_appointment_rows(lines: Iterable[str]) -> Iterator[tuple[int, dict | None, dict | None]]:
+    """Read rows of the CSV file one by one with their line numbers, the header has to have required columns.
+
+    Every item is a line number with the row or with errors of the line. Malformed CSV is reported
+    for its line and reading goes on, reading stops at text which can't be decoded.
+    """
+    reader = csv.DictReader(lines)
+    try:
+        fieldnames = reader.fieldnames or []
+    except (csv.Error, UnicodeDecodeError) as error:
+        raise ValidationError({"file": [f"Header can't be read: {error}."]}) from error
+    if missing_columns := [column for column in IMPORT_REQUIRED_COLUMNS if column not in fieldnames]:
+        raise ValidationError({"file": [f"Missing columns: {', '.join(missing_columns)}."]})
+
+    while True:
+        try:
+            row = next(reader)
+        except StopIteration:
+            return
+        except csv.Error as error:
+            # DictReader keeps the number of the previous line, the reader has already counted the malformed one
+            yield reader.reader.line_num, None, {"file": [f"Malformed CSV: {error}."]}
+            continue
+        except UnicodeDecodeError as error:
+            message = f"Text can't be decoded, the rest of the file is skipped: {error}."
+            yield reader.reader.line_num + 1, None, {"file": [message]}
+            return
+        row = {column: value for column, value in row.items() if column is not None and value != ""}
+        yield reader.line_num, row, None
+
+
+def import_appointments_batch(
+    rows: list[tuple[int, dict | None, dict | None]], item_serializer_class: type[Serializer]
+) -> tuple[int, dict[int, dict]]:
+    """Validate rows of one batch together, create valid appointments with one retried transaction.
+
+    Overlaps are checked again under locks of the specialists' schedules, rows rejected
+    by the overlap constraints become errors of their lines.
+    Return count of created appointments and errors by line numbers.
+    """
+    appointments_data, errors = {}, {}
+    for line, row, row_errors in rows:
+        if row_errors:
+            errors[line] = row_errors
+            continue
+        item_serializer = item_serializer_class(data=row)
+        if item_serializer.is_valid():
+            appointments_data[line] = dict(item_serializer.validated_data)
+        else:
+            errors[line] = item_serializer.errors
+
+    errors.update(validate_appointments_batch(appointments_data))
+    valid_data = {line: data for line, data in appointments_data.items() if line not in errors}
+    appointments, booking_errors = atomic_with_retries(book_appointments, valid_data, partial=True)
+    errors.update(booking_errors)
+    return len(appointments), errors
+
+
+def import_appointments(
+    lines: Iterable[str], item_serializer_class: type[Serializer], batch_size: int | None = None
+) -> Iterator[tuple[int, dict[int, dict]]]:
+    """Import appointments from CSV lines by batches.
+
+    Only one batch is kept in memory. Rows are checked against appointments of previous batches,
+    so the file is imported the same way as separate batch requests.
+    Yield count of created appointments and errors by line numbers for every batch.
+    """
+    batch_size = batch_size or settings.APPOINTMENT_IMPORT_BATCH_SIZE
+    rows = read_appointment_rows(lines)
+    while batch := list(islice(rows, batch_size)):
+        yield import_appointments_batch(batch, item_serializer_class)
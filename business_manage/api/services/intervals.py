@@ -0,0 +1,147 @@
+"""Algebra of time intervals inside one local day.
+
+Intervals are half-open (start, end) tuples of minutes since the local midnight, 24:00 is 1440.
+A list of intervals is normalized when it is sorted, has no empty intervals and no overlapping
+or adjacent ones. Normalization sorts once, every other operation expects normalized lists
+and makes one linear merge pass over them.
+"""
+
+from datetime import date, datetime, time, timedelta
+from functools import lru_cache
+from heapq import merge
+from typing import Iterable
+
+from django.utils.timezone import localtime, make_aware
+
+DAY_MINUTES = 24 * 60
+
+Interval = tuple[int, int]
+
+
+@lru_cache(maxsize=DAY_MINUTES + 1)
+def string_to_minutes(value: str) -> int:
+    """Get minutes of HH:MM string, 24:00 is the end of the day."""
+    hours, minutes = value.split(":")
+    return int(hours) * 60 + int(minutes)
+
+
+@lru_cache(maxsize=DAY_MINUTES + 1)
+def minutes_to_string(value: int) -> str:
+    """Get HH:MM string of minutes."""
+    return "{:02d}:{:02d}".format(*divmod(value, 60))
+
+
+def from_string_intervals(string_intervals: Iterable[list[str]]) -> list[Interval]:
+    """Get intervals of HH:MM intervals like [["10:00", "14:00"]], the result is not normalized."""
+    return [(string_to_minutes(start), string_to_minutes(end)) for start, end in string_intervals]
+
+
+def to_string_intervals(intervals: Iterable[Interval]) -> list[list[str]]:
+    """Get HH:MM intervals of intervals."""
+    return [[minutes_to_string(start), minutes_to_string(end)] for start, end in intervals]
+
+
+def get_wall_clock_minute(value: datetime, ceil: bool) -> int:
+    """Get minutes of the local time, seconds are rounded down or up to the whole minutes."""
+    minutes = value.hour * 60 + value.minute
+    return minutes + (ceil and (value.second > 0 or value.microsecond > 0))
+
+
+def from_datetime_interval(start_time: datetime, end_time: datetime, day: date) -> list[Interval]:
+    """Get the part of the aware interval which lies inside the local day.
+
+    Minutes are counted by the local wall clock, start is rounded down and end is rounded up.
+    """
+    start_local, end_local = localtime(start_time), localtime(end_time)
+    if start_local.date() > day or end_local.date() < day:
+        return []
+    start = get_wall_clock_minute(start_local, ceil=False) if start_local.date() == day else 0
+    end = get_wall_clock_minute(end_local, ceil=True) if end_local.date() == day else DAY_MINUTES
+    return [(start, end)] if start < end else []
+
+
+def to_datetime_interval(interval: Interval, day: date) -> tuple[datetime, datetime]:
+    """Get aware datetimes of the interval of the local day."""
+    midnight = datetime.combine(day, time.min)
+    return tuple(make_aware(midnight + timedelta(minutes=value)) for value in interval)
+
+
+def merge_sorted(intervals: Iterable[Interval]) -> list[Interval]:
+    """Merge overlapping and adjacent intervals of the list sorted by start, empty intervals are dropped."""
+    merged = []
+    for start, end in intervals:
+        if start >= end:
+            continue
+        if merged and start <= merged[-1][1]:
+            if end > merged[-1][1]:
+                merged[-1] = (merged[-1][0], end)
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def normalize(intervals: Iterable[Interval]) -> list[Interval]:
+    """Get the normalized list of any intervals."""
+    return merge_sorted(sorted(intervals))
+
+
+def union(first: list[Interval], second: list[Interval]) -> list[Interval]:
+    """Get minutes which belong to any of the normalized lists."""
+    return merge_sorted(merge(first, second))
+
+
+def intersection(first: list[Interval], second: list[Interval]) -> list[Interval]:
+    """Get minutes which belong to both normalized lists."""
+    result, i, j = [], 0, 0
+    while i < len(first) and j < len(second):
+        start, end = max(first[i][0], second[j][0]), min(first[i][1], second[j][1])
+        if start < end:
+            result.append((start, end))
+        if first[i][1] < second[j][1]:
+            i += 1
+        else:
+            j += 1
+    return result
+
+
+def subtract(first: list[Interval], second: list[Interval]) -> list[Interval]:
+    """Get minutes of the first normalized list which are absent in the second one."""
+    result, j = [], 0
+    for start, end in first:
+        while j < len(second) and second[j][1] <= start:
+            j += 1
+        k = j
+        while k < len(second) and second[k][0] < end:
+            if second[k][0] > start:
+                result.append((start, second[k][0]))
+            start = max(start, second[k][1])
+            k += 1
+        if start < end:
+            result.append((start, end))
+    return result
+
+
+def contains(outer: list[Interval], inner: list[Interval]) -> bool:
+    """Return True if all minutes of the inner normalized list belong to the outer one."""
+    i = 0
+    for start, end in inner:
+        while i < len(outer) and outer[i][1] < end:
+            i += 1
+        if i == len(outer) or outer[i][0] > start:
+            return False
+    return True
+
+
+def has_overlaps(intervals: Iterable[Interval]) -> bool:
+    """Return True if any two intervals share a minute, adjacent intervals don't overlap."""
+    previous_end = None
+    for start, end in sorted(intervals):
+        if previous_end is not None and start < previous_end:
+            return True
+        previous_end = end if previous_end is None else max(previous_end, end)
+    return False
+
+
+def find_gaps(intervals: list[Interval], within: Interval, min_length: int = 1) -> list[Interval]:
+    """Get gaps of the normalized list inside the bounding interval which last at least min_length minutes."""
+    return [gap for gap in subtract([within], intervals) if gap[1] - gap[0] >= min_length]
@@ -0,0 +1,91 @@
+"""Cache of specialists' day schedules shown by SpecialistDateScheduleView.
+
+Entries are keyed by specialist, local date and versions of the specialist and of the day.
+New, deleted or moved appointments change the version of their day, changes of a schedule
+or appointment series change the version of the specialist and so drop all days of the specialist.
+Cached entries are never changed in place, versions are read before a schedule is computed,
+so a schedule computed before a concurrent change is stored under an outdated key and never read.
+"""
+
+from datetime import date
+from time import time_ns
+
+from api.models import CustomUser
+from api.services.appointment_services import get_appointments_time_intervals, get_appointments_time_intervals_by_day
+from api.services.schedule_services import get_free_time_intervals, get_working_day
+from django.conf import settings
+from django.core.cache import cache
+
+
+def get_version_key(specialist_id: int, day: date | None = None) -> str:
+    """Get cache key of the version of the specialist schedules or of the schedule for one day."""
+    day_suffix = f":{day.isoformat()}" if day else ""
+    return f"api:day-schedule-version:{specialist_id}{day_suffix}"
+
+
+def get_day_schedule_keys(specialist_id: int, days: list[date]) -> dict[date, str]:
+    """Get cache keys of the specialist schedules for the days with one cache request.
+
+    Missing versions are replaced with new ones. Versions are timestamps, so entries
+    of an evicted version are never used again. Versions of days expire together with the entries.
+    """
+    specialist_version_key = get_version_key(specialist_id)
+    day_version_keys = {day: get_version_key(specialist_id, day) for day in days}
+    version_keys = [specialist_version_key, *day_version_keys.values()]
+
+    versions = cache.get_many(version_keys)
+    if len(versions) < len(version_keys):
+        cache.add(specialist_version_key, time_ns(), None)
+        for version_key in day_version_keys.values():
+            cache.add(version_key, time_ns(), settings.DAY_SCHEDULE_CACHE_TTL)
+        versions = cache.get_many(version_keys)
+
+    specialist_version = versions[specialist_version_key]
+    return {
+        day: f"api:day-schedule:{specialist_id}:{specialist_version}:{versions[version_key]}:{day.isoformat()}"
+        for day, version_key in day_version_keys.items()
+    }
+
+
+def get_day_schedule(specialist: CustomUser, day: date, schedule_intervals: list[list[str]]) -> dict:
+    """Get appointments and free intervals of the specialist for the local day from the cache or compute them."""
+    key = get_day_schedule_keys(specialist.id, [day])[day]
+    if (day_schedule := cache.get(key)) is None:
+        appointments_intervals = get_appointments_time_intervals(specialist, day)
+        day_schedule = {
+            "appointments_intervals": appointments_intervals,
+            "free_intervals": get_free_time_intervals(schedule_intervals, appointments_intervals),
+        }
+        cache.set(key, day_schedule, settings.DAY_SCHEDULE_CACHE_TTL)
+    return day_schedule
+
+
+def get_day_schedules(specialist: CustomUser, days: list[date]) -> dict[date, dict]:
+    """Get appointments and free intervals of the specialist for every day from the sorted list.
+
+    Cached days are read with one cache request, appointments of missing days are fetched with one query.
+    """
+    keys = get_day_schedule_keys(specialist.id, days)
+    cached = cache.get_many(keys.values())
+    day_schedules = {day: cached[key] for day, key in keys.items() if key in cached}
+
+    if missing_days := [day for day in days if day not in day_schedules]:
+        appointments_intervals = get_appointments_time_intervals_by_day(specialist, missing_days)
+        for day in missing_days:
+            schedule_intervals = get_working_day(specialist.schedule.working_time, day)
+            day_schedules[day] = {
+                "appointments_intervals": appointments_intervals[day],
+                "free_intervals": get_free_time_intervals(schedule_intervals, appointments_intervals[day]),
+            }
+        cache.set_many({keys[day]: day_schedules[day] for day in missing_days}, settings.DAY_SCHEDULE_CACHE_TTL)
+    return day_schedules
+
+
+def invalidate_day_schedule(specialist_id: int, day: date) -> None:
+    """Drop the cached schedule of the specialist for the day."""
+    cache.set(get_version_key(specialist_id, day), time_ns(), settings.DAY_SCHEDULE_CACHE_TTL)
+
+
+def invalidate_specialist_schedules(specialist_id: int) -> None:
+    """Drop cached schedules of the specialist for all days."""
+    cache.set(get_version_key(specialist_id), time_ns(), None)
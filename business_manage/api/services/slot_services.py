@@ -0,0 +1,132 @@
+"""Services for searching free appointment slots across specialists."""
+
+import heapq
+from datetime import date, datetime, timedelta
+from math import ceil
+from typing import Iterator
+
+from api.models import CustomUser, Location
+from api.services import intervals
+from api.services.availability_services import (
+    get_busy_intervals,
+    get_location_working_intervals,
+    get_specialist_working_intervals,
+)
+from api.services.schedule_services import get_working_day
+from django.conf import settings
+from django.utils import timezone
+from django.utils.timezone import localtime
+
+SLOT_STEP = timedelta(minutes=5)
+
+
+def round_up_datetime(value: datetime) -> datetime:
+    """Round datetime up to the start of the next 5 minutes slot."""
+    remainder = (value - value.replace(minute=0, second=0, microsecond=0)) % SLOT_STEP
+    return value + (SLOT_STEP - remainder) % SLOT_STEP
+
+
+def get_not_before_minute(not_before: datetime, day: date) -> int | None:
+    """Get the first minute of the day when slots can start, None if the whole day has passed."""
+    local_not_before = localtime(not_before)
+    if local_not_before.date() > day:
+        return None
+    if local_not_before.date() < day:
+        return 0
+    return intervals.get_wall_clock_minute(local_not_before, ceil=True)
+
+
+def generate_free_slots(
+    working_intervals: list[intervals.Interval],
+    specialist_busy: list[intervals.Interval],
+    location_busy: list[intervals.Interval],
+    duration: int,
+    not_before: int,
+) -> Iterator[int]:
+    """Generate the earliest start minute inside every free gap which fits the duration.
+
+    All lists have to be normalized, busy intervals of the specialist and the location are merged
+    only when the generator is started.
+    """
+    busy_intervals = intervals.union(specialist_busy, location_busy)
+    for working_start, working_end in working_intervals:
+        within = (max(working_start, not_before), working_end)
+        for gap_start, _ in intervals.find_gaps(busy_intervals, within, duration):
+            yield gap_start
+
+
+def generate_specialist_slots(
+    specialist: CustomUser, day: date, *args, **kwargs,
+) -> Iterator[tuple[datetime, int, CustomUser]]:
+    """Generate free slots of the specialist as heap items ordered by time and specialist id."""
+    for start_minute in generate_free_slots(*args, **kwargs):
+        start_time, _ = intervals.to_datetime_interval((start_minute, start_minute), day)
+        yield start_time, specialist.id, specialist
+
+
+def find_next_available_slots(
+    position: str,
+    location: Location,
+    duration: timedelta,
+    start_date: date,
+    days: int,
+    limit: int = 1,
+) -> list[dict]:
+    """Find the earliest free slots of specialists with the position at the location.
+
+    Dates are walked forward by windows of SLOT_SEARCH_WINDOW_DAYS days, every window costs two queries
+    which bucket busy intervals by owner and day. Specialists who don't work at the location on a day
+    are skipped, free slots of the others are merged with a heap, so the search stops
+    as soon as enough slots are found.
+    """
+    specialists = list(
+        CustomUser.specialists.select_related("schedule").filter(position=position, schedule__isnull=False)
+    )
+    if not specialists or not location.working_time:
+        return []
+
+    not_before = round_up_datetime(timezone.now())
+    duration_minutes = ceil(duration / timedelta(minutes=1))
+    window_days = settings.SLOT_SEARCH_WINDOW_DAYS
+    slots = []
+    for window_offset in range(0, days, window_days):
+        window_dates = [
+            start_date + timedelta(days=offset)
+            for offset in range(window_offset, min(window_offset + window_days, days))
+        ]
+        working_dates = [
+            day
+            for day in window_dates
+            if get_working_day(location.working_time, day) and get_not_before_minute(not_before, day) is not None
+        ]
+        if not working_dates:
+            continue
+
+        busy = get_busy_intervals([specialist.id for specialist in specialists], location, working_dates)
+        for day in working_dates:
+            location_hours = get_location_working_intervals(location, day)
+            specialists_intervals = (
+                (specialist, intervals.intersection(get_specialist_working_intervals(specialist, day), location_hours))
+                for specialist in specialists
+            )
+            day_slots = heapq.merge(
+                *(
+                    generate_specialist_slots(
+                        specialist,
+                        day,
+                        working_intervals,
+                        busy.get(("specialist", specialist.id, day), []),
+                        busy.get(("location", location.id, day), []),
+                        duration_minutes,
+                        get_not_before_minute(not_before, day),
+                    )
+                    for specialist, working_intervals in specialists_intervals
+                    if working_intervals
+                ),
+            )
+            for start_time, _, specialist in day_slots:
+                slots.append(dict(start_time=start_time, end_time=start_time + duration, specialist=specialist))
+                if len(slots) == limit:
+                    return slots
+
+    return slots
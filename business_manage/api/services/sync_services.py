@@ -0,0 +1,58 @@
+"""Services for delta sync of specialists, locations and schedules."""
+
+from collections.abc import Iterable
+from datetime import datetime, timedelta
+
+from api.models import Tombstone
+from django.conf import settings
+from django.db.models import QuerySet
+from django.utils import timezone
+
+
+def get_sync_window(updated_since: datetime | None) -> tuple[datetime | None, datetime]:
+    """Get time since which changes are returned and the value of updated_since for the next sync.
+
+    Changes older than kept tombstones can't be synced, such clients get all objects (empty start).
+    The next sync starts a bit earlier than now, so changes committed by transactions
+    which were running during this sync are not missed.
+    """
+    now = timezone.now()
+    if updated_since is not None and updated_since < now - timedelta(days=settings.DELTA_SYNC_KEEP_DAYS):
+        updated_since = None
+    return updated_since, now - timedelta(seconds=settings.DELTA_SYNC_OVERLAP)
+
+
+def get_changed_objects(queryset: QuerySet, updated_since: datetime | None) -> QuerySet:
+    """Get objects updated since the time with the update_at index, all objects without the time."""
+    if updated_since is None:
+        return queryset
+    return queryset.filter(update_at__gte=updated_since)
+
+
+def get_deleted_ids(resource: str, updated_since: datetime | None) -> list[int]:
+    """Get ids of objects of the resource deleted since the time."""
+    if updated_since is None:
+        return []
+    return list(
+        Tombstone.objects.filter(resource=resource, deleted_at__gte=updated_since)
+        .order_by("object_id")
+        .values_list("object_id", flat=True)
+        .distinct()
+    )
+
+
+def record_tombstone(resource: str, object_id: int) -> None:
+    """Remember the deleted object for delta sync."""
+    Tombstone.objects.create(resource=resource, object_id=object_id)
+
+
+def record_tombstones(resource: str, object_ids: Iterable[int]) -> None:
+    """Remember deleted objects for delta sync with one query."""
+    Tombstone.objects.bulk_create(Tombstone(resource=resource, object_id=object_id) for object_id in object_ids)
+
+
+def delete_expired_tombstones() -> int:
+    """Delete tombstones older than the delta sync period and return their count."""
+    expired = timezone.now() - timedelta(days=settings.DELTA_SYNC_KEEP_DAYS)
+    deleted, _ = Tombstone.objects.filter(deleted_at__lt=expired).delete()
+    return deleted
@@ -0,0 +1,84 @@
+"""Services for WorkingInterval model.
+
+Working time JSON of schedules and locations is copied into WorkingInterval rows,
+so questions like "who works on Tuesday from 14:00 to 15:00" are answered with one indexed query.
+"""
+
+import calendar
+
+from api.models import Location, SpecialistSchedule, WorkingInterval
+from api.services import intervals
+from django.db.models import Exists, OuterRef, Q
+
+WEEK_DAYS = [day.capitalize() for day in calendar.HTMLCalendar.cssclasses]
+
+
+def get_weekday_intervals(working_time: dict, is_single_interval: bool) -> dict[int, list[intervals.Interval]]:
+    """Get merged intervals of every weekday of working time JSON.
+
+    Args:
+        working_time (dict): Working time like {"Mon": [["10:00", "14:00"]]} or {"Mon": ["10:00", "14:00"]},
+            empty ranges are skipped
+        is_single_interval (bool): Days have one interval like in locations' working time
+    """
+    weekday_intervals = {}
+    for day, string_intervals in (working_time or {}).items():
+        if is_single_interval:
+            string_intervals = [string_intervals]
+        string_intervals = [string_interval for string_interval in string_intervals if string_interval]
+        weekday_intervals[WEEK_DAYS.index(day)] = intervals.normalize(intervals.from_string_intervals(string_intervals))
+    return weekday_intervals
+
+
+def build_working_intervals(owner: SpecialistSchedule | Location) -> list[WorkingInterval]:
+    """Build unsaved working intervals of the schedule or the location."""
+    is_location = isinstance(owner, Location)
+    owner_field = "location" if is_location else "schedule"
+    return [
+        WorkingInterval(**{owner_field: owner}, weekday=weekday, start_minute=start, end_minute=end)
+        for weekday, weekday_intervals in get_weekday_intervals(owner.working_time, is_location).items()
+        for start, end in weekday_intervals
+    ]
+
+
+def sync_working_intervals(owner: SpecialistSchedule | Location) -> None:
+    """Replace working intervals of the schedule or the location with intervals of its working time."""
+    owner_field = "location" if isinstance(owner, Location) else "schedule"
+    WorkingInterval.objects.filter(**{owner_field: owner}).delete()
+    WorkingInterval.objects.bulk_create(build_working_intervals(owner))
+
+
+def rebuild_working_intervals(batch_size: int = 1000) -> int:
+    """Rebuild working intervals of all schedules and locations, return count of created intervals."""
+    WorkingInterval.objects.all().delete()
+    created = 0
+    for model in (SpecialistSchedule, Location):
+        batch = []
+        for owner in model.objects.only("id", "working_time").iterator(chunk_size=batch_size):
+            batch.extend(build_working_intervals(owner))
+            if len(batch) >= batch_size:
+                created += len(WorkingInterval.objects.bulk_create(batch))
+                batch = []
+        created += len(WorkingInterval.objects.bulk_create(batch))
+    return created
+
+
+def get_working_window_exists(
+    owner_lookup: str, weekday: int | None = None, start_minute: int | None = None, end_minute: int | None = None
+) -> Exists:
+    """Get subquery which is true if the outer owner works during the whole window.
+
+    Args:
+        owner_lookup (str): Lookup of WorkingInterval which is compared with the outer primary key
+        weekday (int, optional): Day of the week, any day by default
+        start_minute (int, optional): Start of the window, the owner has to work at this minute
+        end_minute (int, optional): End of the window, the owner has to work till this minute
+    """
+    window = Q(**{owner_lookup: OuterRef("pk")})
+    if weekday is not None:
+        window &= Q(weekday=weekday)
+    if start_minute is not None:
+        window &= Q(start_minute__lte=start_minute, end_minute__gt=start_minute)
+    if end_minute is not None:
+        window &= Q(start_minute__lt=end_minute, end_minute__gte=end_minute)
+    return Exists(WorkingInterval.objects.filter(window))
@@ -2,11 +2,15 @@
 
 import os
 
-from django.db.models.signals import post_delete, post_save
+from django.contrib.auth.models import Group
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_init, post_save, pre_delete
 from django.dispatch import receiver
+from django.utils.timezone import localtime
 from PIL import Image
 
-from .models import CustomUser
+from .models import Appointment, AppointmentSeries, CustomUser, Location, ScheduleEvent, SpecialistSchedule, Tombstone
+from .services import board_cache, event_services, schedule_cache, sync_services, working_interval_services
 
 
 @receiver(post_save, sender=CustomUser)
@@ -30,3 +34,130 @@ def delete_avatar(sender, instance, *args, **kwargs):
     """Remove a avatar after delete specialist."""
     if instance.avatar and os.path.exists(instance.avatar.path) and instance.avatar.name != "default_avatar.jpeg":
         os.remove(instance.avatar.path)
+
+
+@receiver(pre_delete, sender=CustomUser)
+def record_deleted_specialist(sender, instance, **kwargs):
+    """Remember a deleted specialist for delta sync, groups are checked before they are deleted."""
+    if instance.is_specialist:
+        sync_services.record_tombstone(Tombstone.ResourceChoices.SPECIALISTS, instance.id)
+
+
+@receiver(m2m_changed, sender=CustomUser.groups.through)
+def record_removed_specialists(sender, instance, action, reverse, pk_set, **kwargs):
+    """Remember users removed from the Specialist group for delta sync, clients delete them like deleted ones.
+
+    Groups can be changed from both sides, cleared groups are checked before they are removed.
+    """
+    if action not in ("post_remove", "pre_clear"):
+        return
+
+    if not reverse:
+        groups = instance.groups.all() if action == "pre_clear" else Group.objects.filter(id__in=pk_set)
+        specialist_ids = [instance.id] if groups.filter(name="Specialist").exists() else []
+    elif instance.name != "Specialist":
+        return
+    else:
+        specialist_ids = instance.user_set.values_list("id", flat=True) if action == "pre_clear" else pk_set
+
+    sync_services.record_tombstones(Tombstone.ResourceChoices.SPECIALISTS, specialist_ids)
+
+
+@receiver(post_delete, sender=Location)
+def record_deleted_location(sender, instance, **kwargs):
+    """Remember a deleted location for delta sync."""
+    sync_services.record_tombstone(Tombstone.ResourceChoices.LOCATIONS, instance.id)
+
+
+@receiver(post_delete, sender=SpecialistSchedule)
+def record_deleted_schedule(sender, instance, **kwargs):
+    """Remember a deleted schedule for delta sync."""
+    sync_services.record_tombstone(Tombstone.ResourceChoices.SCHEDULES, instance.id)
+
+
+@receiver(post_init, sender=Appointment)
+def remember_appointment_day(sender, instance, **kwargs):
+    """Remember the specialist and the day of a loaded appointment to invalidate them after changes.
+
+    Deferred fields are not loaded here.
+    """
+    start_time, end_time = instance.__dict__.get("start_time"), instance.__dict__.get("end_time")
+    instance._initial_schedule_day = (
+        (instance.__dict__.get("specialist_id"), localtime(start_time).date()) if start_time else None
+    )
+    instance._initial_interval = (start_time, end_time) if start_time and end_time else None
+
+
+@receiver(post_save, sender=Appointment)
+def update_appointment_day_schedule(sender, instance, created, **kwargs):
+    """Drop the cached day schedule of a new appointment or schedules of days of a changed one.
+
+    Location boards of changed days are dropped, the change is appended to the schedule events feed.
+    """
+    intervals = {instance._initial_interval, (instance.start_time, instance.end_time)}
+    instance._initial_interval = (instance.start_time, instance.end_time)
+    transaction.on_commit(
+        lambda: [board_cache.invalidate_interval_boards(*interval) for interval in intervals if interval is not None]
+    )
+
+    if created:
+        event_services.record_appointment_event(ScheduleEvent.KindChoices.APPOINTMENT_CREATED, instance)
+        day = localtime(instance.start_time).date()
+        transaction.on_commit(lambda: schedule_cache.invalidate_day_schedule(instance.specialist_id, day))
+        return
+
+    days = {instance._initial_schedule_day, (instance.specialist_id, localtime(instance.start_time).date())}
+    instance._initial_schedule_day = (instance.specialist_id, localtime(instance.start_time).date())
+    event_services.record_updated_appointment_events(instance, filter(None, days))
+    transaction.on_commit(
+        lambda: [schedule_cache.invalidate_day_schedule(*day) for day in days if day is not None]
+    )
+
+
+@receiver(post_delete, sender=Appointment)
+def invalidate_appointment_day_schedule(sender, instance, **kwargs):
+    """Drop the cached day schedule and location boards of a deleted appointment and append the deletion to the feed."""
+    day = localtime(instance.start_time).date()
+    event_services.record_appointment_event(ScheduleEvent.KindChoices.APPOINTMENT_DELETED, instance, day)
+    transaction.on_commit(lambda: schedule_cache.invalidate_day_schedule(instance.specialist_id, day))
+    transaction.on_commit(lambda: board_cache.invalidate_interval_boards(instance.start_time, instance.end_time))
+
+
+@receiver(post_save, sender=SpecialistSchedule)
+@receiver(post_delete, sender=SpecialistSchedule)
+@receiver(post_save, sender=AppointmentSeries)
+@receiver(post_delete, sender=AppointmentSeries)
+def invalidate_specialist_day_schedules(sender, instance, **kwargs):
+    """Drop all cached day schedules of the specialist whose schedule or appointment series is changed.
+
+    All location boards are dropped too, the change is appended to the schedule events feed.
+    """
+    event_services.record_schedule_event(instance.specialist_id)
+    transaction.on_commit(lambda: schedule_cache.invalidate_specialist_schedules(instance.specialist_id))
+    transaction.on_commit(board_cache.invalidate_all_boards)
+
+
+@receiver(post_save, sender=Location)
+@receiver(post_delete, sender=Location)
+def invalidate_location_boards(sender, instance, **kwargs):
+    """Drop all cached location boards after changes of locations."""
+    transaction.on_commit(board_cache.invalidate_all_boards)
+
+
+@receiver(post_save, sender=CustomUser)
+def invalidate_specialist_location_boards(sender, instance, update_fields=None, **kwargs):
+    """Drop all cached location boards after changes of specialists shown on them.
+
+    Logins only change last_login, which isn't shown. Deleted specialists drop boards with their schedules.
+    """
+    if update_fields is not None and set(update_fields) == {"last_login"}:
+        return
+    if instance.is_specialist:
+        transaction.on_commit(board_cache.invalidate_all_boards)
+
+
+@receiver(post_save, sender=SpecialistSchedule)
+@receiver(post_save, sender=Location)
+def sync_working_intervals(sender, instance, **kwargs):
+    """Copy working time of the saved schedule or location into working intervals in the same transaction."""
+    working_interval_services.sync_working_intervals(instance)
@@ -0,0 +1,118 @@
+"""Server-Sent Events stream of the schedule events feed served by asgi.py next to the Django application.
+
+The stream is a raw ASGI application, so an open connection holds a coroutine and not a worker thread.
+Streams don't poll the feed, they are woken up by event_feed_watcher and query the feed only after
+the latest event id changes. Every message id is the cursor which browsers send back
+in the Last-Event-ID header after reconnects.
+"""
+
+import asyncio
+from urllib.parse import parse_qs
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections
+
+from .services.event_services import (
+    event_feed_watcher,
+    format_sse_event,
+    get_events,
+    get_latest_event_id,
+    parse_event_cursor,
+)
+
+SCHEDULE_EVENTS_STREAM_PATH = "/api/schedules/events/stream/"
+
+
+def load_events(since: int, specialist_id: int | None) -> list[dict]:
+    """Get events after the cursor releasing the database connection like after a request."""
+    try:
+        return get_events(since, specialist_id)
+    finally:
+        close_old_connections()
+
+
+async def start_response(scope: dict, send, status: int, content_type: bytes) -> None:
+    """Send status and headers, allowed origins get CORS headers because the stream bypasses middlewares."""
+    headers = [(b"content-type", content_type), (b"cache-control", b"no-cache"), (b"x-accel-buffering", b"no")]
+    origin = dict(scope["headers"]).get(b"origin", b"").decode()
+    if origin in settings.CORS_ALLOWED_ORIGINS:
+        headers += [(b"access-control-allow-origin", origin.encode()), (b"vary", b"Origin")]
+    await send({"type": "http.response.start", "status": status, "headers": headers})
+
+
+def parse_stream_params(scope: dict) -> tuple[int | None, int | None]:
+    """Get the cursor and the specialist id of the stream, ValueError is raised for invalid values.
+
+    Query parameters are ?since= with the cursor and ?specialist= with the specialist id,
+    the Last-Event-ID header takes precedence over ?since=.
+    """
+    params = {key: values[-1] for key, values in parse_qs(scope["query_string"].decode()).items()}
+    specialist = params.get("specialist", "")
+    since = parse_event_cursor(dict(scope["headers"]).get(b"last-event-id", b"").decode())
+    if since is None:
+        since = parse_event_cursor(params.get("since"))
+    if (specialist and not specialist.isdigit()) or ("since" in params and since is None):
+        raise ValueError("Cursor and specialist have to be integers.")
+    return since, int(specialist) if specialist else None
+
+
+async def wait_for_change(changed: asyncio.Event, timeout: float) -> bool:
+    """Wait until the event is set or the timeout ends, return True if it is set."""
+    try:
+        await asyncio.wait_for(changed.wait(), timeout)
+    except asyncio.TimeoutError:
+        return False
+    return True
+
+
+async def send_events(
+    send, since: int, specialist_id: int | None, changed: asyncio.Event, disconnected: asyncio.Event
+) -> None:
+    """Send events after the cursor every time the feed changes until the client disconnects.
+
+    The feed is queried at the start and after every change, full pages are followed at once.
+    A heartbeat comment is sent when nothing has been sent for a while.
+    """
+    body, is_changed, events = f"retry: {int(settings.SCHEDULE_EVENTS_POLL_INTERVAL * 1000)}\n\n", True, []
+    while not disconnected.is_set():
+        if is_changed:
+            changed.clear()
+            if events := await sync_to_async(load_events)(since, specialist_id):
+                since = events[-1]["id"]
+                body += "".join(map(format_sse_event, events))
+        if body:
+            await send({"type": "http.response.body", "body": body.encode(), "more_body": True})
+        is_changed = len(events) == settings.SCHEDULE_EVENTS_PAGE_SIZE or await wait_for_change(
+            changed, settings.SCHEDULE_EVENTS_HEARTBEAT
+        )
+        body = "" if is_changed else ": heartbeat\n\n"
+
+
+async def schedule_events_stream(scope: dict, receive, send) -> None:
+    """Stream events after the cursor until the client disconnects, the latest event is the default cursor."""
+    try:
+        since, specialist_id = parse_stream_params(scope)
+    except ValueError as error:
+        await start_response(scope, send, 400, b"text/plain")
+        await send({"type": "http.response.body", "body": str(error).encode()})
+        return
+
+    if since is None:
+        since = await sync_to_async(get_latest_event_id)()
+
+    with event_feed_watcher.subscribe() as changed:
+        disconnected = asyncio.Event()
+
+        async def wait_for_disconnect():
+            while (await receive())["type"] != "http.disconnect":
+                pass
+            disconnected.set()
+            changed.set()
+
+        disconnect_watcher = asyncio.create_task(wait_for_disconnect())
+        await start_response(scope, send, 200, b"text/event-stream")
+        try:
+            await send_events(send, since, specialist_id, changed, disconnected)
+        finally:
+            disconnect_watcher.cancel()
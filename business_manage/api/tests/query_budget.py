@@ -0,0 +1,79 @@
+"""Query budget assertions for list and detail endpoints."""
+
+import re
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+
+class QueryBudgetMixin:
+    """Mixin for API test cases which checks that endpoints don't query related objects one by one."""
+
+    def get_query_count(self, url: str, params: dict | None = None) -> int:
+        """Get count of queries executed by a successful GET request."""
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200, response.data)
+        return len(queries)
+
+    def assert_list_query_budget(self, url: str, create_rows, budget: int, params: dict | None = None) -> None:
+        """Assert the list endpoint fits the budget and its query count doesn't grow with the page size.
+
+        Args:
+            url (str): URL of the list endpoint
+            create_rows (callable): Function which creates the given count of listed rows
+            budget (int): The largest allowed count of queries
+            params (dict, optional): Query parameters of the request
+        """
+        params = {"page_size": 1000, **(params or {})}
+        create_rows(1)
+        one_row_count = self.get_query_count(url, params)
+        create_rows(9)
+        many_rows_count = self.get_query_count(url, params)
+
+        self.assertEqual(
+            one_row_count, many_rows_count, f"Query count of {url} grows with the page size, check related objects."
+        )
+        self.assertLessEqual(many_rows_count, budget, f"{url} exceeds the query budget.")
+
+    def assert_detail_query_budget(self, url: str, budget: int) -> None:
+        """Assert the detail endpoint fits the budget."""
+        self.assertLessEqual(self.get_query_count(url), budget, f"{url} exceeds the query budget.")
+
+
+class QueryPlanMixin:
+    """Mixin for test cases which checks that queries are served by an index."""
+
+    def get_query_plans(self, func, table: str) -> list[str]:
+        """Call the function and get plans of its queries which read the table.
+
+        Sequential scans are disabled on PostgreSQL, so tiny test tables don't hide a usable index.
+        """
+        with CaptureQueriesContext(connection) as queries:
+            func()
+
+        explain = "EXPLAIN" if connection.vendor == "postgresql" else "EXPLAIN QUERY PLAN"
+        plans = []
+        with connection.cursor() as cursor:
+            if connection.vendor == "postgresql":
+                cursor.execute("SET LOCAL enable_seqscan = off")
+            for query in queries:
+                if query["sql"].startswith("SELECT") and f'FROM "{table}"' in query["sql"]:
+                    cursor.execute(f"{explain} {query['sql']}")
+                    plans.append("\n".join(" ".join(map(str, row)) for row in cursor.fetchall()))
+        return plans
+
+    def assert_uses_index_range(self, func, table: str, index_name: str, field_name: str) -> None:
+        """Assert some query of the function reads the table by a range of the field in the index.
+
+        Args:
+            func (callable): Function which executes the queries
+            table (str): Name of the read table
+            index_name (str): Name of the index
+            field_name (str): Name of the column compared with the range
+        """
+        plans = self.get_query_plans(func, table)
+        self.assertTrue(
+            any(index_name in plan and re.search(rf"{field_name}\s*[<>]", plan) for plan in plans),
+            f"No query reads {table} by the range of {field_name} in {index_name}:\n" + "\n\n".join(plans),
+        )
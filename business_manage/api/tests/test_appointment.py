@@ -3,22 +3,47 @@
 from api.factories.factories import (
     AdminFactory,
     AppointmentFactory,
+    AppointmentSeriesFactory,
     CustomUserFactory,
     LocationFactory,
     ManagerFactory,
     SpecialistFactory,
+    SpecialistScheduleFactory,
     SuperuserFactory,
 )
+import io
+import json
+import re
+import tempfile
+from unittest import mock
+
+from django.db import IntegrityError, OperationalError, connection, transaction
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from django.utils import timezone
 from django.utils.timezone import datetime, get_current_timezone, make_aware, timedelta
 from rest_framework.exceptions import ErrorDetail, ValidationError
 from rest_framework.reverse import reverse
 from rest_framework.test import APITestCase
 
-from ..models import CustomUser
-from ..serializers.appointment_serializers import AppointmentSerializer
-from ..utils import string_to_time
+from ..models import Appointment, AppointmentSeries, ArchivedAppointment, CustomUser, IdempotencyKey, ScheduleEvent
+from ..serializers.appointment_serializers import AppointmentBatchItemSerializer, AppointmentSerializer
+from ..services.appointment_services import (
+    book_appointments,
+    complete_past_appointments,
+    get_appointments_time_intervals,
+    get_appointments_time_intervals_by_day,
+    is_appointment_fit_datetime,
+    validate_appointments_batch,
+)
+from ..services.archive_services import archive_appointments, get_archive_cutoff
+from ..services.idempotency_services import delete_expired_idempotency_keys, reserve_idempotency_key
+from ..services.import_services import import_appointments
+from ..transactions import atomic_with_retries
+from ..utils import generate_working_time, generate_working_time_intervals, get_local_day_range, string_to_time
+from .query_budget import QueryPlanMixin
 from rest_framework import status
 
 
@@ -131,6 +156,34 @@ class AppointmentModelTest(TestCase):
 
         self.assertFalse(appointment.is_active)
 
+    def test_overlapping_appointments_database_error(self):
+        """Test the database forbids overlapping appointments of a specialist or a location."""
+        appointment = self.appointment()
+        start_time = appointment.start_time + timedelta(minutes=10)
+        owners = [
+            dict(specialist=appointment.specialist, location=LocationFactory()),
+            dict(specialist=SpecialistFactory(), location=appointment.location),
+        ]
+        for owner in owners:
+            with self.subTest(owner=owner), self.assertRaises(IntegrityError), transaction.atomic():
+                self.appointment(start_time=start_time, **owner)
+
+    def test_adjacent_appointments_and_update(self):
+        """Test adjacent appointments are allowed and appointment can be updated in place."""
+        appointment = self.appointment()
+        next_appointment = self.appointment(
+            start_time=appointment.end_time, specialist=appointment.specialist, location=appointment.location
+        )
+        appointment.duration += timedelta(minutes=5)
+
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            appointment.save()
+
+        next_appointment.start_time += timedelta(minutes=5)
+        next_appointment.save()
+        appointment.save()
+        self.assertEqual(appointment.end_time, next_appointment.start_time)
+
     def test_repr_method(self):
         """Test __repr__ method."""
         appointment = AppointmentFactory()
@@ -238,6 +291,68 @@ class AppointmentSerializerTest(TestCase):
         message = ex.exception.args[0]
         self.assertEqual(message, {"start_time": [ErrorDetail(string="This field may not be null.", code="null")]})
 
+    def test_serialize_overlapping_appointment_error(self):
+        """Check the database rejects an appointment overlapping the saved one."""
+        self.serializer.is_valid(raise_exception=True)
+        self.serializer.save()
+        self.valid_data.update(dict(start_time=self.valid_data["start_time"] + timedelta(minutes=5)))
+        serializer = AppointmentSerializer(data=self.valid_data)
+        serializer.is_valid(raise_exception=True)
+
+        with self.assertRaises(ValidationError) as ex:
+            serializer.save()
+
+        self.assertEqual(
+            ex.exception.detail,
+            {
+                "start_time": [
+                    ErrorDetail(
+                        string="Appointments have already created for this datetime.", code="appointment_overlap"
+                    )
+                ]
+            },
+        )
+
+    def test_serialize_booking_queries_count(self):
+        """Check validating and saving an appointment runs only the statements of the booking budget.
+
+        BookingContext loads everything for validation with one query and the appointment is inserted
+        with another one. The change is appended to the schedule events feed with the third query.
+        Databases supporting row locks lock the specialist schedule before the insert,
+        SQLite serializes writing transactions itself.
+        Savepoints are skipped, they come from the test transaction wrapping the request.
+        """
+        with CaptureQueriesContext(connection) as context:
+            serializer = AppointmentSerializer(data=self.valid_data)
+            serializer.is_valid(raise_exception=True)
+            serializer.save()
+            serializer.data
+
+        queries = [query["sql"] for query in context.captured_queries if "SAVEPOINT" not in query["sql"]]
+        expected = ['SELECT "api_customuser"', 'INSERT INTO "api_appointment"', 'INSERT INTO "api_scheduleevent"']
+        if connection.features.has_select_for_update:
+            expected.insert(1, 'SELECT "api_specialistschedule"')
+        self.assertEqual(len(queries), len(expected), queries)
+        for sql, prefix in zip(queries, expected):
+            self.assertTrue(sql.startswith(prefix), sql)
+        if connection.features.has_select_for_update:
+            self.assertIn("FOR UPDATE", queries[1])
+
+    def test_serialize_unknown_specialist_and_location(self):
+        """Check serializer reports both unknown specialist and location."""
+        self.valid_data.update(dict(specialist=0, location=0))
+
+        with self.assertRaises(ValidationError) as ex:
+            self.serializer.is_valid(raise_exception=True)
+
+        self.assertEqual(
+            ex.exception.detail,
+            {
+                "specialist": [ErrorDetail(string='"0" is not a valid choice.', code="invalid_choice")],
+                "location": [ErrorDetail(string='"0" is not a valid choice.', code="invalid_choice")],
+            },
+        )
+
     def test_to_representation_method(self):
         """Check serializer a to_representation method."""
         self.serializer.is_valid(raise_exception=True)
@@ -313,6 +428,74 @@ class AppointmentViewTest(APITestCase):
         response = self.client.post(reverse(self.create_ap_url), self.valid_data, format="json")
         self.assertEqual(response.status_code, status.HTTP_201_CREATED)
 
+    def test_create_appointment_idempotency_key(self):
+        """Test repeated request with the same idempotency key replays the response."""
+        self.client.force_authenticate(AdminFactory())
+        url = reverse(self.create_ap_url)
+
+        response = self.client.post(url, self.valid_data, format="json", HTTP_IDEMPOTENCY_KEY="key-1")
+        replayed_response = self.client.post(url, self.valid_data, format="json", HTTP_IDEMPOTENCY_KEY="key-1")
+
+        self.assertEqual(replayed_response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(replayed_response.json(), response.json())
+        self.assertEqual(replayed_response.headers["Idempotent-Replayed"], "true")
+        self.assertEqual(Appointment.objects.count(), 1)
+
+    def test_create_appointment_idempotency_key_other_request(self):
+        """Test idempotency key can't be reused for other request data."""
+        self.client.force_authenticate(AdminFactory())
+        url = reverse(self.create_ap_url)
+        self.client.post(url, self.valid_data, format="json", HTTP_IDEMPOTENCY_KEY="key-1")
+        self.valid_data.update(dict(start_time=self.valid_data["start_time"] + timedelta(hours=1)))
+
+        response = self.client.post(url, self.valid_data, format="json", HTTP_IDEMPOTENCY_KEY="key-1")
+
+        self.assertEqual(response.status_code, status.HTTP_422_UNPROCESSABLE_ENTITY)
+        self.assertEqual(Appointment.objects.count(), 1)
+
+    def test_create_appointment_idempotency_key_failed_request(self):
+        """Test failed request doesn't keep the idempotency key and expired keys are deleted."""
+        self.client.force_authenticate(AdminFactory())
+        url = reverse(self.create_ap_url)
+        valid_data = dict(self.valid_data)
+        self.valid_data.update(dict(specialist=0))
+
+        response = self.client.post(url, self.valid_data, format="json", HTTP_IDEMPOTENCY_KEY="key-1")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(IdempotencyKey.objects.exists())
+
+        response = self.client.post(url, valid_data, format="json", HTTP_IDEMPOTENCY_KEY="key-1")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        IdempotencyKey.objects.update(expires_at=timezone.now())
+        self.assertEqual(delete_expired_idempotency_keys(), 1)
+
+    def test_idempotency_key_released_during_reservation(self):
+        """Test the key released by a failed request after the conflict is reserved again."""
+        create = IdempotencyKey.objects.create
+
+        def create_after_release(**kwargs):
+            if create_key.call_count == 1:
+                raise IntegrityError("UNIQUE constraint failed: api_idempotencykey.key")
+            return create(**kwargs)
+
+        with mock.patch.object(IdempotencyKey.objects, "create", side_effect=create_after_release) as create_key:
+            idempotency_key, reserved = reserve_idempotency_key("key-hash", "request-hash")
+
+        self.assertTrue(reserved)
+        self.assertEqual(idempotency_key.key, "key-hash")
+        self.assertEqual(create_key.call_count, 2)
+
+    def test_appointment_fields_choices(self):
+        """Test OPTIONS request displays specialists and locations choices."""
+        self.client.force_authenticate(AdminFactory())
+        response = self.client.options(reverse(self.create_ap_url), format="json")
+        fields = response.data["fields"]
+        self.assertEqual(
+            [choice["value"] for choice in fields["specialist"]["choices"]], [self.valid_data["specialist"]]
+        )
+        self.assertEqual([choice["value"] for choice in fields["location"]["choices"]], [self.valid_data["location"]])
+
     def test_create_appointment_not_specialist_schedule_error(self):
         """Create appointment for specialist without schedule."""
         admin = AdminFactory()
@@ -322,3 +505,867 @@ class AppointmentViewTest(APITestCase):
 
         response = self.client.post(reverse(self.create_ap_url), self.valid_data, format="json")
         self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class AtomicWithRetriesTest(TestCase):
+    """Class AtomicWithRetriesTest for testing retries of failed transactions."""
+
+    @mock.patch("api.transactions.time.sleep")
+    def test_retry_locked_database(self, sleep):
+        """Transaction failed because of a concurrent one is retried."""
+        func = mock.Mock(side_effect=[OperationalError("database is locked"), "booked"])
+
+        self.assertEqual(atomic_with_retries(func, attempts=3), "booked")
+        self.assertEqual(func.call_count, 2)
+        sleep.assert_called_once()
+
+    @mock.patch("api.transactions.time.sleep")
+    def test_retry_attempts_exceeded(self, sleep):
+        """The last error is raised when all attempts fail."""
+        func = mock.Mock(side_effect=OperationalError("database is locked"))
+
+        with self.assertRaises(OperationalError):
+            atomic_with_retries(func, attempts=3)
+        self.assertEqual(func.call_count, 3)
+
+    def test_not_retryable_error(self):
+        """Other database errors are raised at once."""
+        func = mock.Mock(side_effect=OperationalError("no such table"))
+
+        with self.assertRaises(OperationalError):
+            atomic_with_retries(func, attempts=3)
+        func.assert_called_once()
+
+    def test_nested_transaction_is_refused(self):
+        """Retries only run the outermost transaction, a savepoint can't recover a failed transaction."""
+        func = mock.Mock(return_value="booked")
+
+        with transaction.atomic(), self.assertRaises(RuntimeError):
+            atomic_with_retries(func, attempts=3)
+        func.assert_not_called()
+
+
+class AppointmentOverlapTest(TestCase):
+    """Class AppointmentOverlapTest for testing overlap checks of appointments intervals."""
+
+    def setUp(self):
+        """This method adds needed info for tests."""
+        self.appointment = AppointmentFactory()
+        self.start_time = self.appointment.start_time
+        self.end_time = self.appointment.end_time
+
+    def tearDown(self):
+        """This method deletes all users and cleans avatars' data."""
+        CustomUser.objects.all().delete()
+
+    def test_overlapping_intervals(self):
+        """Intervals which intersect, contain or are inside the appointment are not free."""
+        intervals = [
+            [self.start_time - timedelta(minutes=10), self.start_time + timedelta(minutes=10)],
+            [self.start_time + timedelta(minutes=5), self.end_time - timedelta(minutes=5)],
+            [self.start_time - timedelta(minutes=30), self.end_time + timedelta(minutes=30)],
+            [self.end_time - timedelta(minutes=5), self.end_time + timedelta(minutes=30)],
+        ]
+        for interval in intervals:
+            with self.subTest(interval=interval):
+                self.assertFalse(
+                    is_appointment_fit_datetime(interval, self.appointment.specialist, LocationFactory())
+                )
+                self.assertFalse(is_appointment_fit_datetime(interval, SpecialistFactory(), self.appointment.location))
+
+    def test_adjacent_intervals(self):
+        """Intervals which touch the appointment are free."""
+        intervals = [
+            [self.start_time - timedelta(minutes=30), self.start_time],
+            [self.end_time, self.end_time + timedelta(minutes=30)],
+        ]
+        for interval in intervals:
+            with self.subTest(interval=interval):
+                self.assertTrue(
+                    is_appointment_fit_datetime(interval, self.appointment.specialist, self.appointment.location)
+                )
+
+
+class AppointmentBulkCreateViewTest(APITestCase):
+    """Class AppointmentBulkCreateViewTest for testing batch appointments creation."""
+
+    def setUp(self):
+        """This method adds needed info for tests."""
+        self.url = reverse("api:appointments-bulk-create")
+        self.specialist = SpecialistScheduleFactory(
+            working_time=generate_working_time_intervals("09:00", "20:00")
+        ).specialist
+        self.location = LocationFactory(working_time=generate_working_time("09:00", "20:00"))
+        self.start_time = datetime.combine(
+            datetime.now().date() + timedelta(days=1), string_to_time("12:00"), tzinfo=get_current_timezone()
+        )
+        self.client.force_authenticate(AdminFactory())
+
+    def tearDown(self):
+        """This method deletes all users and cleans avatars' data."""
+        CustomUser.objects.all().delete()
+
+    def get_appointment_data(self, minutes, duration=30, **kwargs):
+        """Get appointment data which starts in minutes after start time."""
+        data = {
+            "start_time": self.start_time + timedelta(minutes=minutes),
+            "specialist": self.specialist.id,
+            "location": self.location.id,
+            "duration": timedelta(minutes=duration),
+            "customer_firstname": "Anna",
+            "customer_lastname": "Smith",
+            "customer_email": "anna.smith@example.com",
+        }
+        data.update(kwargs)
+        return data
+
+    def test_create_appointments_batch(self):
+        """Test all appointments of the batch are created with computed end time and one feed insert.
+
+        Overlaps are checked again with one query after the schedules are locked.
+        """
+        appointments = [self.get_appointment_data(minutes) for minutes in (60, 0, 30)]
+
+        with self.assertNumQueries(13):
+            response = self.client.post(self.url, {"appointments": appointments}, format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(response.data["created"]), 3)
+        self.assertEqual(response.data["errors"], [])
+        for appointment in self.specialist.appointments.all():
+            self.assertEqual(appointment.end_time, appointment.start_time + appointment.duration)
+
+    def test_create_appointments_batch_overlap_all_mode(self):
+        """Test nothing is created when appointments of the batch overlap each other."""
+        other_specialist = SpecialistScheduleFactory(
+            working_time=generate_working_time_intervals("09:00", "20:00")
+        ).specialist
+        appointments = [self.get_appointment_data(0), self.get_appointment_data(20, specialist=other_specialist.id)]
+
+        response = self.client.post(self.url, {"appointments": appointments}, format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(
+            response.data,
+            {
+                "appointments": [
+                    {},
+                    {"start_time": [ErrorDetail("Appointment overlaps appointment #0 of the batch.", code="invalid")]},
+                ]
+            },
+        )
+        self.assertFalse(self.location.location_appointments.exists())
+
+    def test_create_appointments_batch_partial_mode(self):
+        """Test valid appointments are created when others overlap existing appointments or are invalid."""
+        AppointmentFactory(specialist=self.specialist, location=LocationFactory(), start_time=self.start_time)
+        appointments = [
+            self.get_appointment_data(10),
+            self.get_appointment_data(30),
+            self.get_appointment_data(60, specialist=0),
+        ]
+
+        response = self.client.post(self.url, {"appointments": appointments, "mode": "partial"}, format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(response.data["created"]), 1)
+        self.assertEqual(
+            response.data["errors"],
+            [
+                {"index": 0, "errors": {"start_time": ["Appointments have already created for this datetime."]}},
+                {"index": 2, "errors": {"specialist": ['"0" is not a valid choice.']}},
+            ],
+        )
+
+    def test_create_appointments_batch_checked_again_before_insert(self):
+        """Test appointments booked after the validation are found again under the schedule locks."""
+        appointments = [self.get_appointment_data(0), self.get_appointment_data(60)]
+
+        def validate_and_book(appointments_data):
+            errors = validate_appointments_batch(appointments_data)
+            AppointmentFactory(specialist=self.specialist, location=LocationFactory(), start_time=self.start_time)
+            return errors
+
+        with mock.patch(
+            "api.serializers.appointment_serializers.validate_appointments_batch", side_effect=validate_and_book
+        ):
+            response = self.client.post(self.url, {"appointments": appointments, "mode": "partial"}, format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(response.data["created"]), 1)
+        self.assertEqual(
+            response.data["errors"],
+            [{"index": 0, "errors": {"start_time": ["Appointments have already created for this datetime."]}}],
+        )
+
+    def test_book_appointments_constraint_violation_partial_mode(self):
+        """Test appointments rejected by the overlap constraints become errors of single appointments."""
+        other_specialist = SpecialistScheduleFactory(
+            working_time=generate_working_time_intervals("09:00", "20:00")
+        ).specialist
+        AppointmentFactory(specialist=other_specialist, location=self.location, start_time=self.start_time)
+        appointments_data = {
+            index: dict(self.get_appointment_data(minutes), specialist=self.specialist, location=self.location)
+            for index, minutes in enumerate((0, 60))
+        }
+
+        with mock.patch("api.services.appointment_services.find_appointments_overlaps", return_value={}):
+            appointments, errors = book_appointments(appointments_data, partial=True)
+
+        self.assertEqual([appointment.start_time for appointment in appointments], [appointments_data[1]["start_time"]])
+        self.assertEqual(errors, {0: {"start_time": ["Appointments have already created for this datetime."]}})
+        self.assertEqual(self.specialist.appointments.count(), 1)
+
+
+class AppointmentSeriesTest(APITestCase):
+    """Class AppointmentSeriesTest for testing recurring appointments."""
+
+    def setUp(self):
+        """This method adds needed info for tests."""
+        self.url = reverse("api:appointment-series-list-create")
+        self.specialist = SpecialistScheduleFactory(
+            working_time=generate_working_time_intervals("09:00", "20:00")
+        ).specialist
+        self.location = LocationFactory(working_time=generate_working_time("09:00", "20:00"))
+        self.start_time = datetime.combine(
+            datetime.now().date() + timedelta(days=1), string_to_time("12:00"), tzinfo=get_current_timezone()
+        )
+        self.client.force_authenticate(AdminFactory())
+
+    def tearDown(self):
+        """This method deletes all users and cleans avatars' data."""
+        CustomUser.objects.all().delete()
+
+    def get_series_data(self, start_time=None, **kwargs):
+        """Get data of the weekly series."""
+        data = {
+            "start_time": start_time or self.start_time,
+            "duration": timedelta(minutes=30),
+            "frequency": "weekly",
+            "specialist": self.specialist.id,
+            "location": self.location.id,
+            "customer_firstname": "Anna",
+            "customer_lastname": "Smith",
+            "customer_email": "anna.smith@example.com",
+        }
+        data.update(kwargs)
+        return data
+
+    def test_occurrences_expanded_for_window(self):
+        """Test only occurrences intersecting the window are generated, even years after the first one."""
+        series = AppointmentSeries(start_time=self.start_time, duration=timedelta(minutes=30), interval=2)
+        window_start = self.start_time + timedelta(weeks=520)
+
+        occurrences = list(series.occurrences(window_start, window_start + timedelta(weeks=4)))
+
+        self.assertEqual(
+            [start_time for start_time, _ in occurrences], [window_start, window_start + timedelta(weeks=2)]
+        )
+        self.assertEqual(occurrences[0][1], window_start + timedelta(minutes=30))
+
+    def test_occurrences_count_and_until(self):
+        """Test series ends after count occurrences or on until date."""
+        window = (self.start_time, self.start_time + timedelta(weeks=10))
+        series = AppointmentSeries(start_time=self.start_time, duration=timedelta(minutes=30), count=3)
+        self.assertEqual(len(list(series.occurrences(*window))), 3)
+        self.assertEqual(series.end_time, self.start_time + timedelta(weeks=2, minutes=30))
+
+        series.count, series.until = None, (self.start_time + timedelta(weeks=4)).date()
+        self.assertEqual(len(list(series.occurrences(*window))), 5)
+
+    def test_create_series(self):
+        """Test series is created without saving its occurrences."""
+        response = self.client.post(self.url, self.get_series_data(), format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data["specialist"], self.specialist.get_full_name())
+        self.assertFalse(Appointment.objects.exists())
+
+    def test_create_series_outside_working_time(self):
+        """Test series is rejected when its occurrence doesn't fit the specialist schedule."""
+        response = self.client.post(
+            self.url, self.get_series_data(self.start_time + timedelta(hours=8)), format="json"
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("specialist", response.data)
+
+    def test_create_series_overlapping_appointment(self):
+        """Test series is rejected when its later occurrence overlaps an existing appointment."""
+        AppointmentFactory(
+            specialist=self.specialist, location=self.location, start_time=self.start_time + timedelta(weeks=3)
+        )
+
+        response = self.client.post(self.url, self.get_series_data(), format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("start_time", response.data)
+
+    def test_create_series_overlapping_series(self):
+        """Test series is rejected when it meets other series of the location after several weeks."""
+        AppointmentSeriesFactory(location=self.location, start_time=self.start_time, interval=2)
+        data = self.get_series_data(self.start_time + timedelta(weeks=1), frequency="daily", interval=3)
+
+        response = self.client.post(self.url, data, format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("start_time", response.data)
+
+    def test_appointment_overlapping_occurrence(self):
+        """Test appointment can't be booked at the time of a series occurrence."""
+        AppointmentSeriesFactory(specialist=self.specialist, start_time=self.start_time, duration=timedelta(hours=1))
+        data = self.get_series_data(self.start_time + timedelta(weeks=5, minutes=30))
+        data.pop("frequency")
+
+        response = self.client.post(reverse("api:appointments-list-create"), data, format="json")
+        batch_response = self.client.post(
+            reverse("api:appointments-bulk-create"), {"appointments": [data]}, format="json"
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("start_time", response.data)
+        self.assertEqual(batch_response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("start_time", batch_response.data["appointments"][0])
+
+    def test_appointments_time_intervals_include_occurrences(self):
+        """Test intervals of the day contain appointments and series occurrences in time order."""
+        day = self.start_time + timedelta(weeks=52)
+        AppointmentSeriesFactory(specialist=self.specialist, start_time=self.start_time, duration=timedelta(hours=1))
+        AppointmentFactory(specialist=self.specialist, start_time=day - timedelta(hours=2))
+
+        intervals = get_appointments_time_intervals(self.specialist, timezone.localtime(day).date())
+
+        self.assertEqual(intervals, [["10:00", "10:20"], ["12:00", "13:00"]])
+
+
+class NextAvailableSlotViewTest(APITestCase):
+    """Class NextAvailableSlotViewTest for testing the next available slot search."""
+
+    def setUp(self):
+        """This method adds needed info for tests."""
+        self.url = reverse("api:appointments-next-available")
+        self.location = LocationFactory(working_time=generate_working_time("10:00", "18:00"))
+        self.specialists = [
+            SpecialistScheduleFactory(
+                specialist__position="position_1", working_time=generate_working_time_intervals("09:00", "20:00")
+            ).specialist
+            for _ in range(2)
+        ]
+        self.day = datetime.now().date() + timedelta(days=1)
+        self.params = {"position": "position_1", "location": self.location.id, "duration": "00:30:00", "date": self.day}
+
+    def tearDown(self):
+        """This method deletes all users and cleans avatars' data."""
+        CustomUser.objects.all().delete()
+
+    def get_datetime(self, value, days=0):
+        """Get aware datetime of the search day."""
+        return datetime.combine(
+            self.day + timedelta(days=days), string_to_time(value), tzinfo=get_current_timezone()
+        )
+
+    def book(self, specialist, start, end, location=None):
+        """Create an appointment of the specialist."""
+        start_time = self.get_datetime(start)
+        AppointmentFactory(
+            specialist=specialist,
+            location=location or LocationFactory(),
+            start_time=start_time,
+            duration=self.get_datetime(end) - start_time,
+        )
+
+    def test_earliest_slots_across_specialists(self):
+        """Test slots are ordered by time over all specialists and the next days."""
+        first, second = self.specialists
+        self.book(first, "10:00", "11:00")
+        self.book(second, "10:00", "10:30")
+
+        with self.assertNumQueries(4):
+            response = self.client.get(self.url, {**self.params, "limit": 3})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [(slot["specialist"], slot["start_time"]) for slot in response.data],
+            [
+                (second.id, self.get_datetime("10:30").isoformat()),
+                (first.id, self.get_datetime("11:00").isoformat()),
+                (first.id, self.get_datetime("10:00", days=1).isoformat()),
+            ],
+        )
+        self.assertEqual(response.data[0]["end_time"], self.get_datetime("11:00").isoformat())
+
+    def test_location_appointments_block_all_specialists(self):
+        """Test appointments of other specialists at the location are taken into account."""
+        other_specialist = SpecialistScheduleFactory(
+            specialist__position="position_2", working_time=generate_working_time_intervals("09:00", "20:00")
+        ).specialist
+        self.book(other_specialist, "10:00", "12:00", location=self.location)
+
+        response = self.client.get(self.url, self.params)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data), 1)
+        self.assertEqual(response.data[0]["start_time"], self.get_datetime("12:00").isoformat())
+
+    def test_slots_start_after_now(self):
+        """Test slots of the current day start at the next 5 minutes."""
+        self.book(self.specialists[0], "10:00", "10:30")
+
+        with mock.patch("api.services.slot_services.timezone.now", return_value=self.get_datetime("10:07")):
+            response = self.client.get(self.url, {**self.params, "limit": 2})
+
+        self.assertEqual(
+            [(slot["specialist"], slot["start_time"]) for slot in response.data],
+            [
+                (self.specialists[1].id, self.get_datetime("10:10").isoformat()),
+                (self.specialists[0].id, self.get_datetime("10:30").isoformat()),
+            ],
+        )
+
+    def test_no_free_slots(self):
+        """Test empty list is returned when no specialist has free time during the period."""
+        for specialist in self.specialists:
+            self.book(specialist, "10:00", "18:00")
+
+        response = self.client.get(self.url, {**self.params, "days": 1})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data, [])
+
+    def test_invalid_search_params(self):
+        """Test search params are validated."""
+        response = self.client.get(self.url, {**self.params, "duration": "00:07:00", "days": 1000})
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(set(response.data), {"duration", "days"})
+
+
+class AppointmentFilterTest(QueryPlanMixin, APITestCase):
+    """Class AppointmentFilterTest for testing appointments search."""
+
+    def setUp(self):
+        """This method adds needed info for tests."""
+        self.url = reverse("api:appointments-list-create")
+        self.location = LocationFactory()
+        self.day = datetime.now().date() + timedelta(days=1)
+        self.appointments = [
+            AppointmentFactory(
+                location=self.location,
+                start_time=datetime.combine(
+                    self.day + timedelta(days=days), string_to_time("12:00"), tzinfo=get_current_timezone()
+                ),
+                customer_email=f"customer_{days}@example.com",
+            )
+            for days in range(3)
+        ]
+        AppointmentFactory(start_time=self.appointments[0].start_time)
+
+    def tearDown(self):
+        """This method deletes all users and cleans avatars' data."""
+        CustomUser.objects.all().delete()
+
+    def get_emails(self, params):
+        """Get customer emails of found appointments."""
+        response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [appointment["customer_email"] for appointment in response.data["results"]]
+
+    def test_filter_location_and_local_day(self):
+        """Test appointments of the location during the local day."""
+        self.assertEqual(self.get_emails({"location": self.location.id, "date": self.day}), ["customer_0@example.com"])
+
+    def test_filter_start_time_range(self):
+        """Test appointments starting inside the range ordered by start time."""
+        params = {
+            "location": self.location.id,
+            "start_time_after": self.appointments[1].start_time.isoformat(),
+            "start_time_before": self.appointments[2].start_time.isoformat(),
+        }
+        self.assertEqual(self.get_emails(params), ["customer_1@example.com", "customer_2@example.com"])
+
+    def test_filter_customer_email_and_status(self):
+        """Test appointments by customer email and active status."""
+        self.appointments[2].mark_as_completed()
+
+        self.assertEqual(self.get_emails({"customer_email": "CUSTOMER_1@example.com"}), ["customer_1@example.com"])
+        inactive_emails = self.get_emails({"location": self.location.id, "is_active": False})
+        self.assertEqual(inactive_emails, ["customer_2@example.com"])
+
+    def test_cursor_pagination_by_start_time(self):
+        """Test appointments keyset pagination keeps start time order for appointments starting together."""
+        response = self.client.get(self.url, {"pagination": "cursor", "page_size": 2})
+        next_response = self.client.get(response.data["next"])
+
+        start_times = [
+            appointment["start_time"] for appointment in response.data["results"] + next_response.data["results"]
+        ]
+        self.assertEqual(len(start_times), 4)
+        self.assertEqual(start_times, sorted(start_times))
+        self.assertIsNone(next_response.data["next"])
+
+    def test_location_day_query_uses_index(self):
+        """Test search of the location appointments during the day is an index range scan."""
+        day_start, day_end = get_local_day_range(self.day)
+        queryset = Appointment.objects.filter(
+            location=self.location, start_time__gte=day_start, start_time__lt=day_end
+        ).order_by("start_time")
+
+        plan = queryset.explain()
+
+        if connection.vendor == "sqlite":
+            self.assertIn("appointment_location_start", plan)
+            self.assertNotIn("USE TEMP B-TREE FOR ORDER BY", plan)
+
+        self.assert_uses_index_range(
+            lambda: self.get_emails({"location": self.location.id, "date": self.day}),
+            "api_appointment",
+            "appointment_location_start",
+            "start_time",
+        )
+
+
+class LocalDayWindowTest(QueryPlanMixin, TestCase):
+    """Class LocalDayWindowTest for testing local days are searched by half-open ranges of start time."""
+
+    def setUp(self):
+        """This method adds needed info for tests."""
+        self.specialist = SpecialistFactory()
+        self.day = datetime.now().date() + timedelta(days=1)
+
+    def tearDown(self):
+        """This method deletes all users and cleans avatars' data."""
+        CustomUser.objects.all().delete()
+
+    def test_local_day_range(self):
+        """Test range starts at the local midnight and ends at the midnight after the last day."""
+        day = datetime(2030, 1, 7).date()
+
+        day_start, day_end = get_local_day_range(day, day + timedelta(days=2))
+
+        self.assertEqual(day_start, datetime.fromisoformat("2030-01-06T22:00:00+00:00"))
+        self.assertEqual(day_end, datetime.fromisoformat("2030-01-09T22:00:00+00:00"))
+        self.assertEqual(get_local_day_range(day)[1], datetime.fromisoformat("2030-01-07T22:00:00+00:00"))
+
+    def test_day_intervals_use_index(self):
+        """Test appointments of the specialist day are read by the specialist and start time index."""
+        self.assert_uses_index_range(
+            lambda: get_appointments_time_intervals(self.specialist, self.day),
+            "api_appointment",
+            "appointment_specialist_start",
+            "start_time",
+        )
+
+    def test_days_intervals_use_index(self):
+        """Test appointments of the specialist period are read by the specialist and start time index."""
+        self.assert_uses_index_range(
+            lambda: get_appointments_time_intervals_by_day(self.specialist, [self.day, self.day + timedelta(days=1)]),
+            "api_appointment",
+            "appointment_specialist_start",
+            "start_time",
+        )
+
+    def test_date_lookup_is_not_index_range(self):
+        """Test the __date lookup casts the column, so the index can't be searched by the range."""
+        plans = self.get_query_plans(
+            lambda: list(Appointment.objects.filter(specialist=self.specialist, start_time__date=self.day)),
+            "api_appointment",
+        )
+
+        self.assertFalse(any(re.search(r"start_time\s*>", plan) for plan in plans), plans)
+
+
+class AppointmentArchiveTest(APITestCase):
+    """Class AppointmentArchiveTest for testing the appointments archive and the history spanning both tables."""
+
+    def setUp(self):
+        """This method adds past and future appointments of one location."""
+        self.location = LocationFactory()
+        now = timezone.now().replace(second=0, microsecond=0)
+        self.past = [
+            AppointmentFactory(location=self.location, start_time=now - timedelta(days=days), customer_email=email)
+            for days, email in ((60, "old@example.com"), (40, "older@example.com"))
+        ]
+        self.recent = AppointmentFactory(
+            location=self.location, start_time=now - timedelta(days=2), customer_email="recent@example.com"
+        )
+        self.future = AppointmentFactory(location=self.location, customer_email="future@example.com")
+        self.client.force_authenticate(AdminFactory())
+
+    def tearDown(self):
+        """This method deletes all users and cleans avatars' data."""
+        CustomUser.objects.all().delete()
+
+    def test_archive_appointments(self):
+        """Test appointments finished before the cutoff are moved with their ids and timestamps by batches."""
+        archived = archive_appointments(get_archive_cutoff(30), batch_size=1)
+
+        self.assertEqual(archived, 2)
+        self.assertEqual(
+            set(Appointment.objects.values_list("id", flat=True)), {self.recent.id, self.future.id}
+        )
+        archived_appointment = ArchivedAppointment.objects.get(id=self.past[0].id)
+        self.assertEqual(archived_appointment.created_at, self.past[0].created_at)
+        self.assertEqual(archived_appointment.customer_email, "old@example.com")
+        self.assertEqual(archive_appointments(get_archive_cutoff(30)), 0)
+
+    def test_archive_skips_deletion_signals(self):
+        """Test archived appointments are deleted with one query without feed events or cache invalidation."""
+        events_count = ScheduleEvent.objects.count()
+
+        with mock.patch("api.signals.transaction.on_commit") as on_commit, CaptureQueriesContext(connection) as queries:
+            archive_appointments(get_archive_cutoff(30))
+
+        self.assertEqual(ScheduleEvent.objects.count(), events_count)
+        on_commit.assert_not_called()
+        self.assertEqual(len([query for query in queries if query["sql"].startswith("DELETE")]), 1)
+
+    def test_archive_conflict_keeps_appointments(self):
+        """Test a batch with an already archived id is rolled back and its appointments are kept."""
+        ArchivedAppointment.objects.create(
+            **{field: getattr(self.past[0], field) for field in ArchivedAppointment.ARCHIVED_FIELDS},
+        )
+
+        with self.assertRaises(IntegrityError):
+            archive_appointments(get_archive_cutoff(30))
+
+        self.assertEqual(Appointment.objects.filter(id__in=[a.id for a in self.past]).count(), 2)
+
+    def test_archive_command(self):
+        """Test command archives appointments finished the given count of days ago."""
+        call_command("archiveappointments", "--days", "1", stdout=mock.MagicMock())
+
+        self.assertEqual(ArchivedAppointment.objects.count(), 3)
+        self.assertEqual(list(Appointment.objects.values_list("id", flat=True)), [self.future.id])
+
+    def test_history_spans_both_tables(self):
+        """Test history lists live and archived appointments from the latest ones and filters both tables."""
+        archive_appointments(get_archive_cutoff(30))
+        url = reverse("api:appointments-history")
+
+        response = self.client.get(url, {"location": self.location.id})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["count"], 4)
+        self.assertEqual(
+            [(a["customer_email"], a["is_archived"]) for a in response.data["results"]],
+            [
+                ("future@example.com", False),
+                ("recent@example.com", False),
+                ("older@example.com", True),
+                ("old@example.com", True),
+            ],
+        )
+        self.assertEqual(response.data["results"][0]["location"], self.location.name)
+
+        response = self.client.get(url, {"customer_email": "old@example.com"})
+        self.assertEqual([a["id"] for a in response.data["results"]], [self.past[0].id])
+
+    def test_archived_appointment_detail(self):
+        """Test archived appointment is found for reading only."""
+        archive_appointments(get_archive_cutoff(30))
+        url = reverse("api:appointment-detail", args=(self.past[0].id,))
+
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["customer_email"], "old@example.com")
+        self.assertEqual(self.client.delete(url).status_code, status.HTTP_404_NOT_FOUND)
+
+
+class CompletePastAppointmentsTest(TestCase):
+    """Class CompletePastAppointmentsTest for testing the bulk completion of finished appointments."""
+
+    def setUp(self):
+        """This method adds finished, ongoing and future appointments of one location."""
+        location = LocationFactory()
+        self.now = timezone.now().replace(second=0, microsecond=0)
+        self.finished = [
+            AppointmentFactory(location=location, start_time=self.now - timedelta(days=1, hours=hours))
+            for hours in range(3)
+        ]
+        self.ongoing = AppointmentFactory(location=location, start_time=self.now - timedelta(minutes=10))
+        self.future = AppointmentFactory(location=location)
+
+    def tearDown(self):
+        """This method deletes all users and cleans avatars' data."""
+        CustomUser.objects.all().delete()
+
+    def test_complete_past_appointments(self):
+        """Test only finished active appointments are completed by batches."""
+        self.finished[0].mark_as_completed()
+
+        self.assertEqual(complete_past_appointments(self.now, batch_size=1), 2)
+        self.assertFalse(Appointment.objects.filter(id__in=[a.id for a in self.finished], is_active=True).exists())
+        self.assertEqual(
+            set(Appointment.objects.filter(is_active=True).values_list("id", flat=True)),
+            {self.ongoing.id, self.future.id},
+        )
+        self.assertEqual(complete_past_appointments(self.now, batch_size=1), 0)
+
+    def test_command_reports_rate(self):
+        """Test command completes appointments and reports rows per second."""
+        stdout = mock.MagicMock()
+        call_command("completeappointments", "--batch-size", "2", stdout=stdout)
+
+        self.assertEqual(Appointment.objects.filter(is_active=True).count(), 2)
+        self.assertIn("rows/s", stdout.write.call_args.args[0])
+
+    @mock.patch("api.management.commands.completeappointments.database_lock")
+    def test_command_skips_when_locked(self, database_lock):
+        """Test command does nothing while another process holds the lock."""
+        database_lock.return_value.__enter__.return_value = False
+        call_command("completeappointments", stdout=mock.MagicMock())
+
+        self.assertEqual(Appointment.objects.filter(is_active=True).count(), 5)
+
+
+class AppointmentExportViewTest(APITestCase):
+    """Class AppointmentExportViewTest for testing streaming exports of appointments."""
+
+    def setUp(self):
+        """This method adds appointments of two locations."""
+        self.location = LocationFactory()
+        start_time = timezone.now().replace(second=0, microsecond=0) + timedelta(days=1)
+        self.appointments = [
+            AppointmentFactory(location=self.location, start_time=start_time + timedelta(hours=hours))
+            for hours in range(3)
+        ]
+        AppointmentFactory()
+        self.client.force_authenticate(AdminFactory())
+
+    def tearDown(self):
+        """This method deletes all users and cleans avatars' data."""
+        CustomUser.objects.all().delete()
+
+    def get_content(self, export_format, params=None):
+        """Get content of the streamed export."""
+        response = self.client.get(reverse("api:appointments-export", args=(export_format,)), params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        return b"".join(response.streaming_content).decode()
+
+    def test_export_ndjson_with_related_names(self):
+        """Test filtered appointments are exported as flat rows with specialist and location names."""
+        lines = self.get_content("ndjson", {"location": self.location.id}).splitlines()
+
+        rows = [json.loads(line) for line in lines]
+        self.assertEqual([row["id"] for row in rows], [a.id for a in self.appointments])
+        specialist = self.appointments[0].specialist
+        self.assertEqual(rows[0]["specialist"], f"{specialist.first_name} {specialist.last_name}")
+        self.assertEqual(rows[0]["location"], self.location.name)
+
+    def test_export_csv(self):
+        """Test CSV export starts with the header and has a line per appointment."""
+        lines = self.get_content("csv").splitlines()
+
+        self.assertEqual(lines[0].split(",")[:3], ["id", "is_active", "start_time"])
+        self.assertEqual(len(lines), 5)
+
+    def test_export_unknown_format(self):
+        """Test export in an unknown format is not found."""
+        response = self.client.get(reverse("api:appointments-export", args=("xml",)))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_export_reads_rows_by_chunks(self):
+        """Test export reads rows from the database by chunks."""
+        with self.settings(EXPORT_CHUNK_SIZE=2), mock.patch(
+            "django.db.models.query.QuerySet.iterator", autospec=True, side_effect=lambda qs, chunk_size: iter([])
+        ) as iterator:
+            self.get_content("csv")
+        self.assertEqual(iterator.call_args.kwargs["chunk_size"], 2)
+
+
+class AppointmentImportTest(APITestCase):
+    """Class AppointmentImportTest for testing streaming imports of appointments from CSV files."""
+
+    def setUp(self):
+        """This method adds a specialist and a location working all days and the CSV file."""
+        specialist = SpecialistScheduleFactory(
+            working_time=generate_working_time_intervals("09:00", "20:00")
+        ).specialist
+        location = LocationFactory(working_time=generate_working_time("09:00", "20:00"))
+        day = (datetime.now() + timedelta(days=1)).date().isoformat()
+        rows = [
+            ("12:00", "00:30:00"),
+            ("12:15", "00:30:00"),
+            ("13:00", "00:07:00"),
+            ("14:00", "01:00:00"),
+            ("12:20", "00:10:00"),
+        ]
+        self.csv = "specialist,location,start_time,duration,customer_firstname,customer_lastname,customer_email\n"
+        self.csv += "".join(
+            f"{specialist.id},{location.id},{day}T{start}:00+02:00,{duration},Ann,Lee,ann{line}@example.com\n"
+            for line, (start, duration) in enumerate(rows, 2)
+        )
+        self.client.force_authenticate(AdminFactory())
+
+    def tearDown(self):
+        """This method deletes all users and cleans avatars' data."""
+        CustomUser.objects.all().delete()
+
+    def test_import_appointments_by_batches(self):
+        """Test rows are checked within batches and against previous batches, errors are kept by line numbers."""
+        results = list(import_appointments(io.StringIO(self.csv), AppointmentBatchItemSerializer, batch_size=2))
+
+        self.assertEqual(len(results), 3)
+        self.assertEqual(sum(created for created, _ in results), 2)
+        errors = {line: error for _, batch_errors in results for line, error in batch_errors.items()}
+        self.assertEqual(sorted(errors), [3, 4, 6])
+        self.assertIn("duration", errors[4])
+        self.assertEqual(errors[6]["start_time"], ["Appointments have already created for this datetime."])
+        self.assertEqual(
+            sorted(Appointment.objects.values_list("customer_email", flat=True)),
+            ["ann2@example.com", "ann5@example.com"],
+        )
+
+    def test_import_missing_columns(self):
+        """Test file without required columns is rejected before reading rows."""
+        with self.assertRaises(ValidationError):
+            list(import_appointments(io.StringIO("specialist,location\n1,1\n"), AppointmentBatchItemSerializer))
+
+    def test_import_malformed_and_undecodable_lines(self):
+        """Test malformed CSV lines are reported and undecodable text stops reading without losing created rows."""
+        lines = self.csv.splitlines(keepends=True)
+        content = "".join(lines[:2]) + "1,1," + "x" * 200000 + "\n" + lines[2]
+        upload = SimpleUploadedFile(
+            "appointments.csv", content.encode() + b"\xff\xfe\n" + "".join(lines[3:]).encode(), content_type="text/csv"
+        )
+
+        response = self.client.post(reverse("api:appointments-import"), {"file": upload}, format="multipart")
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data["created"], 1)
+        self.assertEqual([error["line"] for error in response.data["errors"]], [3, 4, 5])
+        self.assertIn("Malformed CSV", response.data["errors"][0]["errors"]["file"][0])
+        self.assertIn("can't be decoded", response.data["errors"][2]["errors"]["file"][0])
+
+    def test_import_constraint_violation_rejects_row(self):
+        """Test rows rejected by the overlap constraints after the checks become errors of their lines."""
+        with mock.patch("api.services.appointment_services.find_appointments_overlaps", return_value={}):
+            results = list(import_appointments(io.StringIO(self.csv), AppointmentBatchItemSerializer))
+
+        created, errors = results[0]
+        self.assertEqual(created, 2)
+        self.assertEqual(errors[6]["start_time"], ["Appointments have already created for this datetime."])
+
+    def test_import_endpoint(self):
+        """Test uploaded file is imported with the errors report."""
+        upload = SimpleUploadedFile("appointments.csv", self.csv.encode(), content_type="text/csv")
+
+        response = self.client.post(reverse("api:appointments-import"), {"file": upload}, format="multipart")
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data["created"], 2)
+        self.assertEqual([error["line"] for error in response.data["errors"]], [3, 4, 6])
+
+    def test_import_command(self):
+        """Test command imports the file and writes rejected rows to the report."""
+        with tempfile.TemporaryDirectory() as directory:
+            path, report_path = f"{directory}/appointments.csv", f"{directory}/errors.ndjson"
+            with open(path, "w") as file:
+                file.write(self.csv)
+
+            call_command("importappointments", path, "--report", report_path, stdout=mock.MagicMock())
+
+            with open(report_path) as report:
+                self.assertEqual([json.loads(line)["line"] for line in report], [3, 4, 6])
+        self.assertEqual(Appointment.objects.count(), 2)
@@ -1,5 +1,7 @@
 """The module includes tests for CustomUser models, serializers and views."""
 
+import csv
+import io
 import math
 
 from api.factories import factories, fake_data
@@ -222,6 +224,32 @@ class CustomUserViewTest(APITestCase):
         self.assertEqual(response.data["count"], 20)
         self.assertIsNone(response.data["next"])
 
+    def test_specialists_cursor_pagination(self):
+        """Test specialists keyset pagination walks all specialists ordered by email without counting them."""
+        emails = sorted(specialist.email for specialist in factories.SpecialistFactory.create_batch(5))
+        url = f"{reverse(self.get_specialists_url_name)}?pagination=cursor&page_size=2"
+
+        walked_emails = []
+        while url:
+            with self.assertNumQueries(1):
+                response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertNotIn("count", response.data)
+            walked_emails.extend(specialist["email"] for specialist in response.data["results"])
+            url = response.data["next"]
+
+        self.assertEqual(walked_emails, emails)
+
+    def test_specialists_approximate_count(self):
+        """Test approximate count is requested explicitly and small lists are counted exactly."""
+        factories.SpecialistFactory.create_batch(3)
+
+        response = self.client.get(f"{reverse(self.get_specialists_url_name)}?count=approximate")
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["count"], 3)
+        self.assertFalse(response.data["count_is_approximate"])
+
     def test_specialists_date_schedule_filter(self):
         """Test for filtering specialists by a specific working date."""
         filter_date = fake_data.get_future_datetime(start=1, end=2, force_minute=30).fuzz()
@@ -303,3 +331,36 @@ class CustomUserViewTest(APITestCase):
         self.client.force_authenticate(factories.SuperuserFactory())
         response = self.client.post(reverse(self.get_specialists_url_name), self.specialist_data, format="json")
         self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+    def test_create_specialists_idempotency_key(self):
+        """Test for repeated specialist creation with the same idempotency key."""
+        self.client.force_authenticate(factories.ManagerFactory())
+        url = reverse(self.get_specialists_url_name)
+
+        response = self.client.post(url, self.specialist_data, format="json", HTTP_IDEMPOTENCY_KEY="key-1")
+        replayed_response = self.client.post(url, self.specialist_data, format="json", HTTP_IDEMPOTENCY_KEY="key-1")
+
+        self.assertEqual(replayed_response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(replayed_response.json(), response.json())
+        self.assertEqual(replayed_response.headers["Idempotent-Replayed"], "true")
+        self.assertEqual(CustomUser.specialists.filter(email=self.specialist_data["email"]).count(), 1)
+
+    def test_export_specialists_csv(self):
+        """Test for streaming specialists as CSV by manager."""
+        specialists = factories.SpecialistFactory.create_batch(3)
+        self.client.force_authenticate(factories.ManagerFactory())
+
+        response = self.client.get(reverse("api:specialists-export", args=("csv",)))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        self.assertEqual(response["Content-Disposition"], 'attachment; filename="specialists.csv"')
+        rows = list(csv.DictReader(io.StringIO(b"".join(response.streaming_content).decode())))
+        self.assertEqual([row["email"] for row in rows], sorted(s.email for s in specialists))
+        self.assertEqual(rows[0]["position"], min(specialists, key=lambda s: s.email).position)
+
+    def test_export_specialists_by_specialist_fail(self):
+        """Test for exporting specialists by specialist."""
+        self.client.force_authenticate(factories.SpecialistFactory())
+        response = self.client.get(reverse("api:specialists-export", args=("csv",)))
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
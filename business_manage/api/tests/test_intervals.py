@@ -0,0 +1,130 @@
+"""The module includes property tests of the interval algebra against sets of minutes."""
+
+import random
+from datetime import date, datetime, timedelta
+
+from django.test import SimpleTestCase
+from django.utils.timezone import make_aware
+from rest_framework.exceptions import ValidationError
+
+from ..services import intervals
+from ..validators import validate_working_time_values
+
+RUNS = 500
+
+
+def to_minutes(interval_list: list[intervals.Interval]) -> set[int]:
+    """Brute-force oracle, every interval is expanded to the set of its minutes."""
+    return {minute for start, end in interval_list for minute in range(start, end)}
+
+
+def from_minutes(minutes: set[int]) -> list[intervals.Interval]:
+    """Get the normalized list of intervals of the set of minutes."""
+    result = []
+    for minute in sorted(minutes):
+        if result and result[-1][1] == minute:
+            result[-1] = (result[-1][0], minute + 1)
+        else:
+            result.append((minute, minute + 1))
+    return result
+
+
+class IntervalsPropertyTest(SimpleTestCase):
+    """Class IntervalsPropertyTest compares every operation with the same operation on sets of minutes.
+
+    Intervals are generated randomly with a fixed seed, they may be empty, overlap or touch each other.
+    """
+
+    def setUp(self):
+        """This method creates the seeded random generator."""
+        self.random = random.Random(2023)
+
+    def generate(self, max_count: int = 8, bound: int = 120) -> list[intervals.Interval]:
+        """Generate unsorted intervals inside [0, bound], narrow bounds make overlaps and adjacency frequent."""
+        result = []
+        for _ in range(self.random.randint(0, max_count)):
+            start = self.random.randint(0, bound)
+            result.append((start, min(bound, start + self.random.randint(0, bound // 4))))
+        return result
+
+    def generate_pairs(self):
+        """Generate pairs of random normalized lists."""
+        for _ in range(RUNS):
+            yield intervals.normalize(self.generate()), intervals.normalize(self.generate())
+
+    def test_normalize(self):
+        """Test normalized list is canonical: sorted, not empty, not touching and with the same minutes."""
+        for _ in range(RUNS):
+            raw = self.generate()
+            normalized = intervals.normalize(raw)
+            self.assertEqual(normalized, from_minutes(to_minutes(raw)), raw)
+            self.assertEqual(intervals.normalize(normalized), normalized)
+
+    def test_union(self):
+        """Test union."""
+        for first, second in self.generate_pairs():
+            self.assertEqual(intervals.union(first, second), from_minutes(to_minutes(first) | to_minutes(second)))
+
+    def test_intersection(self):
+        """Test intersection."""
+        for first, second in self.generate_pairs():
+            self.assertEqual(
+                intervals.intersection(first, second), from_minutes(to_minutes(first) & to_minutes(second))
+            )
+
+    def test_subtract(self):
+        """Test subtraction."""
+        for first, second in self.generate_pairs():
+            self.assertEqual(intervals.subtract(first, second), from_minutes(to_minutes(first) - to_minutes(second)))
+
+    def test_contains(self):
+        """Test containment, every list contains its intersection with another one."""
+        for first, second in self.generate_pairs():
+            self.assertEqual(intervals.contains(first, second), to_minutes(second) <= to_minutes(first))
+            self.assertTrue(intervals.contains(first, intervals.intersection(first, second)))
+
+    def test_has_overlaps(self):
+        """Test overlaps are found only if some minute belongs to two intervals."""
+        for _ in range(RUNS):
+            raw = [interval for interval in self.generate() if interval[0] < interval[1]]
+            self.assertEqual(intervals.has_overlaps(raw), len(to_minutes(raw)) < sum(e - s for s, e in raw), raw)
+
+    def test_find_gaps(self):
+        """Test gaps are free runs inside the bounding interval which are long enough."""
+        for first, _ in self.generate_pairs():
+            within = (self.random.randint(0, 60), self.random.randint(60, 120))
+            min_length = self.random.randint(1, 20)
+            free = from_minutes(to_minutes([within]) - to_minutes(first))
+            self.assertEqual(
+                intervals.find_gaps(first, within, min_length), [g for g in free if g[1] - g[0] >= min_length]
+            )
+
+
+class IntervalsTest(SimpleTestCase):
+    """Class IntervalsTest for testing conversions of the interval algebra."""
+
+    def test_string_intervals(self):
+        """Test HH:MM intervals round trip, 24:00 is the end of the day."""
+        string_intervals = [["09:05", "13:00"], ["20:00", "24:00"]]
+        self.assertEqual(intervals.from_string_intervals(string_intervals), [(545, 780), (1200, 1440)])
+        self.assertEqual(intervals.to_string_intervals([(545, 780), (1200, 1440)]), string_intervals)
+
+    def test_datetime_interval(self):
+        """Test aware interval is clipped to the local day and rounded to whole minutes."""
+        day = date(2030, 1, 7)
+        start_time = make_aware(datetime(2030, 1, 7, 23, 0, 30))
+        end_time = start_time + timedelta(hours=2)
+
+        self.assertEqual(intervals.from_datetime_interval(start_time, end_time, day), [(1380, 1440)])
+        self.assertEqual(intervals.from_datetime_interval(start_time, end_time, day + timedelta(days=1)), [(0, 61)])
+        self.assertEqual(intervals.from_datetime_interval(start_time, end_time, day - timedelta(days=1)), [])
+        self.assertEqual(
+            intervals.to_datetime_interval((1380, 1440), day),
+            (make_aware(datetime(2030, 1, 7, 23)), make_aware(datetime(2030, 1, 8))),
+        )
+
+    def test_validate_working_time_values(self):
+        """Test adjacent working intervals are valid and overlapping ones are not in any order."""
+        validate_working_time_values({"Mon": [["14:00", "18:00"], ["10:00", "14:00"]]})
+        with self.assertRaises(ValidationError):
+            validate_working_time_values({"Mon": [["14:00", "18:00"], ["10:00", "12:00"], ["11:00", "12:30"]]})
@@ -1,14 +1,22 @@
 """The module includes tests for Location model, serializers and views."""
 
+from datetime import datetime, timedelta
+
 from api.factories.factories import (
     AdminFactory,
+    AppointmentFactory,
+    CustomUserFactory,
     LocationFactory,
     ManagerFactory,
     SpecialistFactory,
+    SpecialistScheduleFactory,
     SuperuserFactory,
 )
+from django.contrib.auth.models import update_last_login
+from django.core.cache import cache
 from django.db import IntegrityError
 from django.test import TestCase
+from django.utils.timezone import get_current_timezone
 from rest_framework import status
 from rest_framework.exceptions import ErrorDetail, ValidationError
 from rest_framework.reverse import reverse
@@ -16,6 +24,7 @@ from rest_framework.test import APITestCase
 
 from ..models import CustomUser, Location
 from ..serializers.location_serializers import LocationSerializer
+from ..utils import generate_working_time, generate_working_time_intervals, string_to_time
 
 
 class LocationModelTest(TestCase):
@@ -234,3 +243,92 @@ class LocationViewTest(APITestCase):
         self.client.force_authenticate(SuperuserFactory())
         response = self.client.post(reverse(self.location_create_url), self.valid_data, format="json")
         self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+
+class LocationBoardViewTest(APITestCase):
+    """Class LocationBoardViewTest for testing boards of specialists working at a location."""
+
+    def setUp(self):
+        """This method adds two working specialists, one day off specialist and two locations."""
+        cache.clear()
+        self.location = LocationFactory(working_time=generate_working_time("09:00", "18:00"))
+        self.other_location = LocationFactory(working_time=generate_working_time("09:00", "18:00"))
+        self.day = datetime.now().date() + timedelta(days=1)
+        self.specialists = [
+            SpecialistScheduleFactory(
+                specialist__last_name=last_name, working_time=generate_working_time_intervals("10:00", "20:00")
+            ).specialist
+            for last_name in ("Adams", "Brown")
+        ]
+        day_off = {day: [] for day in generate_working_time_intervals("10:00", "20:00")}
+        SpecialistScheduleFactory(working_time=day_off)
+        self.url = reverse("api:location-board", kwargs={"pk": self.location.id, "a_date": self.day})
+
+    def tearDown(self):
+        """This method deletes all users and cleans avatars' data."""
+        CustomUser.objects.all().delete()
+
+    def book(self, specialist, location, start, end):
+        """Create an appointment committing the transaction callbacks."""
+        start_time = datetime.combine(self.day, string_to_time(start), tzinfo=get_current_timezone())
+        with self.captureOnCommitCallbacks(execute=True):
+            return AppointmentFactory(
+                specialist=specialist,
+                location=location,
+                start_time=start_time,
+                duration=datetime.combine(self.day, string_to_time(end)) - start_time.replace(tzinfo=None),
+            )
+
+    def test_location_board(self):
+        """Test board shows working specialists, appointments at the location and free time of both."""
+        self.book(self.specialists[0], self.location, "11:00", "12:00")
+        self.book(self.specialists[1], self.other_location, "13:00", "14:00")
+
+        with self.assertNumQueries(4):
+            response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        board = response.data["specialists"]
+        self.assertEqual([row["specialist"] for row in board], [s.id for s in self.specialists])
+        self.assertEqual(board[0]["appointments_intervals"], [["11:00", "12:00"]])
+        self.assertEqual(board[0]["free_intervals"], [["10:00", "11:00"], ["12:00", "18:00"]])
+        self.assertEqual(board[1]["appointments_intervals"], [])
+        self.assertEqual(board[1]["free_intervals"], [["10:00", "11:00"], ["12:00", "13:00"], ["14:00", "18:00"]])
+
+    def test_cached_board_invalidation(self):
+        """Test board is cached until an appointment of the day at any location is changed."""
+        self.client.get(self.url)
+        with self.assertNumQueries(1):
+            self.client.get(self.url)
+
+        self.book(self.specialists[1], self.other_location, "13:00", "14:00")
+        response = self.client.get(self.url)
+        self.assertEqual(response.data["specialists"][1]["free_intervals"][1], ["14:00", "18:00"])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.specialists[0].schedule.delete()
+        response = self.client.get(self.url)
+        self.assertEqual(len(response.data["specialists"]), 1)
+
+    def test_board_kept_after_logins_and_other_users_changes(self):
+        """Test logins and changes of users who aren't specialists don't drop cached boards, names of specialists do."""
+        self.client.get(self.url)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            update_last_login(None, self.specialists[0])
+            CustomUserFactory().save()
+        with self.assertNumQueries(1):
+            self.client.get(self.url)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.specialists[0].first_name = "Clark"
+            self.specialists[0].save()
+        self.assertIn("Clark", self.client.get(self.url).data["specialists"][0]["specialist_name"])
+
+    def test_board_position_filter(self):
+        """Test board is filtered by the specialist position."""
+        response = self.client.get(self.url, {"position": self.specialists[0].position})
+        self.assertIn(self.specialists[0].id, [row["specialist"] for row in response.data["specialists"]])
+
+        response = self.client.get(self.url, {"position": "unknown"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,64 @@
+"""The module includes query budget tests for list and detail endpoints."""
+
+from api.factories.factories import (
+    AppointmentFactory,
+    AppointmentSeriesFactory,
+    LocationFactory,
+    SpecialistFactory,
+    SpecialistScheduleFactory,
+)
+from rest_framework.reverse import reverse
+from rest_framework.test import APITestCase
+
+from ..models import CustomUser
+from .query_budget import QueryBudgetMixin
+
+
+class QueryBudgetTest(QueryBudgetMixin, APITestCase):
+    """Class QueryBudgetTest checks that endpoints load related objects with a constant count of queries."""
+
+    def tearDown(self):
+        """This method deletes all users and cleans avatars' data."""
+        CustomUser.objects.all().delete()
+
+    def test_specialists_list(self):
+        """Test specialists list."""
+        self.assert_list_query_budget(
+            reverse("api:specialists-list-create"), lambda count: SpecialistFactory.create_batch(count), 2
+        )
+
+    def test_locations_list(self):
+        """Test locations list."""
+        self.assert_list_query_budget(
+            reverse("api:locations-list-create"), lambda count: LocationFactory.create_batch(count), 2
+        )
+
+    def test_appointments_list(self):
+        """Test appointments list with specialists and locations."""
+        self.assert_list_query_budget(
+            reverse("api:appointments-list-create"), lambda count: AppointmentFactory.create_batch(count), 2
+        )
+
+    def test_appointment_series_list(self):
+        """Test appointment series list with specialists and locations."""
+        self.assert_list_query_budget(
+            reverse("api:appointment-series-list-create"),
+            lambda count: AppointmentSeriesFactory.create_batch(count),
+            2,
+        )
+
+    def test_schedules_list(self):
+        """Test schedules list with specialists, the serializer also loads specialist choices once."""
+        self.assert_list_query_budget(
+            reverse("api:schedules-list-create"), lambda count: SpecialistScheduleFactory.create_batch(count), 3
+        )
+
+    def test_detail_endpoints(self):
+        """Test detail endpoints load related objects with joins or one prefetch."""
+        appointment = AppointmentFactory()
+        series = AppointmentSeriesFactory()
+
+        self.assert_detail_query_budget(reverse("api:Specialist-detail", args=(appointment.specialist.id,)), 2)
+        self.assert_detail_query_budget(reverse("api:specialist-schedule", args=(appointment.specialist.id,)), 1)
+        self.assert_detail_query_budget(reverse("api:appointment-detail", args=(appointment.id,)), 1)
+        self.assert_detail_query_budget(reverse("api:appointment-series-detail", args=(series.id,)), 1)
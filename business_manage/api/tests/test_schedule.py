@@ -1,24 +1,42 @@
 """The module includes tests for Schedule model, serializers and views."""
 
+import asyncio
+import io
+import itertools
+import json
+import time
 from datetime import datetime, timedelta
+from unittest import mock
 
 from api.factories.factories import (
     AppointmentFactory,
     CustomUserFactory,
+    LocationFactory,
     SpecialistFactory,
     SpecialistScheduleFactory,
 )
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management import call_command
 from django.db import IntegrityError
-from django.test import TestCase
+from django.db.models import F
+from django.test import TestCase, override_settings
+from django.utils.timezone import get_current_timezone
 from rest_framework import status
 from rest_framework.exceptions import ErrorDetail, ValidationError
 from rest_framework.reverse import reverse
 from rest_framework.test import APITestCase
 
-from ..models import CustomUser
+from ..models import Appointment, CustomUser, ScheduleEvent, WorkingInterval
 from ..serializers.schedule_serializers import SpecialistScheduleSerializer
-from ..services.schedule_services import get_working_day
-from ..utils import generate_working_time_intervals, time_to_string
+from ..services import schedule_cache
+from ..services.event_services import event_feed_watcher, get_events, get_latest_event_id
+from ..services.event_watcher import EventFeedWatcher
+from ..services.schedule_services import get_free_time_intervals, get_working_day
+from ..streams import schedule_events_stream
+from ..utils import generate_working_time, generate_working_time_intervals, string_to_time, time_to_string
+from .query_budget import QueryPlanMixin
 
 
 class SpecialistScheduleModelTest(TestCase):
@@ -196,6 +214,7 @@ class SpecialistScheduleViewTest(APITestCase):
         """This method adds needed info for tests."""
         self.working_time = generate_working_time_intervals("10:00", "20:00")
         self.spec_schedule_date_url = "api:specialist-schedule-date"
+        cache.clear()
 
     def tearDown(self):
         """This method deletes all users and cleans avatars' data."""
@@ -265,3 +284,485 @@ class SpecialistScheduleViewTest(APITestCase):
         )
         self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
         self.assertEqual(response.data, {"detail": f"{specialist.get_full_name()} is not working on this day."})
+
+
+class DayScheduleCacheTest(APITestCase):
+    """Class DayScheduleCacheTest for testing cached specialists' day schedules."""
+
+    def setUp(self):
+        """This method adds needed info for tests."""
+        cache.clear()
+        self.schedule = SpecialistScheduleFactory(working_time=generate_working_time_intervals("10:00", "20:00"))
+        self.specialist = self.schedule.specialist
+        self.day = datetime.now().date() + timedelta(days=1)
+        self.url = reverse("api:specialist-schedule-date", kwargs={"s_id": self.specialist.id, "a_date": self.day})
+
+    def tearDown(self):
+        """This method deletes all users and cleans avatars' data."""
+        CustomUser.objects.all().delete()
+
+    def book(self, start, minutes=30):
+        """Create an appointment of the specialist committing the transaction callbacks."""
+        with self.captureOnCommitCallbacks(execute=True):
+            return AppointmentFactory(
+                specialist=self.specialist,
+                start_time=datetime.combine(self.day, string_to_time(start), tzinfo=get_current_timezone()),
+                duration=timedelta(minutes=minutes),
+            )
+
+    def test_cached_day_schedule(self):
+        """Test the day schedule is computed once."""
+        response = self.client.get(self.url)
+
+        with self.assertNumQueries(1):
+            cached_response = self.client.get(self.url)
+
+        self.assertEqual(response.json(), cached_response.json())
+
+    def test_day_is_local_date(self):
+        """Test the date of the url is the local business date, appointments after the local midnight belong to it."""
+        self.book("00:30")
+        previous_day_url = reverse(
+            "api:specialist-schedule-date", kwargs={"s_id": self.specialist.id, "a_date": self.day - timedelta(days=1)}
+        )
+
+        self.assertEqual(self.client.get(self.url).json()["appointments_intervals"], [["00:30", "01:00"]])
+        self.assertEqual(self.client.get(previous_day_url).json()["appointments_intervals"], [])
+
+    def test_new_appointment_invalidates_day(self):
+        """Test a new appointment drops the cached day, which is computed again."""
+        self.client.get(self.url)
+        self.book("12:00")
+
+        with self.assertNumQueries(3):
+            response = self.client.get(self.url)
+
+        self.assertEqual(
+            response.json(),
+            {
+                "appointments_intervals": [["12:00", "12:30"]],
+                "free_intervals": [["10:00", "12:00"], ["12:30", "20:00"]],
+            },
+        )
+
+    def test_schedule_computed_before_booking_is_not_served(self):
+        """Test a schedule computed before a concurrent booking is committed isn't read after the commit."""
+        get_intervals = schedule_cache.get_appointments_time_intervals
+
+        def get_intervals_and_book(*args):
+            appointments_intervals = get_intervals(*args)
+            self.book("12:00")
+            return appointments_intervals
+
+        with mock.patch.object(schedule_cache, "get_appointments_time_intervals", side_effect=get_intervals_and_book):
+            self.assertEqual(self.client.get(self.url).json()["appointments_intervals"], [])
+
+        self.assertEqual(self.client.get(self.url).json()["appointments_intervals"], [["12:00", "12:30"]])
+
+    def test_deleted_and_moved_appointments_invalidate_day(self):
+        """Test deleting or moving an appointment drops the cached day."""
+        appointment = self.book("12:00")
+        self.book("15:00")
+        self.client.get(self.url)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            appointment.delete()
+        self.assertEqual(self.client.get(self.url).json()["appointments_intervals"], [["15:00", "15:30"]])
+
+        appointment = Appointment.objects.get(specialist=self.specialist)
+        with self.captureOnCommitCallbacks(execute=True):
+            appointment.start_time += timedelta(days=1)
+            appointment.save()
+        self.assertEqual(self.client.get(self.url).json()["appointments_intervals"], [])
+
+    def test_schedule_update_invalidates_all_days(self):
+        """Test changing the specialist schedule drops cached days."""
+        self.client.get(self.url)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.schedule.working_time = generate_working_time_intervals("09:00", "12:00")
+            self.schedule.save()
+
+        self.assertEqual(self.client.get(self.url).json()["free_intervals"], [["09:00", "12:00"]])
+
+
+class SpecialistDateRangeScheduleViewTest(APITestCase):
+    """Class SpecialistDateRangeScheduleViewTest for testing schedules of a specialist for a period."""
+
+    def setUp(self):
+        """This method adds needed info for tests."""
+        cache.clear()
+        self.schedule = SpecialistScheduleFactory(working_time=generate_working_time_intervals("10:00", "20:00"))
+        self.specialist = self.schedule.specialist
+        self.day = datetime.now().date() + timedelta(days=1)
+
+    def tearDown(self):
+        """This method deletes all users and cleans avatars' data."""
+        CustomUser.objects.all().delete()
+
+    def get_url(self, from_date, to_date):
+        """Get url of the specialist schedule for the period."""
+        return reverse(
+            "api:specialist-schedule-range",
+            kwargs={"s_id": self.specialist.id, "from_date": from_date, "to_date": to_date},
+        )
+
+    def book(self, day, start):
+        """Create an appointment of the specialist."""
+        return AppointmentFactory(
+            specialist=self.specialist,
+            start_time=datetime.combine(day, string_to_time(start), tzinfo=get_current_timezone()),
+            duration=timedelta(minutes=30),
+        )
+
+    def test_week_schedule(self):
+        """Test every day of the week has the same schedule as the day schedule view."""
+        self.book(self.day, "12:00")
+        self.book(self.day + timedelta(days=2), "15:00")
+        to_date = self.day + timedelta(days=6)
+
+        with self.assertNumQueries(3):
+            response = self.client.get(self.get_url(self.day, to_date))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([day["date"] for day in response.data], [self.day + timedelta(days=d) for d in range(7)])
+        self.assertEqual(response.data[0]["appointments_intervals"], [["12:00", "12:30"]])
+        self.assertEqual(response.data[1]["appointments_intervals"], [])
+        cache.clear()
+        for day_schedule in response.data:
+            day_url = reverse(
+                "api:specialist-schedule-date", kwargs={"s_id": self.specialist.id, "a_date": day_schedule["date"]}
+            )
+            self.assertEqual(
+                self.client.get(day_url).data,
+                {key: day_schedule[key] for key in ("appointments_intervals", "free_intervals")},
+            )
+
+    def test_week_schedule_uses_cached_days(self):
+        """Test days cached by the day schedule view are not queried again."""
+        day_url = reverse("api:specialist-schedule-date", kwargs={"s_id": self.specialist.id, "a_date": self.day})
+        self.client.get(day_url)
+
+        with self.assertNumQueries(1):
+            response = self.client.get(self.get_url(self.day, self.day))
+        self.assertEqual(response.data[0]["free_intervals"], [["10:00", "20:00"]])
+
+    def test_period_limits(self):
+        """Test past, reversed and too long periods are rejected."""
+        yesterday = self.day - timedelta(days=2)
+        for from_date, to_date in (
+            (yesterday, self.day),
+            (self.day, yesterday),
+            (self.day, self.day + timedelta(days=31)),
+        ):
+            response = self.client.get(self.get_url(from_date, to_date))
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class AvailabilityMatrixViewTest(APITestCase):
+    """Class AvailabilityMatrixViewTest for testing free intervals of many specialists."""
+
+    def setUp(self):
+        """This method adds needed info for tests."""
+        self.url = reverse("api:schedules-availability")
+        self.day = datetime.now().date() + timedelta(days=1)
+        self.first, self.second = (
+            SpecialistScheduleFactory(working_time=generate_working_time_intervals(start, end)).specialist
+            for start, end in (("09:00", "20:00"), ("10:00", "14:00"))
+        )
+        self.location = LocationFactory(working_time=generate_working_time("10:00", "18:00"))
+
+    def tearDown(self):
+        """This method deletes all users and cleans avatars' data."""
+        CustomUser.objects.all().delete()
+
+    def book(self, specialist, start, minutes, days=0, location=None):
+        """Create an appointment of the specialist."""
+        AppointmentFactory(
+            specialist=specialist,
+            location=location or LocationFactory(),
+            start_time=datetime.combine(
+                self.day + timedelta(days=days), string_to_time(start), tzinfo=get_current_timezone()
+            ),
+            duration=timedelta(minutes=minutes),
+        )
+
+    def get_free_intervals(self, response):
+        """Get free intervals by specialist id."""
+        return {row["specialist"]: row["free_intervals"] for row in response.data["results"]}
+
+    def test_availability_matrix(self):
+        """Test free intervals of every specialist for every day."""
+        self.book(self.first, "12:00", 30)
+        self.book(self.second, "10:00", 60, days=1)
+        params = {"specialists": [self.first.id, self.second.id], "date": self.day, "days": 2}
+
+        with self.assertNumQueries(3):
+            response = self.client.get(self.url, params)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["dates"], [self.day, self.day + timedelta(days=1)])
+        self.assertEqual(
+            self.get_free_intervals(response),
+            {
+                self.first.id: [[["09:00", "12:00"], ["12:30", "20:00"]], [["09:00", "20:00"]]],
+                self.second.id: [[["10:00", "14:00"]], [["11:00", "14:00"]]],
+            },
+        )
+
+    def test_availability_matrix_location(self):
+        """Test free intervals are restricted by location hours and location appointments."""
+        other_specialist = SpecialistScheduleFactory().specialist
+        self.book(other_specialist, "13:00", 60, location=self.location)
+        params = {"specialists": [self.first.id], "date": self.day, "days": 1, "location": self.location.id}
+
+        response = self.client.get(self.url, params)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            self.get_free_intervals(response), {self.first.id: [[["10:00", "13:00"], ["14:00", "18:00"]]]}
+        )
+
+    def test_availability_matrix_past_date_error(self):
+        """Test the matrix can't start in the past."""
+        response = self.client.get(self.url, {"date": self.day - timedelta(days=3)})
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("date", response.data)
+
+
+class FreeTimeIntervalsTest(TestCase):
+    """Class FreeTimeIntervalsTest for testing free time of a day."""
+
+    def test_free_time_intervals(self):
+        """Test free intervals of a specialist are working time without appointments."""
+        self.assertEqual(
+            get_free_time_intervals([["09:00", "13:00"]], [["09:00", "09:30"], ["12:00", "13:00"]]),
+            [["09:30", "12:00"]],
+        )
+
+
+class ScheduleEventsTest(APITestCase):
+    """Class ScheduleEventsTest for testing the change feed of specialists' schedules."""
+
+    def setUp(self):
+        """This method adds needed info for tests."""
+        self.schedule = SpecialistScheduleFactory(working_time=generate_working_time_intervals("10:00", "20:00"))
+        self.specialist = self.schedule.specialist
+        self.day = datetime.now().date() + timedelta(days=1)
+        self.url = reverse("api:schedules-events")
+        self.cursor = get_latest_event_id()
+
+    def tearDown(self):
+        """This method deletes all users and cleans avatars' data."""
+        CustomUser.objects.all().delete()
+
+    def book(self, start):
+        """Create an appointment of the specialist for the day."""
+        return AppointmentFactory(
+            specialist=self.specialist,
+            start_time=datetime.combine(self.day, string_to_time(start), tzinfo=get_current_timezone()),
+        )
+
+    def test_events_of_appointment_changes(self):
+        """Test appointment changes are appended to the feed with their days."""
+        appointment = self.book("12:00")
+        appointment.start_time += timedelta(days=1)
+        appointment.save()
+        appointment.delete()
+
+        events = ScheduleEvent.objects.filter(id__gt=self.cursor).values_list("kind", "date")
+        self.assertEqual(
+            sorted(events),
+            sorted(
+                [
+                    (ScheduleEvent.KindChoices.APPOINTMENT_CREATED, self.day),
+                    (ScheduleEvent.KindChoices.APPOINTMENT_UPDATED, self.day),
+                    (ScheduleEvent.KindChoices.APPOINTMENT_UPDATED, self.day + timedelta(days=1)),
+                    (ScheduleEvent.KindChoices.APPOINTMENT_DELETED, self.day + timedelta(days=1)),
+                ]
+            ),
+        )
+
+    def test_long_poll_since_cursor(self):
+        """Test long-poll returns only events after the cursor of the specialist."""
+        response = self.client.get(self.url)
+        self.assertEqual(response.data, {"cursor": self.cursor, "events": []})
+
+        appointment = self.book("12:00")
+        AppointmentFactory()
+        self.schedule.save()
+
+        response = self.client.get(self.url, {"since": self.cursor, "specialist": self.specialist.id})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        events = response.data["events"]
+        self.assertEqual([event["kind"] for event in events], ["appointment_created", "schedule_changed"])
+        self.assertEqual(events[0]["appointment"], appointment.id)
+        self.assertEqual(response.data["cursor"], events[-1]["id"])
+        self.assertEqual(response["ETag"], f'"{events[-1]["id"]}"')
+
+    def test_long_poll_etag(self):
+        """Test long-poll with the ETag returns Not Modified without new events."""
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=f'"{self.cursor}"')
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        self.book("12:00")
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=f'"{self.cursor}"')
+        self.assertEqual(len(response.data["events"]), 1)
+
+    def test_gap_stops_readers_until_it_settles(self):
+        """Test events after a missing id are read only after the gap is older than the commit lag."""
+        appointments = [self.book(start) for start in ("12:00", "13:00", "14:00")]
+        ids = list(ScheduleEvent.objects.filter(id__gt=self.cursor).values_list("id", flat=True))
+        ScheduleEvent.objects.filter(appointment_id=appointments[1].id).delete()
+
+        self.assertEqual(get_latest_event_id(), ids[0])
+        self.assertEqual([event["id"] for event in get_events(self.cursor)], ids[:1])
+
+        lag = timedelta(seconds=settings.SCHEDULE_EVENTS_COMMIT_LAG + 1)
+        ScheduleEvent.objects.filter(id=ids[2]).update(created_at=F("created_at") - lag)
+        self.assertEqual(get_latest_event_id(), ids[2])
+        self.assertEqual([event["id"] for event in get_events(self.cursor)], [ids[0], ids[2]])
+
+    def test_long_poll_waits_for_feed_changes(self):
+        """Test long-poll queries the feed again only after the watcher reports a new event."""
+
+        def book_while_waiting(after_id, timeout):
+            self.book("12:00")
+            return get_latest_event_id()
+
+        with mock.patch.object(event_feed_watcher, "wait", side_effect=book_while_waiting) as wait:
+            response = self.client.get(self.url, {"since": self.cursor, "timeout": 5})
+
+        self.assertEqual([event["kind"] for event in response.data["events"]], ["appointment_created"])
+        wait.assert_called_once_with(self.cursor, mock.ANY)
+
+    @override_settings(SCHEDULE_EVENTS_POLL_INTERVAL=0.01)
+    def test_event_feed_watcher(self):
+        """Test one polling thread wakes up waiters after the latest id changes and stops when nobody waits."""
+        load_latest_id = mock.Mock(side_effect=itertools.count(1))
+        watcher = EventFeedWatcher(load_latest_id)
+
+        self.assertGreater(watcher.wait(3, timeout=5), 3)
+        with mock.patch.object(watcher, "_load_latest_id", return_value=watcher.latest_id):
+            self.assertEqual(watcher.wait(watcher.latest_id, timeout=0.05), watcher.latest_id)
+
+        time.sleep(0.1)
+        calls = load_latest_id.call_count
+        time.sleep(0.05)
+        self.assertEqual(load_latest_id.call_count, calls)
+
+    def test_events_stream(self):
+        """Test the stream sends events after the Last-Event-ID until the client disconnects."""
+        self.book("12:00")
+        self.book("13:00")
+        messages = []
+        sent = asyncio.Event()
+
+        async def receive():
+            await sent.wait()
+            return {"type": "http.disconnect"}
+
+        async def send(message):
+            messages.append(message)
+            if message.get("more_body"):
+                sent.set()
+
+        scope = {
+            "type": "http",
+            "path": "/api/schedules/events/stream/",
+            "query_string": f"specialist={self.specialist.id}".encode(),
+            "headers": [(b"last-event-id", str(self.cursor).encode())],
+        }
+        with mock.patch("api.streams.event_feed_watcher", EventFeedWatcher(mock.Mock(return_value=0))):
+            async_to_sync(schedule_events_stream)(scope, receive, send)
+
+        self.assertEqual(messages[0]["status"], 200)
+        body = messages[1]["body"].decode()
+        data = [json.loads(line.removeprefix("data: ")) for line in body.splitlines() if line.startswith("data: ")]
+        self.assertEqual([event["kind"] for event in data], ["appointment_created", "appointment_created"])
+        self.assertIn(f"id: {data[-1]['id']}", body)
+
+
+class WorkingIntervalTest(QueryPlanMixin, APITestCase):
+    """Class WorkingIntervalTest for testing working intervals synced from working time JSON and their filters."""
+
+    def setUp(self):
+        """This method adds needed info for tests."""
+        self.morning = SpecialistScheduleFactory(
+            working_time={**generate_working_time_intervals(), "Tue": [["09:00", "11:00"], ["11:00", "13:00"]]}
+        )
+        self.evening = SpecialistScheduleFactory(
+            working_time={**generate_working_time_intervals(), "Tue": [["14:00", "18:00"]]}
+        )
+        self.location = LocationFactory(working_time={**generate_working_time(), "Tue": ["09:00", "15:00"]})
+        self.specialists_url = reverse("api:specialists-list-create")
+
+    def tearDown(self):
+        """This method deletes all users and cleans avatars' data."""
+        CustomUser.objects.all().delete()
+
+    def get_specialist_ids(self, params):
+        """Get ids of found specialists."""
+        response = self.client.get(self.specialists_url, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return sorted(specialist["id"] for specialist in response.data["results"])
+
+    def test_intervals_synced_on_save(self):
+        """Test adjacent ranges are merged and intervals are replaced when working time changes."""
+        intervals = WorkingInterval.objects.filter(schedule=self.morning).values_list(
+            "weekday", "start_minute", "end_minute"
+        )
+        self.assertEqual(list(intervals), [(1, 540, 780)])
+
+        self.morning.working_time = {**generate_working_time_intervals(), "Fri": [["10:00", "12:00"]]}
+        self.morning.save()
+
+        self.assertEqual(list(intervals.all()), [(4, 600, 720)])
+        self.assertEqual(
+            list(self.location.working_intervals.values_list("weekday", "start_minute", "end_minute")),
+            [(1, 540, 900)],
+        )
+
+    def test_specialists_working_time_filter(self):
+        """Test specialists are found by a day and a time window which lies inside one working interval."""
+        morning_id, evening_id = self.morning.specialist_id, self.evening.specialist_id
+
+        self.assertEqual(self.get_specialist_ids({"date": "2030-01-01"}), sorted([morning_id, evening_id]))
+        self.assertEqual(self.get_specialist_ids({"weekday": "Mon"}), [])
+        self.assertEqual(
+            self.get_specialist_ids({"weekday": "Tue", "time_from": "10:30", "time_to": "12:30"}), [morning_id]
+        )
+        self.assertEqual(self.get_specialist_ids({"time_from": "14:00", "time_to": "15:00"}), [evening_id])
+        self.assertEqual(self.get_specialist_ids({"weekday": "Tue", "time_from": "12:00", "time_to": "15:00"}), [])
+        self.assertEqual(self.get_specialist_ids({"date": "2030-02-30"}), [])
+
+    def test_locations_working_time_filter(self):
+        """Test locations are found by a day and a time window."""
+        url = reverse("api:locations-list-create")
+
+        response = self.client.get(url, {"weekday": "Tue", "time_from": "14:00", "time_to": "15:00"})
+        late_response = self.client.get(url, {"weekday": "Tue", "time_from": "14:00", "time_to": "16:00"})
+
+        self.assertEqual([location["name"] for location in response.data["results"]], [self.location.name])
+        self.assertEqual(late_response.data["results"], [])
+
+    def test_rebuild_working_intervals(self):
+        """Test the command fills working intervals of existing schedules and locations."""
+        WorkingInterval.objects.all().delete()
+        out = io.StringIO()
+
+        call_command("syncworkingintervals", stdout=out)
+
+        self.assertEqual(WorkingInterval.objects.count(), 3)
+        self.assertIn("Successfully created 3 working intervals", out.getvalue())
+
+    def test_working_window_query_uses_index(self):
+        """Test the time window of specialists is searched by the schedule, weekday and start minute index."""
+        self.assert_uses_index_range(
+            lambda: self.get_specialist_ids({"weekday": "Tue", "time_from": "14:00", "time_to": "15:00"}),
+            "api_workinginterval",
+            "working_interval_schedule",
+            "start_minute",
+        )
@@ -0,0 +1,108 @@
+"""The module includes tests for delta sync of specialists, locations and schedules."""
+
+from datetime import timedelta
+from unittest import mock
+
+from api.factories.factories import CustomUserFactory, LocationFactory, SpecialistFactory, SpecialistScheduleFactory
+from django.contrib.auth.models import Group
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.reverse import reverse
+from rest_framework.test import APITestCase
+
+from ..models import CustomUser, Location, Tombstone
+
+
+class DeltaSyncViewTest(APITestCase):
+    """Class DeltaSyncViewTest for testing changes since the previous sync."""
+
+    def setUp(self):
+        """This method adds objects synced before the previous sync."""
+        self.url = reverse("api:delta-sync")
+        self.schedule = SpecialistScheduleFactory()
+        self.location = LocationFactory()
+        self.specialist = SpecialistFactory()
+
+    def tearDown(self):
+        """This method deletes all users and cleans avatars' data."""
+        CustomUser.objects.all().delete()
+
+    def sync(self, updated_since=None):
+        """Get changes since the time."""
+        params = {"updated_since": updated_since.isoformat()} if updated_since else {}
+        response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data
+
+    def test_full_sync(self):
+        """Test all objects are sent without the previous sync time."""
+        data = self.sync()
+
+        self.assertTrue(data["is_full"])
+        self.assertEqual(
+            [s["id"] for s in data["specialists"]], sorted([self.schedule.specialist.id, self.specialist.id])
+        )
+        self.assertEqual([location["id"] for location in data["locations"]], [self.location.id])
+        self.assertEqual(data["schedules"][0]["specialist"], self.schedule.specialist.id)
+        self.assertEqual(data["deleted"], {"specialists": [], "locations": [], "schedules": []})
+
+    def test_delta_sync(self):
+        """Test only objects changed or deleted since the previous sync are sent."""
+        updated_since = timezone.now()
+        self.location.name = "New name"
+        self.location.save()
+        deleted_schedule_id = self.schedule.id
+        self.schedule.delete()
+        Location.objects.filter(id=self.location.id).delete()
+        deleted_specialist_id = self.specialist.id
+        self.specialist.delete()
+        new_specialist = SpecialistFactory()
+
+        data = self.sync(updated_since)
+
+        self.assertFalse(data["is_full"])
+        self.assertEqual([s["id"] for s in data["specialists"]], [new_specialist.id])
+        self.assertEqual(data["locations"], [])
+        self.assertEqual(data["schedules"], [])
+        self.assertEqual(
+            data["deleted"],
+            {
+                "specialists": [deleted_specialist_id],
+                "locations": [self.location.id],
+                "schedules": [deleted_schedule_id],
+            },
+        )
+        self.assertLess(data["next_updated_since"], timezone.now())
+
+    def test_sync_older_than_tombstones(self):
+        """Test clients which have not synced longer than tombstones are kept get all objects."""
+        with self.settings(DELTA_SYNC_KEEP_DAYS=1):
+            data = self.sync(timezone.now() - timedelta(days=2))
+
+        self.assertTrue(data["is_full"])
+        self.assertEqual(len(data["specialists"]), 2)
+
+    def test_delta_sync_queries(self):
+        """Test delta sync has a constant count of queries."""
+        with mock.patch("api.views.get_sync_window", return_value=(timezone.now(), timezone.now())):
+            with self.assertNumQueries(6):
+                self.client.get(self.url)
+
+    def test_tombstones_only_for_specialists(self):
+        """Test deleted users who are not specialists are not synced."""
+        CustomUserFactory().delete()
+        self.assertFalse(Tombstone.objects.filter(resource=Tombstone.ResourceChoices.SPECIALISTS).exists())
+
+    def test_tombstones_for_removed_specialists(self):
+        """Test users removed from the Specialist group from either side are synced as deleted ones."""
+        group = Group.objects.get(name="Specialist")
+        other_specialist = SpecialistFactory()
+        self.specialist.groups.remove(group)
+        group.user_set.clear()
+        CustomUserFactory().groups.clear()
+
+        tombstones = Tombstone.objects.filter(resource=Tombstone.ResourceChoices.SPECIALISTS)
+        self.assertEqual(
+            sorted(tombstones.values_list("object_id", flat=True)),
+            sorted([self.specialist.id, self.schedule.specialist_id, other_specialist.id]),
+        )
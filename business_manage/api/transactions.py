@@ -0,0 +1,60 @@
+"""Helpers for running transactions which can fail because of concurrent transactions."""
+
+import random
+import time
+import zlib
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import OperationalError, connection, transaction
+
+# PostgreSQL serialization_failure and deadlock_detected error codes
+RETRYABLE_PGCODES = {"40001", "40P01"}
+
+
+def is_retryable_error(error: OperationalError) -> bool:
+    """Return True if the transaction failed only because of concurrent transactions."""
+    if pgcode := getattr(error.__cause__, "pgcode", None):
+        return pgcode in RETRYABLE_PGCODES
+    return "database is locked" in str(error)
+
+
+def atomic_with_retries(func, *args, attempts: int | None = None, **kwargs):
+    """Run function inside the outermost transaction retrying it after serialization failures.
+
+    A failed savepoint can't be retried, the outer transaction keeps its snapshot and is aborted as well,
+    so RuntimeError is raised if the function is called inside another atomic block.
+    Delay between attempts grows exponentially with a random jitter.
+    """
+    attempts = attempts or settings.TRANSACTION_RETRY_ATTEMPTS
+    for attempt in range(1, attempts + 1):
+        try:
+            with transaction.atomic(durable=True):
+                return func(*args, **kwargs)
+        except OperationalError as error:
+            if attempt == attempts or not is_retryable_error(error):
+                raise
+            time.sleep(settings.TRANSACTION_RETRY_DELAY * 2 ** (attempt - 1) * random.uniform(0.5, 1.5))
+
+
+@contextmanager
+def database_lock(name: str):
+    """Try to take a lock named by the string for the session, yield True if it was taken.
+
+    PostgreSQL gets an advisory lock, so only one of the nodes sharing the database holds it.
+    SQLite serializes writing transactions itself, there the lock is always taken.
+    """
+    if connection.vendor != "postgresql":
+        yield True
+        return
+
+    key = zlib.crc32(name.encode())
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT pg_try_advisory_lock(%s)", [key])
+        is_locked = cursor.fetchone()[0]
+    try:
+        yield is_locked
+    finally:
+        if is_locked:
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT pg_advisory_unlock(%s)", [key])
@@ -1,8 +1,8 @@
 """Api URL Configuration."""
 
-import pytz
+from datetime import date, datetime
+
 from django.urls import path, register_converter
-from django.utils.timezone import datetime
 from rest_framework_simplejwt.views import TokenRefreshView
 
 from . import views
@@ -13,18 +13,19 @@ app_name = "api"
 class DateConverter:
     """Converter class for passing date in urls.
 
-    Provide to_python and to_url methods.
+    Provide to_python and to_url methods. Dates are local business dates of TIME_ZONE,
+    services turn them into ranges of aware datetimes.
     """
 
     regex = r"\d{4}-\d{1,2}-\d{1,2}"
 
     def to_python(self, value):
-        """Converts date from url to python datetime object."""
-        return pytz.utc.localize(datetime.strptime(value, "%Y-%m-%d"))
+        """Converts date from url to python date object."""
+        return datetime.strptime(value, "%Y-%m-%d").date()
 
     def to_url(self, value):
-        """Return date value from url."""
-        return value
+        """Return date value for url."""
+        return value.isoformat() if isinstance(value, date) else value
 
 
 register_converter(DateConverter, "date")
@@ -32,16 +33,37 @@ register_converter(DateConverter, "date")
 urlpatterns = [
     path("specialists/", views.SpecialistList.as_view(), name="specialists-list-create"),
     path("specialists/<int:pk>/", views.SpecialistDetail.as_view(), name="Specialist-detail"),
+    path(
+        "specialists/export/<str:export_format>/", views.SpecialistExportView.as_view(), name="specialists-export"
+    ),
     path("locations/", views.LocationList.as_view(), name="locations-list-create"),
+    path("locations/<int:pk>/board/<date:a_date>/", views.LocationBoardView.as_view(), name="location-board"),
     path("appointments/", views.AppointmentList.as_view(), name="appointments-list-create"),
+    path("appointments/next-available/", views.NextAvailableSlotView.as_view(), name="appointments-next-available"),
+    path(
+        "appointments/export/<str:export_format>/", views.AppointmentExportView.as_view(), name="appointments-export"
+    ),
+    path("appointments/history/", views.AppointmentHistoryList.as_view(), name="appointments-history"),
+    path("appointments/import/", views.AppointmentImport.as_view(), name="appointments-import"),
+    path("appointments/bulk/", views.AppointmentBulkCreate.as_view(), name="appointments-bulk-create"),
     path("appointments/<int:pk>/", views.AppointmentDetail.as_view(), name="appointment-detail"),
+    path("appointment-series/", views.AppointmentSeriesList.as_view(), name="appointment-series-list-create"),
+    path("appointment-series/<int:pk>/", views.AppointmentSeriesDetail.as_view(), name="appointment-series-detail"),
     path("schedules/", views.SpecialistScheduleList.as_view(), name="schedules-list-create"),
+    path("schedules/events/", views.ScheduleEventsView.as_view(), name="schedules-events"),
+    path("schedules/availability/", views.AvailabilityMatrixView.as_view(), name="schedules-availability"),
     path("specialists/<int:pk>/schedule/", views.SpecialistScheduleDetail.as_view(), name="specialist-schedule"),
     path(
         "specialists/<int:s_id>/schedule/<date:a_date>/",
         views.SpecialistDateScheduleView.as_view(),
         name="specialist-schedule-date",
     ),
+    path(
+        "specialists/<int:s_id>/schedule/<date:from_date>/<date:to_date>/",
+        views.SpecialistDateRangeScheduleView.as_view(),
+        name="specialist-schedule-range",
+    ),
+    path("sync/", views.DeltaSyncView.as_view(), name="delta-sync"),
     path("token/", views.MyTokenObtainPairView.as_view(), name="token_obtain_pair"),
     path("token/refresh/", TokenRefreshView.as_view(), name="token_refresh"),
     path("token/logout/", views.LogoutView.as_view(), name="token_logout"),
@@ -1,10 +1,11 @@
 """Useful utils for the project."""
 
 import calendar
-from datetime import datetime, time
+from datetime import date, datetime, time, timedelta
 
-from django.db.models import CharField, Value
+from django.db.models import CharField, Q, Value
 from django.db.models.functions import Concat
+from django.utils.timezone import make_aware
 
 from . import models
 
@@ -49,6 +50,26 @@ def is_inside_interval(main_interval: list[time], inner_interval: list[time]) ->
     return (inner_interval[0] >= main_interval[0]) and (inner_interval[1] <= main_interval[1])
 
 
+def get_local_day_range(day: date, last_day: date | None = None) -> tuple[datetime, datetime]:
+    """Return aware datetimes of the local day beginning and the next day beginning.
+
+    With last_day the range covers all days from day to last_day inclusive.
+    """
+    day_start = make_aware(datetime.combine(day, time.min))
+    day_end = make_aware(datetime.combine((last_day or day) + timedelta(days=1), time.min))
+    return day_start, day_end
+
+
+def get_local_day_filter(field_name: str, day: date, last_day: date | None = None) -> Q:
+    """Get filter of datetime field values which lie inside the local days.
+
+    The half-open range compares the column itself, unlike the __date lookup which casts it
+    to the current time zone, so an index on the field is used.
+    """
+    day_start, day_end = get_local_day_range(day, last_day)
+    return Q(**{f"{field_name}__gte": day_start, f"{field_name}__lt": day_end})
+
+
 def get_location_choices():
     """Get locations' data for choice field."""
     try:
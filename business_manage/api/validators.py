@@ -1,15 +1,14 @@
 """Validators for business_manage project."""
 
 import calendar
-import itertools
 from datetime import time, timedelta
-from operator import itemgetter
 
 from django.contrib.auth import get_user_model
 from django.utils import timezone
 from rest_framework.exceptions import ValidationError
 
-from .utils import string_interval_to_time_interval, string_to_time
+from .services.intervals import from_string_intervals, has_overlaps
+from .utils import string_interval_to_time_interval
 
 
 def validate_rounded_minutes_base(time_value: time) -> str | None:
@@ -108,12 +107,7 @@ def validate_working_time_values(json: dict[str, list[str]]) -> None:
     Time intervals should not be covering each other.
     """
     for day, intervals in json.items():
-        time_intervals = map(lambda x: [string_to_time(x[0]), string_to_time(x[1])], intervals)
-        sorted_intervals = sorted(time_intervals, key=itemgetter(0))
-        intervals_values = list(itertools.chain(*sorted_intervals))
-        sorted_intervals_values = sorted(intervals_values)
-
-        if intervals_values != sorted_intervals_values:
+        if has_overlaps(from_string_intervals(intervals)):
             raise ValidationError({day: "Time ranges cannot cover each other."})
 
 
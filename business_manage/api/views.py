@@ -1,40 +1,88 @@
 """Business_manage projects views."""
 
+import codecs
+from datetime import timedelta
+
+from django.conf import settings
 from django.contrib.auth import logout
+from django.http import Http404, StreamingHttpResponse
 from django.utils import timezone
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import filters, generics, status
 from rest_framework.exceptions import ValidationError
 from rest_framework.generics import get_object_or_404
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import SAFE_METHODS, IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework_simplejwt.views import TokenObtainPairView
 
-from .filters import SpecialistFilter
-from .models import Appointment, CustomUser, SpecialistSchedule
+from .core import IdempotentCreateMixin
+from .filters import AppointmentFilter, LocationFilter, SpecialistFilter
+from .models import (
+    Appointment,
+    AppointmentSeries,
+    ArchivedAppointment,
+    CustomUser,
+    Location,
+    SpecialistSchedule,
+    Tombstone,
+)
 from .permissions import IsBusinessOwnerOrAdmin, IsBusinessOwnerOrManager, ReadOnly
-from .serializers.appointment_serializers import AppointmentSerializer
+from .serializers.appointment_serializers import (
+    AppointmentBatchItemSerializer,
+    AppointmentBulkCreateSerializer,
+    AppointmentHistorySerializer,
+    AppointmentImportSerializer,
+    AppointmentSerializer,
+    AppointmentSeriesSerializer,
+    AvailableSlotSerializer,
+    SlotSearchSerializer,
+)
 from .serializers.customuser_serializers import (
     CreateSpecialistSerializer,
     SpecialistSerializer,
 )
 from .serializers.location_serializers import LocationSerializer
 from .serializers.schedule_serializers import (
+    AvailabilityMatrixSerializer,
+    AvailabilitySerializer,
+    LocationBoardSerializer,
+    ScheduleEventSerializer,
+    ScheduleEventsSerializer,
     SpecialistScheduleDetailSerializer,
     SpecialistScheduleSerializer,
 )
+from .serializers.sync_serializers import (
+    DeltaSyncSerializer,
+    SyncLocationSerializer,
+    SyncScheduleSerializer,
+    SyncSpecialistSerializer,
+)
 from .serializers.token_serializers import (
     MyTokenObtainPairSerializer,
     RefreshTokenSerializer,
 )
 from .services import customuser_services as us
 from .services import location_services as ls
-from .services.appointment_services import get_appointments_time_intervals
-from .services.schedule_services import get_free_time_intervals, get_working_day
+from .services.archive_services import get_appointments_history
+from .services import board_cache
+from .services.availability_services import get_availability_matrix, get_location_board
+from .services.event_services import get_latest_event_id, parse_event_cursor, wait_for_events
+from .services.export_services import (
+    APPOINTMENT_EXPORT_FIELDS,
+    SPECIALIST_EXPORT_FIELDS,
+    iterate_export_rows,
+    stream_csv,
+    stream_ndjson,
+)
+from .services.import_services import import_appointments
+from .services.schedule_cache import get_day_schedule, get_day_schedules
+from .services.schedule_services import get_working_day
+from .services.slot_services import find_next_available_slots
+from .services.sync_services import get_changed_objects, get_deleted_ids, get_sync_window
 
 
-class SpecialistList(generics.ListCreateAPIView):
+class SpecialistList(IdempotentCreateMixin, generics.ListCreateAPIView):
     """SpecialistList class for creating and reviewing specialists."""
 
     queryset = us.get_all_specialists().order_by("email")
@@ -44,20 +92,17 @@ class SpecialistList(generics.ListCreateAPIView):
     filter_backends = [DjangoFilterBackend, filters.OrderingFilter]
     filterset_class = SpecialistFilter
     ordering_fields = ["email", "position", "first_name"]
+    cursor_ordering = ["email"]
 
-    def post(self, request, *args, **kwargs):
-        """Post method for creating specialists."""
-        serializer = self.get_serializer(data=request.data)
-        serializer.is_valid(raise_exception=True)
+    def perform_create(self, serializer):
+        """Save new user as a specialist."""
         us.add_user_to_group_specialist(serializer.save())
-        headers = self.get_success_headers(serializer.data)
-        return Response(serializer.data, status=status.HTTP_201_CREATED, headers=headers)
 
 
 class SpecialistDetail(generics.RetrieveUpdateDestroyAPIView):
     """SpecialistDetail class for updating and reviewing specialist."""
 
-    queryset = us.get_all_specialists()
+    queryset = us.get_all_specialists().select_related("schedule").prefetch_related("groups")
     serializer_class = SpecialistSerializer
     permission_classes = [ReadOnly | IsBusinessOwnerOrManager]
 
@@ -69,27 +114,139 @@ class LocationList(generics.ListCreateAPIView):
     serializer_class = LocationSerializer
     permission_classes = [ReadOnly | IsBusinessOwnerOrManager]
 
+    filter_backends = [DjangoFilterBackend]
+    filterset_class = LocationFilter
 
-class AppointmentList(generics.ListCreateAPIView):
+
+class AppointmentList(IdempotentCreateMixin, generics.ListCreateAPIView):
     """AppointmentList class for creating and reviewing appointments."""
 
-    queryset = Appointment.objects.all()
+    queryset = Appointment.objects.select_related("specialist", "location").order_by("start_time", "id")
     serializer_class = AppointmentSerializer
     permission_classes = [ReadOnly | IsBusinessOwnerOrAdmin]
 
+    filter_backends = [DjangoFilterBackend, filters.OrderingFilter]
+    filterset_class = AppointmentFilter
+    ordering_fields = ["start_time", "id"]
+    cursor_ordering = ["start_time", "id"]
+
+
+class AppointmentHistoryList(generics.ListAPIView):
+    """AppointmentHistoryList class for reviewing live and archived appointments from the latest ones.
+
+    Filters of the appointments list are applied to both tables.
+    """
+
+    serializer_class = AppointmentHistorySerializer
+    permission_classes = [ReadOnly | IsBusinessOwnerOrAdmin]
+    cursor_ordering = None
+
+    def get_queryset(self):
+        """Get the union of filtered live and archived appointments."""
+        return get_appointments_history(
+            self.filter_appointments(Appointment.objects.all()),
+            self.filter_appointments(ArchivedAppointment.objects.all()),
+        )
+
+    def filter_queryset(self, queryset):
+        """The union is already filtered by get_queryset."""
+        return queryset
+
+    def filter_appointments(self, queryset):
+        """Filter appointments of one table by query parameters."""
+        filterset = AppointmentFilter(self.request.query_params, queryset=queryset, request=self.request)
+        if not filterset.is_valid():
+            raise ValidationError(filterset.errors)
+        return filterset.qs
+
+
+class AppointmentBulkCreate(generics.GenericAPIView):
+    """AppointmentBulkCreate class for creating a batch of appointments with one request."""
+
+    serializer_class = AppointmentBulkCreateSerializer
+    permission_classes = [IsBusinessOwnerOrAdmin]
+
+    def post(self, request, *args, **kwargs):
+        """Post method for creating appointments.
+
+        Response contains created appointments and errors of appointments which were not created.
+        """
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        appointments = serializer.save()
+        data = {
+            "created": AppointmentSerializer(appointments, many=True).data,
+            "errors": serializer.appointments_errors,
+        }
+        response_status = status.HTTP_201_CREATED if appointments else status.HTTP_400_BAD_REQUEST
+        return Response(data, status=response_status)
+
+
+class AppointmentImport(generics.GenericAPIView):
+    """AppointmentImport class for importing appointments from an uploaded CSV file."""
+
+    serializer_class = AppointmentImportSerializer
+    permission_classes = [IsBusinessOwnerOrAdmin]
+
+    def post(self, request, *args, **kwargs):
+        """Post method for importing appointments.
+
+        Response contains count of created appointments and errors of rejected rows by line numbers.
+        """
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        created, errors = 0, []
+        lines = codecs.iterdecode(serializer.validated_data["file"], "utf-8-sig")
+        for batch_created, batch_errors in import_appointments(lines, AppointmentBatchItemSerializer):
+            created += batch_created
+            errors.extend({"line": line, "errors": batch_errors[line]} for line in sorted(batch_errors))
+
+        response_status = status.HTTP_201_CREATED if created else status.HTTP_400_BAD_REQUEST
+        return Response({"created": created, "errors": errors}, status=response_status)
+
 
 class AppointmentDetail(generics.RetrieveUpdateDestroyAPIView):
     """AppointmentList class for updating and reviewing appointment detail."""
 
-    queryset = Appointment.objects.all()
+    queryset = Appointment.objects.select_related("specialist", "location")
     serializer_class = AppointmentSerializer
     permission_classes = [ReadOnly | IsBusinessOwnerOrAdmin]
 
+    def get_object(self):
+        """Get the appointment, archived appointments are found only for reading."""
+        try:
+            return super().get_object()
+        except Http404:
+            if self.request.method not in SAFE_METHODS:
+                raise
+        archived_appointment = get_object_or_404(
+            ArchivedAppointment.objects.select_related("specialist", "location"), pk=self.kwargs["pk"]
+        )
+        self.check_object_permissions(self.request, archived_appointment)
+        return archived_appointment
 
-class SpecialistScheduleList(generics.ListCreateAPIView):
+
+class AppointmentSeriesList(IdempotentCreateMixin, generics.ListCreateAPIView):
+    """AppointmentSeriesList class for creating and reviewing recurring appointments."""
+
+    queryset = AppointmentSeries.objects.select_related("specialist", "location")
+    serializer_class = AppointmentSeriesSerializer
+    permission_classes = [ReadOnly | IsBusinessOwnerOrAdmin]
+
+
+class AppointmentSeriesDetail(generics.RetrieveUpdateDestroyAPIView):
+    """AppointmentSeriesDetail class for updating and reviewing recurring appointments."""
+
+    queryset = AppointmentSeries.objects.select_related("specialist", "location")
+    serializer_class = AppointmentSeriesSerializer
+    permission_classes = [ReadOnly | IsBusinessOwnerOrAdmin]
+
+
+class SpecialistScheduleList(IdempotentCreateMixin, generics.ListCreateAPIView):
     """SpecialistScheduleList class for creating and reviewing schedules."""
 
-    queryset = SpecialistSchedule.objects.all()
+    queryset = SpecialistSchedule.objects.select_related("specialist")
     serializer_class = SpecialistScheduleSerializer
     permission_classes = [ReadOnly | IsBusinessOwnerOrManager]
 
@@ -110,7 +267,9 @@ class SpecialistScheduleDetail(generics.RetrieveUpdateDestroyAPIView):
     def get_object(self):
         """Get schedule for specific specialist."""
         specialist_id = self.kwargs["pk"]
-        specialist = get_object_or_404(CustomUser, id=specialist_id, groups__name__icontains="Specialist")
+        specialist = get_object_or_404(
+            CustomUser.objects.select_related("schedule"), id=specialist_id, groups__name__icontains="Specialist"
+        )
         self.has_schedule(specialist)
         return specialist.schedule
 
@@ -121,13 +280,13 @@ class SpecialistDateScheduleView(APIView):
     def get(self, request, s_id, a_date):
         """GET method for retrieving schedule."""
         specialist = get_object_or_404(
-            CustomUser,
+            CustomUser.objects.select_related("schedule"),
             id=s_id,
             groups__name__icontains="Specialist",
             schedule__isnull=False,
         )
 
-        if a_date.date() < timezone.now().date():
+        if a_date < timezone.localdate():
             return Response(
                 {"detail": "You can't see schedule of the past days."},
                 status=status.HTTP_400_BAD_REQUEST,
@@ -141,20 +300,217 @@ class SpecialistDateScheduleView(APIView):
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-        a_intervals = get_appointments_time_intervals(specialist, a_date)
-
-        free_time_intervals = get_free_time_intervals(schedule_intervals, a_intervals)
+        all_intervals = get_day_schedule(specialist, a_date, schedule_intervals)
 
-        all_intervals = {
-            "appointments_intervals": a_intervals,
-            "free_intervals": free_time_intervals,
-        }
         return Response(
             all_intervals,
             status=status.HTTP_200_OK,
         )
 
 
+class SpecialistDateRangeScheduleView(APIView):
+    """View for displaying specialist's schedule for every day of the period."""
+
+    def get(self, request, s_id, from_date, to_date):
+        """GET method for retrieving schedules of the days from from_date to to_date inclusive."""
+        specialist = get_object_or_404(
+            CustomUser.objects.select_related("schedule"),
+            id=s_id,
+            groups__name__icontains="Specialist",
+            schedule__isnull=False,
+        )
+
+        if from_date < timezone.localdate():
+            return Response(
+                {"detail": "You can't see schedule of the past days."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        if not 0 <= (to_date - from_date).days < settings.SCHEDULE_RANGE_MAX_DAYS:
+            return Response(
+                {"detail": f"Period should contain from 1 to {settings.SCHEDULE_RANGE_MAX_DAYS} days."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        days = [from_date + timedelta(days=offset) for offset in range((to_date - from_date).days + 1)]
+        day_schedules = get_day_schedules(specialist, days)
+
+        return Response(
+            [{"date": day, **day_schedules[day]} for day in days],
+            status=status.HTTP_200_OK,
+        )
+
+
+class LocationBoardView(APIView):
+    """View for displaying all specialists working on the day with their free time at the location.
+
+    Specialists are filtered by SpecialistFilter, boards are cached by the location, the day and the position.
+    """
+
+    def get(self, request, pk, a_date):
+        """GET method for retrieving the board."""
+        location = get_object_or_404(Location.objects.filter(working_time__isnull=False), pk=pk)
+        if a_date < timezone.localdate():
+            return Response(
+                {"detail": "You can't see schedule of the past days."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        specialist_filter = SpecialistFilter(
+            {"position": request.query_params.get("position", ""), "date": a_date.isoformat()},
+            queryset=CustomUser.specialists.select_related("schedule").order_by("last_name", "first_name", "id"),
+        )
+        if not specialist_filter.is_valid():
+            raise ValidationError(specialist_filter.errors)
+
+        key = board_cache.get_board_key(location.id, a_date, specialist_filter.form.cleaned_data["position"])
+        if (data := board_cache.get_location_board(key)) is None:
+            board = get_location_board(location, a_date, specialist_filter.qs)
+            data = {
+                "location": location.id,
+                "date": a_date,
+                "specialists": LocationBoardSerializer(board, many=True).data,
+            }
+            board_cache.set_location_board(key, data)
+        return Response(data, status=status.HTTP_200_OK)
+
+
+class NextAvailableSlotView(APIView):
+    """View for searching the earliest free slots of specialists with a position at a location."""
+
+    def get(self, request):
+        """GET method for retrieving the earliest free slots."""
+        serializer = SlotSearchSerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        params = serializer.validated_data
+        slots = find_next_available_slots(
+            params["position"],
+            params["location"],
+            params["duration"],
+            params["date"],
+            params["days"],
+            params["limit"],
+        )
+        return Response(AvailableSlotSerializer(slots, many=True).data, status=status.HTTP_200_OK)
+
+
+class AvailabilityMatrixView(APIView):
+    """View for displaying free intervals of many specialists during many days."""
+
+    def get(self, request):
+        """GET method for retrieving free intervals of specialists for every day of the period."""
+        serializer = AvailabilityMatrixSerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        params = serializer.validated_data
+        matrix = get_availability_matrix(
+            serializer.get_specialists(), params["date"], params["days"], params.get("location")
+        )
+        dates = [params["date"] + timezone.timedelta(days=offset) for offset in range(params["days"])]
+        return Response(
+            {"dates": dates, "results": AvailabilitySerializer(matrix, many=True).data},
+            status=status.HTTP_200_OK,
+        )
+
+
+class ScheduleEventsView(APIView):
+    """View for long-polling changes of specialists' schedules.
+
+    The cursor is id of the last seen event, it is passed as ?since= or as the ETag in If-None-Match.
+    Without the cursor the view returns the current one. The stream of the same events is served
+    by api.streams in asgi.py.
+    """
+
+    def get(self, request):
+        """GET method for retrieving events after the cursor, it waits for them up to the timeout."""
+        serializer = ScheduleEventsSerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        params = serializer.validated_data
+        since = params.get("since", parse_event_cursor(request.headers.get("If-None-Match")))
+
+        if since is None:
+            since, events = get_latest_event_id(), []
+        else:
+            events = wait_for_events(since, params.get("specialist"), params["timeout"])
+            if not events and "If-None-Match" in request.headers:
+                return Response(status=status.HTTP_304_NOT_MODIFIED, headers={"ETag": f'"{since}"'})
+
+        cursor = events[-1]["id"] if events else since
+        data = {"cursor": cursor, "events": ScheduleEventSerializer(events, many=True).data}
+        return Response(data, status=status.HTTP_200_OK, headers={"ETag": f'"{cursor}"'})
+
+
+class DeltaSyncView(APIView):
+    """View for syncing specialists, locations and schedules changed since the previous sync.
+
+    Changed objects are found by the update_at index, deleted ones by tombstones.
+    Clients which have not synced for too long get all objects with is_full set.
+    """
+
+    resources = {
+        Tombstone.ResourceChoices.SPECIALISTS: (
+            lambda: us.get_all_specialists().select_related("schedule").prefetch_related("groups"),
+            SyncSpecialistSerializer,
+        ),
+        Tombstone.ResourceChoices.LOCATIONS: (ls.get_all_locations, SyncLocationSerializer),
+        Tombstone.ResourceChoices.SCHEDULES: (SpecialistSchedule.objects.all, SyncScheduleSerializer),
+    }
+
+    def get(self, request):
+        """GET method for retrieving changes."""
+        serializer = DeltaSyncSerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        updated_since, next_updated_since = get_sync_window(serializer.validated_data.get("updated_since"))
+
+        data = {"is_full": updated_since is None, "next_updated_since": next_updated_since, "deleted": {}}
+        for resource, (get_queryset, resource_serializer) in self.resources.items():
+            changed = get_changed_objects(get_queryset().order_by("id"), updated_since)
+            data[resource] = resource_serializer(changed, many=True, context={"request": request}).data
+            data["deleted"][resource] = get_deleted_ids(resource, updated_since)
+        return Response(data, status=status.HTTP_200_OK)
+
+
+class ExportView(generics.GenericAPIView):
+    """Base view for streaming all filtered rows of the queryset as CSV or NDJSON.
+
+    Rows are read from the database by chunks, so memory doesn't grow with the count of exported rows.
+    """
+
+    export_name = None
+    export_fields = {}
+    content_types = {"csv": "text/csv", "ndjson": "application/x-ndjson"}
+    pagination_class = None
+
+    def get(self, request, export_format):
+        """GET method for streaming the export file."""
+        if export_format not in self.content_types:
+            raise Http404
+        rows = iterate_export_rows(self.filter_queryset(self.get_queryset()), self.export_fields)
+        content = stream_csv(rows, list(self.export_fields)) if export_format == "csv" else stream_ndjson(rows)
+
+        response = StreamingHttpResponse(content, content_type=self.content_types[export_format])
+        response["Content-Disposition"] = f'attachment; filename="{self.export_name}.{export_format}"'
+        return response
+
+
+class AppointmentExportView(ExportView):
+    """View for exporting appointments with names of specialists and locations."""
+
+    queryset = Appointment.objects.order_by("start_time", "id")
+    permission_classes = [IsBusinessOwnerOrAdmin]
+    filterset_class = AppointmentFilter
+    export_name = "appointments"
+    export_fields = APPOINTMENT_EXPORT_FIELDS
+
+
+class SpecialistExportView(ExportView):
+    """View for exporting specialists."""
+
+    queryset = us.get_all_specialists().order_by("email")
+    permission_classes = [IsBusinessOwnerOrManager]
+    filterset_class = SpecialistFilter
+    export_name = "specialists"
+    export_fields = SPECIALIST_EXPORT_FIELDS
+
+
 class MyTokenObtainPairView(TokenObtainPairView):
     """MyTokenObtainPairView class for creating and retrieving user tokens."""
 
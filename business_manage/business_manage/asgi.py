@@ -2,6 +2,7 @@
 ASGI config for business_manage project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
+The schedule events stream is served by its own ASGI application, other requests go to Django.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/4.1/howto/deployment/asgi/
@@ -13,4 +14,13 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'business_manage.settings')
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+from api.streams import SCHEDULE_EVENTS_STREAM_PATH, schedule_events_stream  # noqa: E402 apps have to be loaded
+
+
+async def application(scope, receive, send):
+    """Route the schedule events stream to its application and other requests to Django."""
+    if scope["type"] == "http" and scope["path"] == SCHEDULE_EVENTS_STREAM_PATH:
+        return await schedule_events_stream(scope, receive, send)
+    return await django_application(scope, receive, send)
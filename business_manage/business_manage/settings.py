@@ -12,6 +12,7 @@ https://docs.djangoproject.com/en/4.1/ref/settings/
 
 from datetime import timedelta
 from pathlib import Path
+from corsheaders.defaults import default_headers
 from decouple import Csv, config
 import dj_database_url
 
@@ -161,6 +162,68 @@ SIMPLE_JWT = {
     "UPDATE_LAST_LOGIN": True,
 }
 
+CACHES = {
+    "default": {
+        "BACKEND": config("CACHE_BACKEND", default="django.core.cache.backends.locmem.LocMemCache"),
+        "LOCATION": config("CACHE_LOCATION", default="business-manage"),
+    }
+}
+
+# Lists with a smaller planner estimate of rows are counted exactly in ?count=approximate mode
+APPROXIMATE_COUNT_THRESHOLD = config("APPROXIMATE_COUNT_THRESHOLD", default=10000, cast=int)
+
+# Lifetime of cached specialists' day schedules (seconds)
+DAY_SCHEDULE_CACHE_TTL = config("DAY_SCHEDULE_CACHE_TTL", default=5 * 60, cast=int)
+
+# Lifetime of cached location boards (seconds)
+LOCATION_BOARD_CACHE_TTL = config("LOCATION_BOARD_CACHE_TTL", default=5 * 60, cast=int)
+
+# Attempts and the first delay (seconds) for transactions failed because of concurrent transactions
+TRANSACTION_RETRY_ATTEMPTS = config("TRANSACTION_RETRY_ATTEMPTS", default=3, cast=int)
+TRANSACTION_RETRY_DELAY = config("TRANSACTION_RETRY_DELAY", default=0.05, cast=float)
+
+# Days fetched with one query and the longest period of the next available slot search
+SLOT_SEARCH_WINDOW_DAYS = config("SLOT_SEARCH_WINDOW_DAYS", default=7, cast=int)
+SLOT_SEARCH_MAX_DAYS = config("SLOT_SEARCH_MAX_DAYS", default=60, cast=int)
+
+# Largest count of days of one specialist schedule period
+SCHEDULE_RANGE_MAX_DAYS = config("SCHEDULE_RANGE_MAX_DAYS", default=31, cast=int)
+
+# Largest count of specialists and days of one availability matrix
+AVAILABILITY_MAX_SPECIALISTS = config("AVAILABILITY_MAX_SPECIALISTS", default=200, cast=int)
+AVAILABILITY_MAX_DAYS = config("AVAILABILITY_MAX_DAYS", default=31, cast=int)
+
+# Lifetime of stored responses for requests with the Idempotency-Key header (seconds)
+IDEMPOTENCY_KEY_TTL = config("IDEMPOTENCY_KEY_TTL", default=24 * 60 * 60, cast=int)
+
+# Appointments which ended this count of days ago are moved to the archive by chunks of the batch size
+APPOINTMENT_ARCHIVE_AFTER_DAYS = config("APPOINTMENT_ARCHIVE_AFTER_DAYS", default=30, cast=int)
+APPOINTMENT_ARCHIVE_BATCH_SIZE = config("APPOINTMENT_ARCHIVE_BATCH_SIZE", default=1000, cast=int)
+
+# Count of past appointments marked as completed by one UPDATE statement
+APPOINTMENT_COMPLETE_BATCH_SIZE = config("APPOINTMENT_COMPLETE_BATCH_SIZE", default=5000, cast=int)
+
+# Count of rows fetched from the database cursor at once by streaming exports
+EXPORT_CHUNK_SIZE = config("EXPORT_CHUNK_SIZE", default=2000, cast=int)
+
+# Count of imported rows validated together and created by one transaction
+APPOINTMENT_IMPORT_BATCH_SIZE = config("APPOINTMENT_IMPORT_BATCH_SIZE", default=1000, cast=int)
+
+# Schedule events feed: polling interval and heartbeat of streams (seconds), the longest long-poll wait (seconds),
+# count of events returned at once and days while events are kept
+SCHEDULE_EVENTS_POLL_INTERVAL = config("SCHEDULE_EVENTS_POLL_INTERVAL", default=1.0, cast=float)
+SCHEDULE_EVENTS_HEARTBEAT = config("SCHEDULE_EVENTS_HEARTBEAT", default=15, cast=int)
+SCHEDULE_EVENTS_MAX_WAIT = config("SCHEDULE_EVENTS_MAX_WAIT", default=25, cast=int)
+SCHEDULE_EVENTS_PAGE_SIZE = config("SCHEDULE_EVENTS_PAGE_SIZE", default=500, cast=int)
+SCHEDULE_EVENTS_KEEP_DAYS = config("SCHEDULE_EVENTS_KEEP_DAYS", default=7, cast=int)
+
+# Seconds after which a missing event id is treated as rolled back, transactions commit events faster
+SCHEDULE_EVENTS_COMMIT_LAG = config("SCHEDULE_EVENTS_COMMIT_LAG", default=10, cast=int)
+
+# Days while tombstones of deleted objects are kept for delta sync and overlap (seconds) of consecutive syncs
+DELTA_SYNC_KEEP_DAYS = config("DELTA_SYNC_KEEP_DAYS", default=30, cast=int)
+DELTA_SYNC_OVERLAP = config("DELTA_SYNC_OVERLAP", default=5, cast=int)
+
 CORS_ALLOWED_ORIGINS = config("CORS_ALLOWED_ORIGINS", cast=Csv())
 
 CORS_ALLOW_METHODS = [
@@ -171,3 +234,12 @@ CORS_ALLOW_METHODS = [
     "POST",
     "PUT",
 ]
+
+CORS_ALLOW_HEADERS = [
+    *default_headers,
+    "idempotency-key",
+]
+
+CORS_EXPOSE_HEADERS = [
+    "idempotent-replayed",
+]